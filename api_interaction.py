@@ -1,37 +1,73 @@
-import requests
-import sys
 from datetime import datetime, timedelta, timezone
 import logging
-import tkinter as tk
-from tkinter import simpledialog, messagebox
-from concurrent import futures
 import time
 import json
 import os
 import argparse
-import aiohttp
 import asyncio
-from dotenv import load_dotenv
+import random
+from io import StringIO
+import telemetry
+from sun_ephemeris import current_night
+from tle_elements import TleError, TleRecord, from_tle_data, tle_lines
 
-# Load environment variables
-load_dotenv()
-API_KEY = os.getenv("API_KEY")
+# Importing this module has no side effects: the API key, the NORAD ID list,
+# the cache and logging are only touched when planning actually runs, and
+# aiohttp, tkinter and the local pass computation are imported on first use.
 
-# Configure logging
-logging.basicConfig(filename='api_interaction_log.txt', level=logging.INFO, filemode='w', format='%(asctime)s %(levelname)s: %(message)s')
+BASE_URL = "https://api.n2yo.com/rest/v1/satellite"
+NORAD_IDS_FILENAME = 'NoradId.txt'
 
-# Set up command line arguments
-parser = argparse.ArgumentParser(description='Run TLE Updater Script.')
-parser.add_argument('--days', type=int, default=None, help='Number of days ahead for observation (max 10)')
-parser.add_argument('--observation-window', type=int, default=2, help='Observation window in minutes (default: 2)')
-parser.add_argument('--non-interactive', action='store_true', help='Run script in non-interactive mode')
-args = parser.parse_args()
+_api_key = None
+_cache = None
 
-with open('NoradId.txt', 'r') as file:
-    norad_ids_content = file.read()
-    norad_ids = norad_ids_content.strip().split(',')
 
-BASE_URL = "https://api.n2yo.com/rest/v1/satellite"
+class RequestPolicy:
+    """
+    How N2YO requests are made.
+
+    Each attempt gets `timeout` seconds. Timeouts, dropped connections,
+    429 and 5xx responses are retried up to `retries` times, after a full
+    jitter backoff of up to `backoff * 2 ** attempt` seconds (at most
+    `backoff_cap`, or the server's Retry-After if that is longer). With
+    `hedge_after`, an attempt still unanswered after that many seconds gets
+    a second, identical request and the first answer wins; this trims the
+    tail latency at the cost of extra API transactions, so it is off by
+    default.
+    """
+    def __init__(self, timeout: float = 15.0, retries: int = 3, backoff: float = 1.0, backoff_cap: float = 30.0,
+                 hedge_after: float = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.hedge_after = hedge_after
+
+
+request_policy = RequestPolicy()
+
+
+class TransientHTTPError(Exception):
+    """A 429 or 5xx response, worth retrying."""
+    def __init__(self, status: int, retry_after: float = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def get_api_key() -> str:
+    """N2YO API key from the environment, loading .env on first use."""
+    global _api_key
+    if _api_key is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _api_key = os.getenv("API_KEY")
+    return _api_key
+
+
+def read_norad_ids(filename: str = NORAD_IDS_FILENAME) -> list:
+    with open(filename, 'r') as file:
+        return [norad_id.strip() for norad_id in file.read().strip().split(',') if norad_id.strip()]
 
 class JSONDateTimeEncoder(json.JSONEncoder):
     """Custom JSON encoder for datetime objects."""
@@ -45,6 +81,7 @@ class SimpleCache:
         self.filename = filename
         self.expiration_time = expiration_time
         self.cache = self.load_cache()
+        self.dirty = False
 
     def load_cache(self) -> dict:
         """Load the cache from a file."""
@@ -58,10 +95,18 @@ class SimpleCache:
         with open(self.filename, 'w') as file:
             json.dump(self.cache, file, cls=JSONDateTimeEncoder)
 
-    def set(self, key: str, value: dict):
-        """Store an item in the cache."""
+    def set(self, key: str, value: dict, save: bool = True):
+        """Store an item in the cache; with save=False it is written on the next flush()."""
         self.cache[key] = {'data': value, 'time': time.time()}
-        self.save_cache()
+        self.dirty = True
+        if save:
+            self.flush()
+
+    def flush(self):
+        """Write the cache to disk if anything was set since the last write."""
+        if self.dirty:
+            self.save_cache()
+            self.dirty = False
 
     def get(self, key: str) -> dict:
         """Retrieve an item from the cache if it hasn't expired."""
@@ -80,8 +125,29 @@ class SimpleCache:
                 pass
         return json_dict
 
-# Initialize the cache
-cache = SimpleCache()
+def get_cache() -> SimpleCache:
+    """The shared TLE cache, read from disk the first time it is needed."""
+    global _cache
+    if _cache is None:
+        _cache = SimpleCache()
+    return _cache
+
+def parse_args(argv=None):
+    # Set up command line arguments
+    parser = argparse.ArgumentParser(description='Run TLE Updater Script.')
+    parser.add_argument('--days', type=int, default=None, help='Number of days ahead for observation (max 10)')
+    parser.add_argument('--observation-window', type=int, default=2, help='Observation window in minutes (default: 2)')
+    parser.add_argument('--non-interactive', action='store_true', help='Run script in non-interactive mode')
+    parser.add_argument('--workers', type=int, default=None, help='Compute passes locally from the TLEs with this many worker processes instead of querying N2YO visual passes')
+    parser.add_argument('--rolling', action='store_true', help='Plan tonight first and commit it, then plan the later nights (implies local pass computation)')
+    parser.add_argument('--refine-hours', type=float, default=0, help='With --rolling, keep re-fetching TLEs and replanning later nights for this many hours')
+    parser.add_argument('--refresh-minutes', type=float, default=60, help='With --rolling, how often to check for fresher TLEs (default: 60, the cache lifetime)')
+    parser.add_argument('--timeout', type=float, default=request_policy.timeout, help='Seconds per N2YO request attempt (default: %(default)s)')
+    parser.add_argument('--retries', type=int, default=request_policy.retries, help='Retries after a timeout, dropped connection, 429 or 5xx (default: %(default)s)')
+    parser.add_argument('--hedge-after', type=float, default=None, help='Send a second copy of any N2YO request still unanswered after this many seconds')
+    parser.add_argument('--telemetry-dir', default='telemetry', help='Where timing spans and metrics-plan.prom are written (default: %(default)s)')
+    parser.add_argument('--profile', choices=('cprofile', 'sample'), default=None, help='Profile this run into profiles/ (default: $AUTOSAT_PROFILE, else off)')
+    return parser.parse_args(argv)
 
 def batch_process_norad_ids(norad_ids: list, batch_size: int) -> list:
     """
@@ -108,6 +174,10 @@ def batch_process_norad_ids(norad_ids: list, batch_size: int) -> list:
     return batches
 
 def ask_for_norad_ids_and_days():
+    # The GUI dialog is the only user of tkinter; import it here so library use stays headless
+    import tkinter as tk
+    from tkinter import simpledialog, messagebox
+
     root = tk.Tk()
     root.title("Satellite Observation Configuration")
     root.focus_force()  # Force the window to take focus
@@ -171,49 +241,164 @@ def write_current_norad_id(norad_id: str):
         file.write(norad_id)
 
 
+async def get_json_once(url: str, session, timeout: float):
+    """
+    One GET. Returns the decoded body of a 200 response, or the status code
+    of a final failure (e.g. 404); raises for anything worth retrying.
+    """
+    import aiohttp
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status == 200:
+            return await response.json()
+        if response.status == 429 or response.status >= 500:
+            retry_after = response.headers.get('Retry-After', '')
+            raise TransientHTTPError(response.status, float(retry_after) if retry_after.isdigit() else None)
+        return response.status
+
+
+async def get_json_hedged(url: str, session, policy: RequestPolicy):
+    """get_json_once(), plus a second request if the first is slower than policy.hedge_after."""
+    first = asyncio.ensure_future(get_json_once(url, session, policy.timeout))
+    if not policy.hedge_after:
+        return await first
+    done, _ = await asyncio.wait({first}, timeout=policy.hedge_after)
+    if done:
+        return first.result()
+    pending = {first, asyncio.ensure_future(get_json_once(url, session, policy.timeout))}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+            if not pending:
+                raise done.pop().exception()
+    finally:
+        for attempt in pending:
+            attempt.cancel()
+
+
+async def get_json(url: str, session, policy: RequestPolicy = None) -> dict:
+    """GET an N2YO endpoint under `policy` (default: request_policy); None if it could not be had."""
+    import aiohttp
+    policy = policy or request_policy
+    endpoint = url.split('?')[0]  # keep the API key out of the log
+    for attempt in range(policy.retries + 1):
+        try:
+            result = await get_json_hedged(url, session, policy)
+        except (asyncio.TimeoutError, aiohttp.ClientError, TransientHTTPError) as e:
+            error, retry_after = e, getattr(e, 'retry_after', None)
+        else:
+            if isinstance(result, int):
+                logging.error(f"{endpoint}: HTTP {result}")
+                return None
+            return result
+        if attempt == policy.retries:
+            break
+        delay = random.uniform(0, min(policy.backoff_cap, policy.backoff * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(retry_after, policy.backoff_cap))
+        logging.warning(f"{endpoint}: {error!r}, retrying in {delay:.2f} s")
+        await asyncio.sleep(delay)
+    logging.error(f"{endpoint}: giving up after {policy.retries + 1} attempts ({error!r})")
+    return None
+
+
 async def get_tle(sat_id: str, session) -> dict:
+    cache = get_cache()
     cached_data = cache.get(sat_id)
     if cached_data:
         logging.info(f"Using cached data for NORAD ID {sat_id}")
         return cached_data
 
     logging.info(f"Fetching TLE data for NORAD ID {sat_id}...")
-    url = f"{BASE_URL}/tle/{sat_id}?apiKey={API_KEY}"
-    async with session.get(url) as response:
-        if response.status == 200:
-            data = await response.json()
-            logging.info(f"Raw TLE Data for {sat_id}: {data['tle']}")
-            cache.set(sat_id, data)
-            return data
-        else:
-            logging.error(f"Failed to retrieve TLE for NORAD ID {sat_id}: {response.status}")
-            return None
+    url = f"{BASE_URL}/tle/{sat_id}?apiKey={get_api_key()}"
+    data = await get_json(url, session)
+    if data is None:
+        logging.error(f"Failed to retrieve TLE for NORAD ID {sat_id}")
+        return archived_tle(sat_id)
+    logging.info(f"Raw TLE Data for {sat_id}: {data['tle']}")
+    try:
+        record = from_tle_data(data)
+    except (TleError, KeyError, TypeError) as e:
+        logging.error(f"Invalid TLE for NORAD ID {sat_id}: {e}")
+        return archived_tle(sat_id)
+    # Written once per fetch by the caller; rewriting the whole file per TLE is quadratic
+    cache.set(sat_id, data, save=False)
+    archive_tle(record)
+    return data
+
+def archive_tle(record: TleRecord):
+    # Every fetched element set goes into the TLE history (written by the caller with the cache)
+    from tle_archive import get_archive
+    try:
+        get_archive().add(record)
+    except Exception as e:
+        logging.warning(f"Could not archive the TLE for NORAD ID {record.norad_id}: {e}")
 
-async def get_tle_concurrently(sat_ids: list) -> dict:
-    async with aiohttp.ClientSession() as session:
-        tasks = [get_tle(sat_id, session) for sat_id in sat_ids]
-        results = await asyncio.gather(*tasks)
-        return dict(zip(sat_ids, results))
+def archived_tle(sat_id: str) -> dict:
+    """The newest archived element set for `sat_id` in N2YO form, or None; used when N2YO cannot be reached."""
+    from tle_archive import get_archive, tle_data
+    try:
+        row = get_archive().lookup(sat_id)
+    except Exception as e:
+        logging.warning(f"Could not read the TLE archive for NORAD ID {sat_id}: {e}")
+        return None
+    if row is None:
+        return None
+    age_days = (datetime.now(timezone.utc) - row['epoch']).total_seconds() / 86400
+    logging.warning(f"Using archived TLE for NORAD ID {sat_id} (epoch {age_days:.1f} days old)")
+    return tle_data(row)
+
+async def get_tle_concurrently(sat_ids: list, session=None) -> dict:
+    if session is None:
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            return await get_tle_concurrently(sat_ids, session)
+    tasks = [get_tle(sat_id, session) for sat_id in sat_ids]
+    results = await asyncio.gather(*tasks)
+    return dict(zip(sat_ids, results))
+
+async def get_tle_batches(norad_ids: list, batch_size: int, session):
+    """Yield the TLEs batch by batch, then write the fetched ones to the cache file and the TLE archive once."""
+    try:
+        for batch in batch_process_norad_ids(norad_ids, batch_size):
+            with telemetry.span('plan.fetch_tles', batch=len(batch)):
+                tle_data_results = await get_tle_concurrently(batch, session)
+            yield tle_data_results
+    finally:
+        from tle_archive import get_archive
+        with telemetry.span('plan.cache_write'):
+            get_cache().flush()
+            get_archive().flush()
+
+async def fetch_tle_data(norad_ids: list, batch_size: int = 10, session=None) -> dict:
+    tle_data_by_id = {}
+    async for tle_data_results in get_tle_batches(norad_ids, batch_size, session):
+        tle_data_by_id.update(tle_data_results)
+    for sat_id, tle_data in tle_data_by_id.items():
+        if not tle_data:
+            print(f"Failed to fetch TLE data for NORAD ID {sat_id}")
+    return tle_data_by_id
 
 async def get_visual_passes(sat_id: str, days: int, min_visibility: int, session) -> list:
+    """The N2YO visual passes for one satellite: [] if it has none, None if they could not be fetched."""
     # Coordinates for Cloudcroft, New Mexico
     observer_lat = 32.903
     observer_lng = -105.5295
     observer_alt = 2225
 
-    url = f"{BASE_URL}/visualpasses/{sat_id}/{observer_lat}/{observer_lng}/{observer_alt}/{days}/{min_visibility}/?apiKey={API_KEY}"
-    async with session.get(url) as response:
-        if response.status == 200:
-            data = await response.json()
-            # Check if 'passes' key is in the response
-            if 'passes' in data:
-                return data['passes']
-            else:
-                print(f"No visible passes found for satellite {sat_id}.")
-                return []
-        else:
-            print(f"Failed to retrieve visual passes for satellite {sat_id}: {response.status}")
-            return []
+    url = f"{BASE_URL}/visualpasses/{sat_id}/{observer_lat}/{observer_lng}/{observer_alt}/{days}/{min_visibility}/?apiKey={get_api_key()}"
+    data = await get_json(url, session)
+    if data is None:
+        print(f"Failed to retrieve visual passes for satellite {sat_id}")
+        return None
+    # Check if 'passes' key is in the response
+    if 'passes' in data:
+        return data['passes']
+    else:
+        print(f"No visible passes found for satellite {sat_id}.")
+        return []
 
 
 def update_tle_file(tle_data: dict, observation_times: list):
@@ -224,12 +409,11 @@ def update_tle_file(tle_data: dict, observation_times: list):
             file.write(f"NAME {tle_data['info']['satname']}\n")
             file.write(f"0 {tle_data['info']['satname']}\n")
 
-            # Correctly split the TLE data
-            tle_lines = tle_data["tle"].split('\n')
-            if len(tle_lines) >= 2:
-                file.write(f"{tle_lines[0].strip()}\n")
-                file.write(f"{tle_lines[1].strip()}\n")
-            else:
+            try:
+                line1, line2 = tle_lines(tle_data["tle"])
+                file.write(f"{line1}\n")
+                file.write(f"{line2}\n")
+            except TleError:
                 print("Unexpected TLE format received")
             file.write("\n")
 
@@ -255,9 +439,227 @@ def convert_visual_passes_to_times(visual_passes: list, observation_window: int
     return observation_times
 
 
+PLAN_TIMEZONE = timezone(timedelta(hours=-7))  # tleplan.txt times are MST all year
+
+
 def utc_to_mst(utc_dt: datetime) -> datetime:
     # MST is UTC-7 hours
-    return utc_dt.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=-7)))
+    return utc_dt.replace(tzinfo=timezone.utc).astimezone(PLAN_TIMEZONE)
+
+
+def filter_observation_times_by_night(nights: list, min_gap: int) -> list:
+    """
+    Schedule each night independently and concatenate the nights in order.
+
+    Nights never overlap, so this gives the same plan as filtering the whole
+    horizon at once; candidates are pre-sorted by (start, sat_id) so ties
+    resolve the same way on every run.
+    """
+    filtered_times = []
+    for night in nights:
+        night = sorted(night, key=lambda x: (x[2]['start'], x[0]))
+        filtered_times.extend(filter_observation_times(night, min_gap))
+    return filtered_times
+
+
+def write_tle_plan(filtered_observation_times: list, filename: str = "tleplan.txt"):
+    # Write sorted and filtered observations to tleplan.txt. The plan is written
+    # next to the target and renamed over it, so a reader never sees half a plan.
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "w") as file:
+        for sat_id, tle_data, observation in filtered_observation_times:
+            try:
+                line1, line2 = tle_lines(tle_data["tle"])
+            except TleError as e:
+                logging.error(f"Left NORAD ID {sat_id} out of the plan: {e}")
+                continue
+            start_mst = utc_to_mst(observation['start'])
+            end_mst = utc_to_mst(observation['end'])
+            file.write(f"BEGINLOCAL {start_mst.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            file.write(f"ENDLOCAL {end_mst.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            file.write(f"NAME {tle_data['info']['satname']}\n")
+            file.write(f"0 {tle_data['info']['satname']}\n")
+            file.write(f"{line1}\n")
+            file.write(f"{line2}\n")
+            file.write("\n")
+    os.replace(temp_filename, filename)
+    record_planned(filtered_observation_times)
+
+
+def read_tle_plan(filename: str = "tleplan.txt") -> 'Plan':
+    # The one reader of tleplan.txt, for the observer, automated2 and the planner service.
+    # Entry times are naive MST, as written above.
+    with open(filename) as file:
+        plan = Plan()
+        plan.parse(file.read())
+    return plan
+
+
+class PlanEntry:
+    def __init__(self):
+        self.begin_time_local = None
+        self.end_time_local = None
+        self.name = None
+        self.tle1 = None
+        self.tle2 = None
+        self.tle3 = None
+
+class Plan:
+    def __init__(self):
+        self.entries = []
+
+    def parse(self, plan_text):
+        reader = StringIO(plan_text)
+
+        while True:
+            next_entry = self.parse_single_entry(reader)
+            if next_entry == None:
+                return  # End of file reached
+            self.entries.append(next_entry)
+
+    def parse_single_entry(self, plan_reader):
+        begin_local_str = self.read_next_record("BEGINLOCAL", plan_reader)
+        end_local_str = self.read_next_record("ENDLOCAL", plan_reader)
+        name = self.read_next_record("NAME", plan_reader)
+        tle1 = self.read_next_record(None, plan_reader)
+        tle2 = self.read_next_record(None, plan_reader)
+        tle3 = self.read_next_record(None, plan_reader)
+
+        if tle3 == None:
+            return None # End of file
+
+        entry = PlanEntry()
+        entry.begin_time_local = self.parse_time(begin_local_str)
+        entry.end_time_local = self.parse_time(end_local_str)
+        entry.name = name
+        entry.tle1 = tle1
+        entry.tle2 = tle2
+        entry.tle3 = tle3
+
+        return entry
+        
+    
+    def read_next_record(self, expected_prefix, plan_reader):
+        line = self.read_next_nonempty_line(plan_reader)
+        if line == None:
+            return None  # End of file
+        
+        if expected_prefix == None:
+            return line
+
+        fields = line.split(' ', 1)
+        if fields[0] != expected_prefix:
+            raise Exception("Expected prefix '%s', got '%s'" % (expected_prefix, fields[0]))
+        return fields[1]
+    
+    def read_next_nonempty_line(self, plan_reader):
+        while True:
+            line = plan_reader.readline()
+            if line == '':
+                return None # End of file
+            
+            line = line.strip()
+            if line == '':
+                continue # Blank line
+            return line
+
+    def parse_time(self, time_string):
+        return datetime.strptime(time_string, "%Y-%m-%d %H:%M:%S")
+
+
+def record_planned(filtered_observation_times: list):
+    # Keep the planned windows in observations.db as well; a database problem never stops planning
+    from observation_db import get_db
+    try:
+        get_db().record_planned([(sat_id, tle_data['info']['satname'], observation['start'].replace(tzinfo=timezone.utc),
+                                  observation['end'].replace(tzinfo=timezone.utc))
+                                 for sat_id, tle_data, observation in filtered_observation_times])
+    except Exception as e:
+        logging.warning(f"Could not record the plan in the observation database: {e}")
+
+
+def plan_locally(tle_data_by_id: dict, days_ahead: int, observation_window, workers: int, start_date=None) -> list:
+    """
+    Compute passes from the TLEs on a process pool, sharded by satellite and night.
+
+    Returns:
+    list: per-night lists of (sat_id, tle_data, {'start', 'end'}) candidates.
+    """
+    # NumPy and SGP4 are only needed for local pass computation
+    from parallel_planner import compute_night_passes, tle_entries
+
+    entries = tle_entries(tle_data_by_id)
+    nights = compute_night_passes(entries, days_ahead, start_date=start_date, workers=workers)
+    planned = []
+    for night_passes in nights:
+        candidates = []
+        for sat_id, visual_pass in night_passes:
+            for start_time, end_time in convert_visual_passes_to_times([visual_pass], observation_window):
+                candidates.append((sat_id, tle_data_by_id[sat_id], {'start': start_time, 'end': end_time}))
+        planned.append(candidates)
+    return planned
+
+
+class RollingPlan:
+    """Per-night sections of tleplan.txt, rewritten atomically whenever a night is (re)planned."""
+    def __init__(self, filename: str = "tleplan.txt"):
+        self.filename = filename
+        self.nights = {}
+
+    def commit(self, night_date, filtered_observation_times: list):
+        self.nights[night_date] = filtered_observation_times
+        write_tle_plan([entry for night in sorted(self.nights) for entry in self.nights[night]], self.filename)
+
+
+def plan_night(tle_data_by_id: dict, night_date, observation_window, workers: int) -> list:
+    nights = plan_locally(tle_data_by_id, 1, observation_window, workers, start_date=night_date)
+    return filter_observation_times_by_night(nights, 1)
+
+
+async def plan_rolling(norad_ids: list, days_ahead: int, observation_window, workers: int,
+                       refine_hours: float = 0, refresh_minutes: float = 60, rolling_plan: RollingPlan = None,
+                       session=None):
+    """
+    Rolling-horizon planning: commit tonight first, then the later nights.
+
+    Only tonight's passes stand between the TLE fetch and the first usable
+    tleplan.txt, so time to first plan does not grow with the horizon. Later
+    nights are planned one at a time, each committed as soon as it is ready.
+    For `refine_hours` afterwards the TLEs are re-fetched every
+    `refresh_minutes`; nights after tonight are replanned when any element
+    set changed. Tonight is left alone once committed so the observer's
+    queue does not shift under it.
+    """
+    loop = asyncio.get_running_loop()
+    rolling_plan = rolling_plan or RollingPlan()
+    tonight = current_night()
+    night_dates = [tonight + timedelta(days=n) for n in range(days_ahead)]
+
+    started = time.perf_counter()
+    tle_data_by_id = await fetch_tle_data(norad_ids, session=session)
+    for index, night_date in enumerate(night_dates):
+        # CPU-bound; keep the event loop free for the next fetch
+        entries = await loop.run_in_executor(None, plan_night, tle_data_by_id, night_date, observation_window, workers)
+        rolling_plan.commit(night_date, entries)
+        logging.info(f"Rolling plan: night of {night_date} committed ({len(entries)} passes) after {time.perf_counter() - started:.1f} s")
+        if index == 0:
+            print(f"Tonight's plan written to {rolling_plan.filename} after {time.perf_counter() - started:.1f} s")
+
+    refine_until = time.time() + refine_hours * 3600
+    while time.time() + refresh_minutes * 60 < refine_until:
+        await asyncio.sleep(refresh_minutes * 60)
+        fresh = await fetch_tle_data(norad_ids, session=session)
+        changed = [sat_id for sat_id, tle_data in fresh.items()
+                   if tle_data and (not tle_data_by_id.get(sat_id) or tle_data['tle'] != tle_data_by_id[sat_id]['tle'])]
+        if not changed:
+            continue
+        logging.info(f"Rolling plan: fresher TLEs for {len(changed)} satellites, replanning later nights")
+        tle_data_by_id.update({sat_id: fresh[sat_id] for sat_id in changed})
+        for night_date in night_dates[1:]:
+            if night_date <= current_night():
+                continue  # that night has already started
+            entries = await loop.run_in_executor(None, plan_night, tle_data_by_id, night_date, observation_window, workers)
+            rolling_plan.commit(night_date, entries)
 
 
 def filter_observation_times(observation_times: list, min_gap: int) -> list:
@@ -283,14 +685,67 @@ def filter_observation_times(observation_times: list, min_gap: int) -> list:
     return filtered_times
 
 
-async def main():
+async def plan(norad_ids: list, days_ahead: int, observation_window=2, workers: int = None,
+               session=None, filename: str = "tleplan.txt", batch_size: int = 10) -> list:
+    """
+    Fetch TLEs and passes for the NORAD IDs, schedule them and write the plan.
+
+    With `workers`, passes are computed locally on a process pool; otherwise
+    the N2YO visual passes endpoint is used. An existing aiohttp session can
+    be passed in so long-lived callers reuse their connections.
+
+    Returns:
+    list: the scheduled (sat_id, tle_data, {'start', 'end'}) entries.
+    """
+    if session is None:
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            return await plan(norad_ids, days_ahead, observation_window, workers, session, filename, batch_size)
+
+    if workers:
+        # Local pass computation: fetch the TLEs, then shard the CPU work
+        tle_data_by_id = await fetch_tle_data(norad_ids, batch_size, session)
+        loop = asyncio.get_running_loop()
+        with telemetry.span('plan.local_passes', workers=workers):
+            nights = await loop.run_in_executor(None, plan_locally, tle_data_by_id, days_ahead, observation_window, workers)
+        with telemetry.span('plan.filter'):
+            filtered_observation_times = filter_observation_times_by_night(nights, 1)
+        with telemetry.span('plan.write'):
+            write_tle_plan(filtered_observation_times, filename)
+        return filtered_observation_times
+
+    all_observation_times = []
+    # Fetch TLE data batch by batch, each batch concurrently
+    async for tle_data_results in get_tle_batches(norad_ids, batch_size, session):
+        # Process results
+        for sat_id, tle_data in tle_data_results.items():
+            if tle_data:
+                with telemetry.span('plan.visual_passes'):
+                    visual_passes = await get_visual_passes(sat_id, days_ahead, 300, session)
+                if visual_passes is None:
+                    continue
+                with telemetry.span('plan.convert'):
+                    observation_times = convert_visual_passes_to_times(visual_passes, observation_window)
+                all_observation_times.extend([(sat_id, tle_data, {'start': start_time, 'end': end_time}) for start_time, end_time in observation_times])
+            else:
+                print(f"Failed to fetch TLE data for NORAD ID {sat_id}")
+
+    # Just before the call to filter_observation_times
+    print("Debug: Sample of all_observation_times", all_observation_times[:3])  # Print first 3 elements
+    with telemetry.span('plan.filter'):
+        filtered_observation_times = filter_observation_times(all_observation_times, 1)
+    with telemetry.span('plan.write'):
+        write_tle_plan(filtered_observation_times, filename)
+    return filtered_observation_times
+
+
+async def run_cli(args):
     # Check if non_interactive mode
     if args.non_interactive:
         # Non-interactive mode
         days_ahead = args.days or 1  # Default to 5 days if not specified
         observation_window = args.observation_window   # Default observation window in non-interactive mode
-        with open('NoradId.txt', 'r') as file:
-            norad_ids = file.read().strip().split(',')
+        norad_ids = read_norad_ids()
     else:
         # Interactive mode
         norad_ids, days_ahead, observation_window = ask_for_norad_ids_and_days()
@@ -298,46 +753,27 @@ async def main():
             print("Operation cancelled.")
             return  # Exit the main function
 
-    # Rest of the code remains the same
-    all_observation_times = []
-    batch_size = 10  # Adjust batch size as needed
-    norad_id_batches = batch_process_norad_ids(norad_ids, batch_size)
-
-    async with aiohttp.ClientSession() as session:
-        for batch in norad_id_batches:
-            # Fetch TLE data for the batch concurrently
-            tle_data_results = await get_tle_concurrently(batch)
-
-            # Process results
-            for sat_id, tle_data in tle_data_results.items():
-                if tle_data:
-                    visual_passes = await get_visual_passes(sat_id, days_ahead, 300, session)
-                    observation_times = convert_visual_passes_to_times(visual_passes, observation_window)
-                    all_observation_times.extend([(sat_id, tle_data, {'start': start_time, 'end': end_time}) for start_time, end_time in observation_times])
-                else:
-                    print(f"Failed to fetch TLE data for NORAD ID {sat_id}")
-
-
-    # Just before the call to filter_observation_times
-    print("Debug: Sample of all_observation_times", all_observation_times[:3])  # Print first 3 elements
-    filtered_observation_times = filter_observation_times(all_observation_times, 1)
-
-
-    # Write sorted and filtered observations to tleplan.txt
-    with open("tleplan.txt", "w") as file:
-        for sat_id, tle_data, observation in filtered_observation_times:
-            start_mst = utc_to_mst(observation['start'])
-            end_mst = utc_to_mst(observation['end'])
-            file.write(f"BEGINLOCAL {start_mst.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            file.write(f"ENDLOCAL {end_mst.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            file.write(f"NAME {tle_data['info']['satname']}\n")
-            file.write(f"0 {tle_data['info']['satname']}\n")
-            tle_lines = tle_data["tle"].split('\r\n')
-            if len(tle_lines) >= 2:
-                file.write(f"{tle_lines[0].strip()}\n")
-                file.write(f"{tle_lines[1].strip()}\n")
-            file.write("\n")
+    if args.rolling:
+        await plan_rolling(norad_ids, days_ahead, observation_window, args.workers,
+                           refine_hours=args.refine_hours, refresh_minutes=args.refresh_minutes)
+    else:
+        await plan(norad_ids, days_ahead, observation_window, args.workers)
+
+def main(argv=None):
+    """Command-line entry point: parse arguments, configure logging and run the planner."""
+    args = parse_args(argv)
+    request_policy.timeout, request_policy.retries, request_policy.hedge_after = args.timeout, args.retries, args.hedge_after
+    # Configure logging (only for the script itself, so importers and worker processes keep theirs)
+    from logging_setup import setup_logging
+    from profiling import profiled
+    setup_logging('api_interaction_log.txt')
+    flusher = telemetry.start_flusher(args.telemetry_dir, label='plan')
+    try:
+        with profiled('plan', args.profile) as profile, telemetry.span('plan.total'):
+            asyncio.run(profile.watch_tasks(run_cli(args)) if profile else run_cli(args))
+    finally:
+        flusher.stop()
+        logging.info("Planning time by stage:\n" + telemetry.format_summary())
 
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(main())
+    main()
@@ -1,67 +1,83 @@
-import time
 import os
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 import win32com.client
+import pythoncom
 import logging
+import threading
 import traceback
-from pwi4_client import PWI4
-from pwi4_tle_observer import run_observer
+import clock
+import telemetry
+from profiling import mode_from_argv, profiled, profiled_thread
+from pwi4_pool import PooledPWI4
+from pwi4_tle_observer import OUTPUT_PATH, PlanWatcher, connect_observer, observe_queue
+from plan_queue import PlanQueue
+from api_interaction import read_tle_plan
 import pytz
 import sys
-import requests
+from sun_ephemeris import current_night, solar_events, sun_times
+from logging_setup import rollover, setup_logging
+from bringup import BringupStep, run_bringup
+from dome_control import DomeController, FAULT, OPEN, SLAVED
+from camera_cooler import CAMERA_PROGID, CoolerManager
+from health_monitor import HealthMonitor, HealthProbe, disk_space_check
 
 pwi4 = None
 dome_open = False
-
-ddw = win32com.client.Dispatch("TIDigitalDomeWorks.DomeControl")
-
-logging.basicConfig(filename='telescope_automation_log.txt', level=logging.DEBUG,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
+dome = None
+cooler = CoolerManager()
+health = None
+
+PLAN_POLL_SECONDS = 5  # how often tleplan.txt is checked for changes
+HEALTH_CHECK_INTERVAL = timedelta(minutes=30)
+HEALTH_CHECK_MIN_GAP = timedelta(minutes=3)  # only check when the next pass is at least this far off
+REQUIRED_PROBES = ('mount', 'dome')  # camera and disk problems are reported but do not shut down
+
+# Queued, so logging from the observer thread never waits on the disk; rotated into logs/<night>/
+setup_logging('telescope_automation_log.txt', level=logging.DEBUG, console=True, datefmt='%Y-%m-%d %H:%M:%S')
+
+def connect_to_mount(pwi4):
+    print("Connecting to the mount...")
+    pwi4.mount_connect()
+    while not pwi4.status().mount.is_connected:
+        clock.sleep(1)
+    logging.info("Mount connected.")
+    print("Mount connected.")
+
+def enable_motors(pwi4):
+    print("Enabling motors...")
+    pwi4.mount_enable(0)  # Enable axis 0
+    pwi4.mount_enable(1)  # Enable axis 1
+    logging.info("Motors enabled.")
+    print("Motors enabled.")
+
+def find_home(pwi4):
+    print("Finding home position...")
+    pwi4.mount_find_home()
+    last_axis0_pos_degs = -99999
+    last_axis1_pos_degs = -99999
+    while True:
+        status = pwi4.status()
+        delta_axis0_pos_degs = abs(status.mount.axis0.position_degs - last_axis0_pos_degs)
+        delta_axis1_pos_degs = abs(status.mount.axis1.position_degs - last_axis1_pos_degs)
+        if delta_axis0_pos_degs < 0.001 and delta_axis1_pos_degs < 0.001:
+            break
+        last_axis0_pos_degs = status.mount.axis0.position_degs
+        last_axis1_pos_degs = status.mount.axis1.position_degs
+        clock.sleep(1)
+    logging.info("Home position found.")
+    print("Home position found.")
 
 def startup_pwi4():
     global pwi4
     try:
         if pwi4 is None:
             print("Initializing PWI4...")
-            pwi4 = PWI4()
+            pwi4 = PooledPWI4()
             logging.info("PWI4 instance created.")
 
-        def connect_to_mount():
-            print("Connecting to the mount...")
-            pwi4.mount_connect()
-            while not pwi4.status().mount.is_connected:
-                time.sleep(1)
-            logging.info("Mount connected.")
-            print("Mount connected.")
-
-        def enable_motors():
-            print("Enabling motors...")
-            pwi4.mount_enable(0)  # Enable axis 0
-            pwi4.mount_enable(1)  # Enable axis 1
-            logging.info("Motors enabled.")
-            print("Motors enabled.")
-
-        def find_home():
-            print("Finding home position...")
-            pwi4.mount_find_home()
-            last_axis0_pos_degs = -99999
-            last_axis1_pos_degs = -99999
-            while True:
-                status = pwi4.status()
-                delta_axis0_pos_degs = abs(status.mount.axis0.position_degs - last_axis0_pos_degs)
-                delta_axis1_pos_degs = abs(status.mount.axis1.position_degs - last_axis1_pos_degs)
-                if delta_axis0_pos_degs < 0.001 and delta_axis1_pos_degs < 0.001:
-                    break
-                last_axis0_pos_degs = status.mount.axis0.position_degs
-                last_axis1_pos_degs = status.mount.axis1.position_degs
-                time.sleep(1)
-            logging.info("Home position found.")
-            print("Home position found.")
-
-        connect_to_mount()
-        enable_motors()
-        find_home()
+        connect_to_mount(pwi4)
+        enable_motors(pwi4)
+        find_home(pwi4)
         return pwi4
 
     except Exception as e:
@@ -69,31 +85,36 @@ def startup_pwi4():
         traceback.print_exc()
         print(f"Error occurred in startup_pwi4: {e}")
 
-#Function to Control Dome via ASCOM
-def control_ddw(ddw, action, azimuth=None):
-    try:
-        # Check if the dome is busy
-        while ddw.statIsBusy():
-            time.sleep(1)
+def log_dome_event(event):
+    print(f"Dome {event.old_state} -> {event.new_state} after {event.duration_s:.1f} s ({event.reason})")
+
+def get_dome():
+    # One controller thread owns the DDW COM object for the whole run
+    global dome
+    if dome is None or not dome.is_alive():
+        dome = DomeController(on_event=log_dome_event)
+        dome.start()
+    return dome
 
-        # Check if the dome system is online
-        if not ddw.statIsOnline():
-            raise Exception("DDW is not running.")
+#Function to Control Dome via DDW
+def control_ddw(dome, action, azimuth=None):
+    try:
+        if dome.state == FAULT and dome.refresh() == FAULT:
+            raise Exception(f"DDW is not operational: {dome.fault_reason}")
 
         if action == "open_shutter":
-            ddw.actOpenShutter()
-            time.sleep(5)  # Adjust sleep time as needed
-            if not ddw.statIsShutterOpen():  # Check if the shutter is open
-                raise Exception("Failed to open dome shutter.")
+            if not dome.open_shutter():  # Returns as soon as DDW reports the shutter open
+                raise Exception(f"Failed to open dome shutter ({dome.state}).")
             print("Dome shutter opened.")
 
         elif action == "close_shutter":
-            ddw.actCloseShutter()
-            time.sleep(5)  # Adjust sleep time as needed
+            if not dome.close_shutter():
+                raise Exception(f"Failed to close dome shutter ({dome.state}).")
             print("Dome shutter closed.")
 
         elif action == "slave_to_telescope":
-            ddw.optSlaveMode = True
+            if not dome.set_slave_mode(True):
+                raise Exception(f"Failed to enable dome slaving ({dome.state}).")
             print("Dome slaving to telescope enabled.")
 
     except Exception as e:
@@ -104,46 +125,15 @@ def control_ddw(ddw, action, azimuth=None):
 
 # Function to read TLE data from a file
 
-def read_tle_data(filename):
-    tle_data = []
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        print("Reading TLE data from the file...")
-        i = 0
-        while i < len(lines):
-            if lines[i].strip().startswith('BEGINLOCAL'):
-                entry = {
-                    'start': lines[i].strip(),
-                    'end': lines[i + 1].strip(),
-                    'name': lines[i + 2].strip(),
-                    'tle1': lines[i + 3].strip(),
-                    'tle2': lines[i + 4].strip()
-                }
-                tle_data.append(entry)
-                i += 6  # Skip to the next TLE entry
-            else:
-                i += 1
-
-    if len(tle_data) == 0:
-        print("No upcoming observations found in the file.")
-        return None
-    else:
-        return tle_data
-
-
 def read_next_observation_time():
     logging.info("Reading next observation time from tleplan.txt")
     try:
-        with open("tleplan.txt", "r") as file:
-            current_time = datetime.now(pytz.timezone('America/Denver'))
-            for line in file:
-                if line.startswith('BEGINLOCAL'):
-                    obs_time_str = ' '.join(line.split()[1:3])
-                    next_obs_time = datetime.strptime(obs_time_str, "%Y-%m-%d %H:%M:%S")
-                    next_obs_time = pytz.timezone('America/Denver').localize(next_obs_time)
-                    if next_obs_time > current_time:
-                        logging.info(f"Next observation time: {next_obs_time}")
-                        return next_obs_time
+        current_time = clock.now(pytz.timezone('America/Denver'))
+        for entry in read_tle_plan("tleplan.txt").entries:
+            next_obs_time = pytz.timezone('America/Denver').localize(entry.begin_time_local)
+            if next_obs_time > current_time:
+                logging.info(f"Next observation time: {next_obs_time}")
+                return next_obs_time
     except Exception as e:
         logging.error(f"Error reading next observation time: {e}")
     return None
@@ -152,131 +142,253 @@ def read_next_observation_time():
 
 def is_time_to_observe(next_obs_time):
     # Make current_time timezone-aware
-    current_time = datetime.now(pytz.timezone('America/Denver'))
+    current_time = clock.now(pytz.timezone('America/Denver'))
 
     return current_time >= (next_obs_time - timedelta(minutes=5)) and current_time <= (next_obs_time + timedelta(minutes=10))  # 10-minute buffer for late starts
 
-def check_system_status():
-    global pwi4, dome_open, ddw
-    pwi4_connected = ddw_operational = False
-    successful_connection = False
-    check_counter = 0
-
-    while check_counter < 10 and not successful_connection:
-        try:
-            pwi4_status = pwi4.status()
-            pwi4_connected = pwi4_status is not None and pwi4_status.mount.is_connected
-        except:
-            pwi4_connected = False
-
-        try:
-            ddw.actRefreshStatus()
-            ddw_operational = ddw.statIsOnline() and not ddw.statIsBusy()
-        except:
-            ddw_operational = False
-
-        if pwi4_connected and ddw_operational:
-            successful_connection = True
-            print("Both PWI4 and DDW are operational.")
-        else:
-            print(f"Attempt {check_counter + 1}: One or both systems are not operational. Checking again...")
-            check_counter += 1
-            time.sleep(30)  # Waiting 30 seconds before next status check, 10 checks over 5 minutes
-
-    if not successful_connection:
-        print("Emergency shutdown due to system status failure.")
-        shutdown_sequence()
+def mount_check():
+    if pwi4 is None:
+        raise Exception("PWI4 not initialized")
+    status = pwi4.status()
+    if not status.mount.is_connected:
+        raise Exception("mount not connected")
+    return f"alt {status.mount.altitude_degs:.1f} az {status.mount.azimuth_degs:.1f}"
+
+def dome_check():
+    # The dome controller polls DDW itself; this only reads its state
+    dome = get_dome()
+    if dome.state == FAULT:
+        raise Exception(dome.fault_reason or "DDW fault")
+    return dome.state
+
+def make_camera_check():
+    cam = None
+
+    def camera_check():
+        nonlocal cam
+        if cam is None:
+            cam = win32com.client.Dispatch(CAMERA_PROGID)
+        if not cam.LinkEnabled:
+            raise Exception("camera not linked")
+        return f"sensor {cam.Temperature:.1f} C"
+    return camera_check
+
+def get_health_monitor():
+    global health
+    if health is None:
+        health = HealthMonitor([
+            HealthProbe('mount', mount_check),
+            HealthProbe('dome', dome_check),
+            HealthProbe('camera', make_camera_check(), com=True),
+            HealthProbe('disk', disk_space_check(OUTPUT_PATH), interval=300),
+        ])
+        health.start()
+    return health
+
+def check_system_status(timeout=300):
+    # Reads the background health snapshot; only waits (up to `timeout` s,
+    # while the probes retry with backoff) if mount or dome is not healthy now
+    monitor = get_health_monitor()
+    healthy = monitor.is_healthy(REQUIRED_PROBES) or monitor.wait_healthy(REQUIRED_PROBES, timeout=timeout)
+    logging.info("Health snapshot:\n" + monitor.format())
+    if healthy:
+        print("Both PWI4 and DDW are operational.")
+        return True
+
+    print("Emergency shutdown due to system status failure.")
+    print(monitor.format())
+    shutdown_sequence()
+    return False
 
 def shutdown_sequence():
     global pwi4
     global dome_open
 
-    try:
-        if pwi4 is not None:
-            print("Disabling the mount...")
-            pwi4.mount_disable(0)  # Disable axis 0
-            pwi4.mount_disable(1)  # Disable axis 1
-            print("Mount disabled.")
-
-        if dome_open:
-            control_ddw(ddw, "close_shutter")
-            dome_open = False
-            print("Dome closed.")
-    except Exception as e:
-        logging.error(f"Error in shutdown_sequence: {e}")
-        traceback.print_exc()
-
-def update_sun_times():
-    try:
-        lat, lng = 32.957313, -105.742485  # Coordinates for Cloudcroft, New Mexico
-        today = datetime.now(pytz.timezone('America/Denver')).date()
-        tomorrow = today + timedelta(days=1)
-
-        # Fetch sunset time for today
-        sunset_response = requests.get(f"https://api.sunrise-sunset.org/json?lat={lat}&lng={lng}&date={today}&formatted=0")
-        # Fetch sunrise time for tomorrow
-        sunrise_response = requests.get(f"https://api.sunrise-sunset.org/json?lat={lat}&lng={lng}&date={tomorrow}&formatted=0")
-
-        if sunset_response.status_code != 200 or sunrise_response.status_code != 200:
-            print(f"Failed to retrieve data from API. Status codes: {sunset_response.status_code}, {sunrise_response.status_code}")
-            return None, None
-
-        sunset_data = sunset_response.json()
-        sunrise_data = sunrise_response.json()
-
-        if 'results' not in sunset_data or 'sunset' not in sunset_data['results']:
-            print("Malformed sunset API response: Missing 'results' or 'sunset' data.")
-            return None, None
-
-        if 'results' not in sunrise_data or 'sunrise' not in sunrise_data['results']:
-            print("Malformed sunrise API response: Missing 'results' or 'sunrise' data.")
-            return None, None
+    with telemetry.span('night.shutdown'):
+        try:
+            # The warm-up ramp runs in the background while mount and dome shut down
+            cooler.warm_up()
 
-        sunset_utc = datetime.fromisoformat(sunset_data['results']['sunset'])
-        sunrise_utc = datetime.fromisoformat(sunrise_data['results']['sunrise'])
+            if pwi4 is not None:
+                print("Disabling the mount...")
+                pwi4.mount_disable(0)  # Disable axis 0
+                pwi4.mount_disable(1)  # Disable axis 1
+                print("Mount disabled.")
 
-        mountain_time = pytz.timezone('America/Denver')
-        sunset_local = sunset_utc.replace(tzinfo=timezone.utc).astimezone(mountain_time)
-        sunrise_local = sunrise_utc.replace(tzinfo=timezone.utc).astimezone(mountain_time)
+            if dome_open:
+                control_ddw(get_dome(), "close_shutter")
+                dome_open = False
+                print("Dome closed.")
+        except Exception as e:
+            logging.error(f"Error in shutdown_sequence: {e}")
+            traceback.print_exc()
 
-        return sunrise_local, sunset_local
+def update_sun_times():
+    try:
+        # Computed locally and memoized per date; no network round trip.
+        return sun_times()
     except Exception as e:
         print(f"Error in update_sun_times: {e}")
         return None, None
 
-def open_dome_operations(ddw, max_retries=5):
+def open_dome_operations(dome, max_retries=5, slave=True):
     global dome_open
     for attempt in range(max_retries):
         print(f"Attempt {attempt + 1} to open dome.")
 
-        shutter_open = ddw.statIsShutterOpen()
-        print(f"Debug: Shutter open status: {shutter_open}")
-        dome_open = shutter_open
-        print(f"Debug: Dome open status: {dome_open}")
+        dome_open = dome.refresh() in (OPEN, SLAVED)
+        print(f"Debug: Dome state: {dome.state}")
 
         if not dome_open:
             print("Performing dome operations...")
-            control_ddw(ddw, "open_shutter")
-            control_ddw(ddw, "slave_to_telescope")
-            dome_open = ddw.statIsShutterOpen()
+            try:
+                control_ddw(dome, "open_shutter")
+                if slave:
+                    control_ddw(dome, "slave_to_telescope")
+            except Exception as e:
+                print(f"Dome operation failed: {e}")
+            dome_open = dome.is_shutter_open()
             if dome_open:
                 print("Dome successfully opened.")
                 return True
             else:
                 print("Failed to open dome, retrying...")
         else:
+            if slave and dome.state != SLAVED:
+                control_ddw(dome, "slave_to_telescope")
             print("Dome already open, no need to retry.")
             return True
 
     print("Failed to open dome after maximum retries.")
     return False
 
+def observe_night():
+    """
+    Observe every plan entry from now until 10 minutes before sunrise.
+
+    The observer works through a PlanQueue on its own thread while this
+    thread keeps the queue in step with tleplan.txt (new passes, dropped
+    passes and refreshed elements are picked up up to the slew) and runs
+    health checks in the gaps between passes.
+
+    Returns:
+    int: number of passes observed.
+    """
+    # Sunrise ending the night in progress, also when started after midnight
+    sunrise_time = solar_events(current_night() + timedelta(days=1))['sunrise']
+    stop_time = sunrise_time - timedelta(minutes=10)
+
+    plan_queue = PlanQueue()
+    result = {'passes': 0}
+
+    def log_pass(entry, frames):
+        logging.info(f"Observation Outcome: {entry.name}, {frames} frames")
+
+    def observer():
+        with profiled_thread('observer'):
+            pwi, cam = connect_observer(pwi4)
+            if pwi is None:
+                plan_queue.close(cancel_pending=True)
+                return
+            result['passes'] = observe_queue(pwi, cam, plan_queue, dome=get_dome(), cooler=cooler, on_done=log_pass)
+
+    observer_thread = threading.Thread(target=observer, name='observer')
+    observer_thread.start()
+
+    watcher = PlanWatcher()
+    last_health_check = clock.now()
+    try:
+        while clock.now(pytz.timezone('America/Denver')) < stop_time and observer_thread.is_alive():
+            entries = watcher.poll()
+            if entries is not None:
+                counts = plan_queue.sync(entries)
+                logging.info(f"Plan reloaded: {counts['inserted']} added, {counts['cancelled']} dropped, "
+                             f"{counts['updated']} with new elements, {len(plan_queue.pending())} pending.")
+                pending = plan_queue.pending()
+                if pending:
+                    cooler.schedule(pending[0].entry.begin_time_local)
+
+            seconds_until_next = plan_queue.seconds_until_next()
+            gap_ok = seconds_until_next is None or seconds_until_next >= HEALTH_CHECK_MIN_GAP.total_seconds()
+            if gap_ok and not plan_queue.observing() and clock.now() - last_health_check >= HEALTH_CHECK_INTERVAL:
+                logging.info("System Check: Checking system status between passes...")
+                if not check_system_status():
+                    break
+                last_health_check = clock.now()
+
+            clock.sleep(PLAN_POLL_SECONDS)
+    finally:
+        plan_queue.close(cancel_pending=True)
+        clock.join(observer_thread)
+        if pwi4 is not None:
+            logging.info("PWI4 latency tonight:\n" + pwi4.format_latency_report())
+
+    return result['passes']
+
+def bring_up_observatory():
+    """
+    Bring up mount, dome and camera concurrently.
+
+    Dependency graph:
+        mount_connect -> mount_home --+
+        dome_open --------------------+-> dome_slave
+        camera_link -> camera_cooler (optional; schedules the pre-cool and returns)
+
+    COM proxies are apartment-bound, so each camera step dispatches its own
+    object on its worker thread; dome steps go through the DomeController
+    thread, which owns the DDW object.
+    """
+    global pwi4
+    if pwi4 is None:
+        print("Initializing PWI4...")
+        pwi4 = PooledPWI4()
+        logging.info("PWI4 instance created.")
+
+    def mount_connect():
+        connect_to_mount(pwi4)
+        enable_motors(pwi4)
+
+    def dome_open_step():
+        if not open_dome_operations(get_dome(), slave=False):
+            raise Exception("Failed to open the dome.")
+
+    def dome_slave():
+        control_ddw(get_dome(), "slave_to_telescope")
+
+    def camera_link():
+        cam = win32com.client.Dispatch(CAMERA_PROGID)
+        cam.LinkEnabled = True
+        cam.DisableAutoShutdown = True
+        print("Camera linked.")
+
+    def camera_cooler():
+        # Cooling is timed from the first pass and runs in the background
+        next_obs_time = read_next_observation_time()
+        if next_obs_time is None:
+            cooler.cool_now()
+        else:
+            cooler.schedule(next_obs_time.replace(tzinfo=None))
+        return cooler.state
+
+    steps = [
+        BringupStep('mount_connect', mount_connect, timeout=60),
+        BringupStep('mount_home', lambda: find_home(pwi4), depends_on=['mount_connect'], timeout=300),
+        BringupStep('dome_open', dome_open_step, timeout=300),
+        BringupStep('dome_slave', dome_slave, depends_on=['mount_home', 'dome_open'], timeout=60),
+        BringupStep('camera_link', camera_link, timeout=60),
+        BringupStep('camera_cooler', camera_cooler, depends_on=['camera_link'], timeout=60, required=False),
+    ]
+    report = run_bringup(steps, thread_initializer=pythoncom.CoInitialize)
+    print(report.format())
+    return report
+
 
 def main():
     global pwi4
     global dome_open
     logging.info("Starting main function of the Telescope Automation Script - The Guardian of the Skies.")
     print("Starting main function of the telescope automation script.")
+    flusher = telemetry.start_flusher(label='automated2')
 
     try:
         while True:
@@ -288,7 +400,7 @@ def main():
                 print("Failed to retrieve sunrise and sunset times. Aborting script.")
                 break
 
-            current_time = datetime.now(pytz.timezone('America/Denver'))
+            current_time = clock.now(pytz.timezone('America/Denver'))
             logging.info(f"Astro-Time Check: Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"Sunrise time: {sunrise_time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -322,64 +434,38 @@ def main():
                 wait_time_seconds = (sunset_time + timedelta(minutes=10) - current_time).total_seconds()
                 logging.info(f"Observation Countdown: Waiting {wait_time_seconds / 60:.2f} minutes after sunset to start observations.")
                 print(f"Waiting {wait_time_seconds / 60:.2f} minutes after sunset to start observations.")
-                time.sleep(wait_time_seconds)
+                with telemetry.span('night.wait_for_sunset'):
+                    clock.sleep(wait_time_seconds)
             else:
                 logging.info("Proceeding with observations.")
                 print("Proceeding with observations.")
 
-            logging.info("Stellar Activation: Starting up PWI4...")
-            print("Starting up PWI4...")
-            pwi4 = startup_pwi4()
-
-            # Trying to open the dome
-            if not open_dome_operations(ddw):
-                logging.error("Dome Operation Failure: Failed to open the dome, initiating shutdown sequence.")
-                print("Initiating shutdown sequence due to failed dome opening.")
+            logging.info("Stellar Activation: Bringing up mount, dome and camera...")
+            print("Bringing up mount, dome and camera...")
+            with telemetry.span('night.bringup'):
+                bringup_report = bring_up_observatory()
+            if not bringup_report.ok():
+                logging.error("Bring-up Failure: A required bring-up step failed, initiating shutdown sequence.")
+                print("Initiating shutdown sequence due to failed bring-up.")
                 shutdown_sequence()
                 break
 
             logging.info("System Status: Performing a pre-observational system check...")
             print("Checking system status before starting observations...")
-            check_system_status()
-
-            logging.info("Observation Plan: Reading the next observation schedule...")
-            print("Reading the next observation time...")
-            next_obs_time = read_next_observation_time()
-            if not next_obs_time:
-                logging.warning("Observation Schedule Alert: No upcoming observations. Initiating shutdown sequence.")
-                print("No upcoming observations. Initiating shutdown sequence.")
-                shutdown_sequence()
-                break
-
-            logging.info("Data Acquisition: Retrieving TLE data for satellite tracking...")
-            print("Retrieve TLE data for the observer script")
-            tle_data = read_tle_data("tleplan.txt")
-            if tle_data is None:
-                logging.error("TLE Data Error: Failed to retrieve TLE data. Aborting script.")
-                print("Failed to retrieve TLE data. Aborting script.")
-                shutdown_sequence()
+            with telemetry.span('night.system_check'):
+                system_ok = check_system_status()
+            if not system_ok:
                 break
 
-            logging.info("Orbital Watch: Running the satellite observer script...")
-            print("Running the observer script...")
-            observation_result = run_observer(tle_data)
-            logging.info(f"Observation Outcome: {observation_result}")
-            print(f"Observation result: {observation_result}")
-
-            observation_end_time = datetime.now(pytz.timezone('America/Denver'))
-
-            # Initiating shutdown sequence after observer script completion
-            logging.info("Observation Complete: Initiating shutdown sequence.")
-            print("Observation complete, initiating shutdown sequence.")
+            logging.info("Orbital Watch: Observing tleplan.txt until sunrise...")
+            print("Observing until sunrise; tleplan.txt is reloaded whenever it changes.")
+            with telemetry.span('night.observe'):
+                passes_observed = observe_night()
+            logging.info(f"Observation Complete: {passes_observed} passes observed tonight.")
+            print(f"Observation complete: {passes_observed} passes observed. Initiating shutdown sequence.")
             shutdown_sequence()
             break
 
-            # Emergency shutdown check
-            if (datetime.now(pytz.timezone('America/Denver')) - observation_end_time).total_seconds() > 7200:
-                logging.warning("System Check Reminder: More than 2 hours since last observation, conducting a system status review...")
-                print("More than 2 hours since last observation, checking system status...")
-                check_system_status()
-
     except Exception as e:
         logging.error(f"System Error Detected: {e}.")
         print(f"An error occurred: {e}.")
@@ -390,11 +476,14 @@ def main():
         print("Initiating shutdown sequence.")
         shutdown_sequence()
     finally:
+        flusher.stop()
+        logging.info("Night Summary: where the time went:\n" + telemetry.format_summary())
         logging.info("Script Completion: Telescope Automation Script has concluded its operation.")
         print("Main function has completed.")
+        rollover()  # tonight's log goes to the archive; the next night starts a fresh file
 
 if __name__ == "__main__":
-    logging.Formatter.converter = lambda *args: datetime.now(tz=pytz.timezone('America/Denver')).timetuple()
+    logging.Formatter.converter = lambda *args: clock.now(tz=pytz.timezone('America/Denver')).timetuple()
     logging.info("Debug: Initiating script in __main__")
     print("Debug: Starting script in __main__")
 
@@ -405,5 +494,6 @@ if __name__ == "__main__":
     else:
         logging.info("Telescope Automation: Script activation in progress.")
         print("Telescope automation script initiated.")
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
-        main()
+        # --profile cprofile|sample, or AUTOSAT_PROFILE; off by default
+        with profiled('automated2', mode_from_argv(sys.argv)):
+            main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dome_predict import DOME_SLEW_RATE, azimuth_difference, pass_track, slit_tolerance  # noqa: E402
+from pass_finder import find_passes, night_windows, prefilter_catalog  # noqa: E402
+from synthetic_catalog import synthetic_catalog  # noqa: E402
+
+FRAME_INTERVAL_S = 1.0  # 0.1 s exposure plus download
+SLAVE_TOLERANCE = 2.0  # DDW does not move the dome for smaller slave errors
+
+
+def night_schedule(passes: list, min_gap_s: float, limit: int) -> list:
+    """Greedy earliest-first sequence of non-overlapping passes, like tleplan.txt."""
+    schedule = []
+    for candidate in sorted(passes, key=lambda p: p['start']):
+        if schedule and (candidate['start'] - schedule[-1]['end']).total_seconds() < min_gap_s:
+            continue
+        schedule.append(candidate)
+        if len(schedule) == limit:
+            break
+    return schedule
+
+
+def rotate(current: float, target: float, seconds: float, rate: float, deadband: float = 0.0) -> float:
+    error = float(azimuth_difference(target, current))
+    if abs(error) <= deadband:
+        return current
+    return (current + np.clip(error, -rate * seconds, rate * seconds)) % 360
+
+
+def simulate(schedule: list, predictive: bool, rate: float = DOME_SLEW_RATE) -> list:
+    """
+    Fly the dome through the night's passes, one sample per frame.
+
+    Slaved: DDW chases the mount; between passes it sits where the last pass
+    ended. Predictive: the dome turns to the next rise azimuth during the gap
+    and follows the lead path during the pass.
+
+    Returns:
+    list of per-pass dicts: frames, lost, lost_first_30s.
+    """
+    dome = 0.0
+    previous_end = None
+    results = []
+    for item in schedule:
+        frames = lost = lost_first_30s = 0
+        track = item['track']
+        if predictive and previous_end is not None:
+            gap = (track['start'] - previous_end).total_seconds()
+            dome = rotate(dome, track['dome_azimuth'][0], gap, rate)
+        elif predictive:
+            dome = float(track['dome_azimuth'][0])
+        for i, offset in enumerate(track['offsets']):
+            if i:
+                if predictive:
+                    dome = rotate(dome, track['dome_azimuth'][i], FRAME_INTERVAL_S, rate)
+                else:
+                    dome = rotate(dome, track['azimuth'][i], FRAME_INTERVAL_S, rate, SLAVE_TOLERANCE)
+            frames += 1
+            if abs(azimuth_difference(track['azimuth'][i], dome)) > slit_tolerance(track['elevation'][i]):
+                lost += 1
+                lost_first_30s += offset < 30
+        previous_end = item['end']
+        results.append({'frames': frames, 'lost': lost, 'lost_first_30s': lost_first_30s})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frames lost to dome lag: slaved vs predictive dome azimuth.')
+    parser.add_argument('--catalog-size', type=int, default=3000, help='Synthetic catalog size')
+    parser.add_argument('--passes', type=int, default=40, help='Passes in the simulated night')
+    parser.add_argument('--min-gap', type=float, default=120, help='Seconds between consecutive passes')
+    parser.add_argument('--rate', type=float, default=DOME_SLEW_RATE, help='Dome rotation rate, deg/s')
+    parser.add_argument('--start', type=date.fromisoformat, default=date(2026, 10, 19), help='Night to simulate')
+    args = parser.parse_args()
+
+    catalog, _ = prefilter_catalog(synthetic_catalog(args.catalog_size))
+    passes = find_passes(catalog, night_windows(args.start, 1), min_duration_s=120, workers=1)
+    schedule = night_schedule(passes, args.min_gap, args.passes)
+    for item in schedule:
+        item['track'] = pass_track(item['line1'], item['line2'], item['start'], item['end'], FRAME_INTERVAL_S,
+                                   args.rate)
+
+    high = [i for i, item in enumerate(schedule) if item['max_elevation'] >= 60]
+    print(f"{len(schedule)} passes ({len(high)} culminating above 60 deg), dome rate {args.rate} deg/s")
+    print(f"{'passes':<8} {'mode':<11} {'frames':>7} {'lost':>6} {'lost %':>7} {'in first 30 s':>14}")
+    runs = {mode: simulate(schedule, predictive, args.rate) for mode, predictive in (('slaved', False), ('predictive', True))}
+    for label, indices in (('all', range(len(schedule))), ('>60 deg', high)):
+        for mode, results in runs.items():
+            frames = sum(results[i]['frames'] for i in indices)
+            lost = sum(results[i]['lost'] for i in indices)
+            first = sum(results[i]['lost_first_30s'] for i in indices)
+            print(f"{label:<8} {mode:<11} {frames:>7} {lost:>6} {100.0 * lost / max(frames, 1):>6.1f}% {first:>14}")
+
+
+if __name__ == "__main__":
+    main()
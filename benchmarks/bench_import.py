@@ -0,0 +1,61 @@
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(code: str, cwd: str, runs: int) -> list:
+    """Wall time of fresh interpreters running `code`, one sample per run."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def export_revision(revision: str, target: str):
+    """Unpack the tree at a git revision into `target`."""
+    archive = subprocess.run(['git', 'archive', revision], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold import cost of api_interaction.')
+    parser.add_argument('--rev', action='append', default=[], help='Also measure this git revision (repeatable)')
+    parser.add_argument('--runs', type=int, default=15, help='Fresh interpreters per measurement')
+    args = parser.parse_args()
+
+    trees = [('working tree', REPO_ROOT)]
+    with tempfile.TemporaryDirectory() as scratch:
+        for revision in args.rev:
+            target = os.path.join(scratch, revision.replace('/', '_'))
+            export_revision(revision, target)
+            trees.append((revision, target))
+
+        # Older revisions read NoradId.txt and sys.argv at import time.
+        workdir = os.path.join(scratch, 'cwd')
+        os.makedirs(workdir)
+        with open(os.path.join(workdir, 'NoradId.txt'), 'w') as file:
+            file.write('25544')
+
+        baseline = statistics.median(time_command('pass', workdir, args.runs))
+        print(f"Bare interpreter startup: {baseline * 1000:.0f} ms (median of {args.runs})")
+        print(f"{'tree':<16} {'median ms':>10} {'import ms':>10}")
+        for label, path in trees:
+            code = f"import sys; sys.argv = ['api_interaction.py']; sys.path.insert(0, {path!r}); import api_interaction"
+            median = statistics.median(time_command(code, workdir, args.runs))
+            print(f"{label:<16} {median * 1000:>10.0f} {(median - baseline) * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import api_interaction  # noqa: E402
+import observation_db  # noqa: E402
+import tle_archive  # noqa: E402
+from api_interaction import RequestPolicy  # noqa: E402
+from bench_planning import start_mock  # noqa: E402
+
+# Mock N2YO command-line options for each failure profile
+PROFILES = {
+    'clean': ['--latency-ms', '5'],
+    'slow-tail': ['--latency-ms', '5', '--latency-sigma', '1.0', '--stall-rate', '0.02', '--stall-s', '3'],
+    'throttled': ['--latency-ms', '5', '--throttle-rate', '0.1', '--retry-after', '1'],
+    'flaky': ['--latency-ms', '5', '--error-rate', '0.05', '--drop-rate', '0.02'],
+    'mixed': ['--latency-ms', '5', '--latency-sigma', '1.0', '--stall-rate', '0.01', '--stall-s', '3',
+              '--throttle-rate', '0.03', '--error-rate', '0.03', '--drop-rate', '0.01'],
+}
+
+POLICIES = {
+    'no-retry': RequestPolicy(timeout=None, retries=0),
+    'retry': RequestPolicy(timeout=1.0, retries=3, backoff=0.1, backoff_cap=2.0),
+    'retry+hedge': RequestPolicy(timeout=1.0, retries=3, backoff=0.1, backoff_cap=2.0, hedge_after=0.1),
+}
+
+
+def percentile(values: list, q: float) -> float:
+    """Linearly interpolated q-th percentile (0-100)."""
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class RequestLog:
+    """Counts requests, their latencies and the satellites whose passes arrived, by wrapping api_interaction."""
+    def __init__(self):
+        self.latencies = []
+        self.passes_fetched = 0
+        self.originals = {}
+
+    def __enter__(self):
+        get_json_once = self.originals['get_json_once'] = api_interaction.get_json_once
+        get_visual_passes = self.originals['get_visual_passes'] = api_interaction.get_visual_passes
+
+        async def timed_get(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await get_json_once(*args, **kwargs)
+            finally:
+                self.latencies.append(time.perf_counter() - started)
+
+        async def counted_passes(*args, **kwargs):
+            passes = await get_visual_passes(*args, **kwargs)
+            self.passes_fetched += passes is not None
+            return passes
+
+        api_interaction.get_json_once = timed_get
+        api_interaction.get_visual_passes = counted_passes
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self.originals.items():
+            setattr(api_interaction, name, original)
+
+
+def run_once(norad_ids: list, workdir: str) -> dict:
+    """One cold-cache plan(); wall time, completeness and request stats."""
+    cache_file = os.path.join(workdir, 'cache.json')
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    api_interaction._cache = api_interaction.SimpleCache(cache_file)
+    observation_db._db = observation_db._db or observation_db.ObservationDB(os.path.join(workdir, 'observations.db'))
+    shutil.rmtree(os.path.join(workdir, 'tle_archive'), ignore_errors=True)
+    tle_archive._archive = tle_archive.TleArchive(os.path.join(workdir, 'tle_archive'))
+    started = time.perf_counter()
+    with RequestLog() as log, contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(api_interaction.plan(norad_ids, 1, filename=os.path.join(workdir, 'tleplan.txt')))
+    return {'wall_s': time.perf_counter() - started, 'complete': log.passes_fetched / len(norad_ids),
+            'requests': len(log.latencies), 'latencies': log.latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='N2YO planning time and completeness under injected network faults.')
+    parser.add_argument('--size', type=int, default=100, help='NORAD IDs per plan')
+    parser.add_argument('--runs', type=int, default=5, help='Plans per profile and policy')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated failure profiles')
+    parser.add_argument('--policies', default=','.join(POLICIES), help='Comma-separated request policies')
+    parser.add_argument('--port', type=int, default=8899, help='Port for the mock N2YO server')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the injected faults and the retry jitter')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    api_interaction.BASE_URL = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault('API_KEY', 'benchmark')
+    workdir = tempfile.mkdtemp(prefix='bench_network_')
+    # Retries and give-ups go to a log file, not over the table
+    logging.basicConfig(filename=os.path.join(workdir, 'requests_log.txt'), level=logging.WARNING,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    norad_ids = [str(10000 + i) for i in range(args.size)]
+
+    results = []
+    print(f"{args.size} IDs, {args.runs} runs each")
+    print(f"{'profile':<10} {'policy':<12} {'p50 s':>7} {'p99 s':>7} {'complete':>9} {'req/sat':>8} "
+          f"{'req p50 ms':>11} {'req p99 ms':>11}")
+    for profile in args.profiles.split(','):
+        server = start_mock(args.size, args.port, PROFILES[profile] + ['--seed', str(args.seed)])
+        try:
+            for policy in args.policies.split(','):
+                api_interaction.request_policy = POLICIES[policy]
+                runs = [run_once(norad_ids, workdir) for _ in range(args.runs)]
+                walls = [run['wall_s'] for run in runs]
+                latencies = [latency for run in runs for latency in run['latencies']]
+                result = {
+                    'profile': profile, 'policy': policy,
+                    'p50_s': round(percentile(walls, 50), 3), 'p99_s': round(percentile(walls, 99), 3),
+                    'completeness': round(min(run['complete'] for run in runs), 4),
+                    'requests_per_sat': round(sum(run['requests'] for run in runs) / (args.runs * args.size), 3),
+                    'request_p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                    'request_p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                }
+                results.append(result)
+                print(f"{profile:<10} {policy:<12} {result['p50_s']:>7.2f} {result['p99_s']:>7.2f} "
+                      f"{result['completeness']:>9.1%} {result['requests_per_sat']:>8.2f} "
+                      f"{result['request_p50_ms']:>11.1f} {result['request_p99_ms']:>11.1f}", flush=True)
+        finally:
+            server.terminate()
+            server.wait()
+            api_interaction.request_policy = RequestPolicy()
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'size': args.size, 'runs': args.runs, 'profiles': {p: PROFILES[p] for p in args.profiles.split(',')},
+                       'results': results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
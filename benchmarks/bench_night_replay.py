@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import clock  # noqa: E402
+from bench_dome_lead import night_schedule  # noqa: E402
+from pass_finder import find_passes, night_windows, prefilter_catalog  # noqa: E402
+from simulators import com_fakes, run as simulators_run  # noqa: E402
+from synthetic_catalog import synthetic_catalog  # noqa: E402
+
+ON_TARGET_ARCSEC = 60.0  # frames further off than this count as lost to the slew
+
+
+def write_plan(schedule: list, filename: str):
+    """tleplan.txt for the schedule, in the naive local time the observer compares against."""
+    with open(filename, 'w') as file:
+        for i, item in enumerate(schedule):
+            begin = item['start'].astimezone().replace(tzinfo=None)
+            end = item['end'].astimezone().replace(tzinfo=None)
+            file.write(f"BEGINLOCAL {begin:%Y-%m-%d %H:%M:%S}\nENDLOCAL {end:%Y-%m-%d %H:%M:%S}\n"
+                       f"NAME P{i:03d}\n0 {item['name']}\n{item['line1']}\n{item['line2']}\n\n")
+
+
+def frame_offsets(path: str) -> float:
+    """Larger of the two axis distances (arcsec) encoded in an observer frame file name."""
+    parts = os.path.basename(path)[:-len('.fits')].split('_')
+    return max(float(parts[parts.index('Axis0Dist') + 1]), float(parts[parts.index('Axis1Dist') + 1]))
+
+
+def summarize(entries: list, saved: list) -> list:
+    """Per-pass frames, frames lost to the slew and seconds from pass start to the first on-target frame."""
+    results = []
+    for entry in entries:
+        begin, end = entry.begin_time_local.timestamp(), entry.end_time_local.timestamp()
+        frames = [(at, frame_offsets(path)) for at, path in saved if f"_{entry.name}" in os.path.dirname(path)]
+        on_target = [at for at, offset in frames if offset <= ON_TARGET_ARCSEC]
+        results.append({
+            'name': entry.name,
+            'duration_s': round(end - begin, 1),
+            'frames': len(frames),
+            'lost_to_slew': len(frames) - len(on_target),
+            'slew_loss_s': round(on_target[0] - begin, 1) if on_target else round(end - begin, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a night of passes against the simulators on a virtual clock.')
+    parser.add_argument('--catalog-size', type=int, default=3000, help='Synthetic catalog size')
+    parser.add_argument('--passes', type=int, default=20, help='Passes in the replayed night')
+    parser.add_argument('--min-gap', type=float, default=300, help='Seconds between consecutive passes')
+    parser.add_argument('--night', type=date.fromisoformat, default=date(2026, 10, 19), help='Night to replay')
+    parser.add_argument('--slew-rate', type=float, default=6.0, help='Simulated mount slew rate, deg/s')
+    parser.add_argument('--readout', type=float, default=0.5, help='Simulated camera readout, s')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    catalog, _ = prefilter_catalog(synthetic_catalog(args.catalog_size))
+    passes = find_passes(catalog, night_windows(args.night, 1), min_duration_s=120, workers=1)
+    schedule = night_schedule(passes, args.min_gap, args.passes)
+    if not schedule:
+        sys.exit("No passes found for that night.")
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix='night_replay_')
+    os.chdir(workdir)  # plan, frames and cooler profile stay out of the checkout
+    write_plan(schedule, 'tleplan.txt')
+    start = (schedule[0]['start'].astimezone() - timedelta(minutes=15)).replace(tzinfo=None)
+    sim_args = simulators_run.build_parser().parse_args([
+        '--mount-ready', '--slew-rate', str(args.slew_rate), '--readout', str(args.readout),
+        '--virtual', f"{start:%Y-%m-%d %H:%M}"])
+    simulators_run.install(sim_args)
+
+    import pwi4_tle_observer
+    from dome_control import DomeController
+    pwi4_tle_observer.OUTPUT_PATH = os.path.join(workdir, 'frames')
+    plan = pwi4_tle_observer.read_plan()
+
+    started = time.perf_counter()
+    dome = DomeController()
+    dome.start()
+    dome.open_shutter()
+    dome.set_slave_mode(True)
+    outcome = pwi4_tle_observer.run_observer(None, dome=dome)
+    dome.stop()
+    wall_s = time.perf_counter() - started
+    virtual_s = clock.get().elapsed()
+
+    camera = com_fakes.dispatch(com_fakes.CAMERA_PROGID)
+    results = summarize(plan.entries, camera.saved)
+    print(f"{outcome} {len(schedule)} passes, {virtual_s / 3600:.2f} h simulated in {wall_s:.1f} s "
+          f"({virtual_s / wall_s:.0f}x), clock jumps: {clock.get().jumps}")
+    print(f"{'pass':<6} {'length s':>9} {'frames':>7} {'slewing':>8} {'slew loss s':>12}")
+    for result in results:
+        print(f"{result['name']:<6} {result['duration_s']:>9.1f} {result['frames']:>7} "
+              f"{result['lost_to_slew']:>8} {result['slew_loss_s']:>12.1f}")
+    frames = sum(result['frames'] for result in results)
+    lost = sum(result['lost_to_slew'] for result in results)
+    print(f"{'total':<6} {sum(r['duration_s'] for r in results):>9.1f} {frames:>7} {lost:>8} "
+          f"{sum(r['slew_loss_s'] for r in results):>12.1f}")
+
+    if json_path:
+        with open(json_path, 'w') as file:
+            json.dump({'night': args.night.isoformat(), 'virtual_s': round(virtual_s, 1), 'wall_s': round(wall_s, 1),
+                       'passes': results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
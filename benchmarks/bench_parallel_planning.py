@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_planner import compute_night_passes  # noqa: E402
+from pass_finder import prefilter_catalog  # noqa: E402
+from synthetic_catalog import synthetic_catalog  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of sharded multi-night pass planning.')
+    parser.add_argument('--targets', type=int, default=500, help='Synthetic target list size (after pruning)')
+    parser.add_argument('--days', type=int, default=10, help='Nights to plan')
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts')
+    args = parser.parse_args()
+
+    catalog, _ = prefilter_catalog(synthetic_catalog(args.targets * 2))
+    catalog = catalog[:args.targets]
+    entries = [(line1[2:7].strip(), name, line1, line2) for name, line1, line2 in catalog]
+    start_date = date(2026, 10, 19)
+
+    print(f"{len(entries)} targets x {args.days} nights on {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>8} {'wall s':>8} {'speedup':>8} {'passes':>8}")
+    baseline = None
+    reference = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        started = time.perf_counter()
+        nights = compute_night_passes(entries, args.days, start_date=start_date, workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        flat = [(sat_id, p['startUTC'], p['endUTC']) for night in nights for sat_id, p in night]
+        if reference is None:
+            reference = flat
+        elif flat != reference:
+            print("ERROR: plan differs from the single-worker plan")
+        print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>8.2f} {len(flat):>8}")
+
+
+if __name__ == "__main__":
+    main()
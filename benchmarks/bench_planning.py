@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import api_interaction  # noqa: E402
+import observation_db  # noqa: E402
+import tle_archive  # noqa: E402
+
+STAGES = ('fetch', 'cache', 'convert', 'filter', 'write')
+REGRESSION = 0.2  # --compare flags runs this much slower (or bigger) than the baseline
+
+
+class StageTimer:
+    """
+    Per-stage seconds for one plan() call, collected by wrapping the
+    api_interaction functions each stage goes through.
+
+    The N2YO path awaits one batch of TLEs, then each satellite's passes in
+    turn, so the wrapped calls never overlap and the stages add up to the
+    wall time (less the small remainder reported as 'other'). Cache lookups
+    and stores (and TLE archive appends) happen inside the TLE fetch and are
+    taken out of 'fetch'; the cache file and the archive are written after it.
+    """
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.inside_fetch = {'cache': 0.0}
+        self.patched = []
+
+    def patch(self, owner, name: str, stage: str, inside_fetch: bool = False):
+        original = getattr(owner, name)
+        seconds = self.inside_fetch if inside_fetch else self.seconds
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    seconds[stage] += time.perf_counter() - started
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    seconds[stage] += time.perf_counter() - started
+        setattr(owner, name, timed)
+        self.patched.append((owner, name, original))
+
+    def __enter__(self):
+        self.patch(api_interaction, 'get_tle_concurrently', 'fetch')
+        self.patch(api_interaction, 'get_visual_passes', 'fetch')
+        self.patch(api_interaction.SimpleCache, 'get', 'cache', inside_fetch=True)
+        self.patch(api_interaction.SimpleCache, 'set', 'cache', inside_fetch=True)
+        self.patch(api_interaction.SimpleCache, 'flush', 'cache')
+        self.patch(tle_archive.TleArchive, 'add', 'cache', inside_fetch=True)
+        self.patch(tle_archive.TleArchive, 'flush', 'cache')
+        self.patch(api_interaction, 'convert_visual_passes_to_times', 'convert')
+        self.patch(api_interaction, 'filter_observation_times', 'filter')
+        self.patch(api_interaction, 'write_tle_plan', 'write')
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.seconds['fetch'] -= self.inside_fetch['cache']
+        self.seconds['cache'] += self.inside_fetch['cache']
+
+
+def start_mock(size: int, port: int, mock_args: list = ()) -> subprocess.Popen:
+    """The mock N2YO server in its own process, so its CPU time and memory stay out of the numbers."""
+    server = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'mock_n2yo.py'), '--size', str(size),
+                               '--port', str(port), *mock_args], stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit("Mock N2YO server exited")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    sys.exit("Mock N2YO server did not start")
+
+
+def run_plan(norad_ids: list, days: int, batch_size: int, workdir: str, memory: bool) -> dict:
+    """One cold-cache plan() against the mock; stage times, or the tracemalloc peak with `memory`."""
+    cache_file = os.path.join(workdir, 'cache.json')
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    api_interaction._cache = api_interaction.SimpleCache(cache_file)
+    observation_db._db = observation_db._db or observation_db.ObservationDB(os.path.join(workdir, 'observations.db'))
+    shutil.rmtree(os.path.join(workdir, 'tle_archive'), ignore_errors=True)
+    tle_archive._archive = tle_archive.TleArchive(os.path.join(workdir, 'tle_archive'))
+    plan_file = os.path.join(workdir, 'tleplan.txt')
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with StageTimer() as timer, contextlib.redirect_stdout(io.StringIO()):
+        planned = asyncio.run(api_interaction.plan(norad_ids, days, filename=plan_file, batch_size=batch_size))
+    wall = time.perf_counter() - started
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {'peak_mb': round(peak / 2 ** 20, 2)}
+    stages = {stage: round(seconds, 4) for stage, seconds in timer.seconds.items()}
+    stages['other'] = round(wall - sum(timer.seconds.values()), 4)
+    return {'wall_s': round(wall, 4), 'stages': stages, 'planned': len(planned)}
+
+
+def compare(results: list, baseline_file: str) -> list:
+    """Runs that got more than REGRESSION slower or bigger than the same run in `baseline_file`."""
+    with open(baseline_file) as file:
+        baseline = {(r['size'], r['batch_size']): r for r in json.load(file)['results']}
+    regressions = []
+    for result in results:
+        before = baseline.get((result['size'], result['batch_size']))
+        if not before:
+            continue
+        for key in ('wall_s', 'peak_mb'):
+            if key in result and before.get(key) and result[key] > before[key] * (1 + REGRESSION):
+                regressions.append(f"{result['size']} IDs, batch {result['batch_size']}: "
+                                   f"{key} {before[key]} -> {result[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end N2YO planning time, per stage, against a local mock.')
+    parser.add_argument('--sizes', default='10,1000,30000', help='Comma-separated NORAD ID counts')
+    parser.add_argument('--batch-sizes', default='10,100', help='Comma-separated plan() batch sizes')
+    parser.add_argument('--days', type=int, default=1, help='Days ahead to plan')
+    parser.add_argument('--port', type=int, default=8899, help='Port for the mock N2YO server')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the (slower) tracemalloc run')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--compare', help='Earlier --json results to check for regressions')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    batch_sizes = [int(batch) for batch in args.batch_sizes.split(',')]
+    server = start_mock(max(sizes), args.port)
+    api_interaction.BASE_URL = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault('API_KEY', 'benchmark')
+    workdir = tempfile.mkdtemp(prefix='bench_planning_')
+
+    results = []
+    header = f"{'IDs':>7} {'batch':>6} {'wall s':>8} " + " ".join(f"{stage:>8}" for stage in STAGES + ('other',))
+    print(header + f" {'passes':>7} {'peak MB':>8}")
+    try:
+        for size in sizes:
+            norad_ids = [str(10000 + i) for i in range(size)]
+            for batch_size in batch_sizes:
+                result = {'size': size, 'batch_size': batch_size}
+                result.update(run_plan(norad_ids, args.days, batch_size, workdir, memory=False))
+                if not args.no_memory:
+                    result.update(run_plan(norad_ids, args.days, batch_size, workdir, memory=True))
+                results.append(result)
+                stages = " ".join(f"{result['stages'][stage]:>8.3f}" for stage in STAGES + ('other',))
+                print(f"{size:>7} {batch_size:>6} {result['wall_s']:>8.3f} {stages} {result['planned']:>7} "
+                      f"{result.get('peak_mb', float('nan')):>8.1f}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'python': platform.python_version(), 'cpus': os.cpu_count(), 'days': args.days,
+                       'results': results}, file, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
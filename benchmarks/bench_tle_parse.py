@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from synthetic_catalog import synthetic_catalog  # noqa: E402
+from tle_elements import parse_catalog, to_arrays  # noqa: E402
+from pass_finder import orbit_elements, read_tle_catalog  # noqa: E402
+
+
+def best_rate(function, count: int, runs: int) -> float:
+    """Objects per second of the fastest of `runs` calls."""
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def bytes_per_record(text: str, count: int) -> float:
+    tracemalloc.start()
+    records = parse_catalog(text)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Catalog TLE parsing throughput, in objects per second.')
+    parser.add_argument('--size', type=int, default=30000, help='Element sets in the synthetic catalog')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per case (the fastest is reported)')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.size)
+    text = ''.join(f"0 {name}\n{line1}\n{line2}\n" for name, line1, line2 in catalog)
+    records = parse_catalog(text)
+    assert len(records) == args.size, "synthetic catalog failed to parse"
+
+    cases = {
+        'TleRecord, checksums verified': lambda: parse_catalog(text),
+        'TleRecord, no checksums': lambda: parse_catalog(text, verify=False),
+        'to_arrays on parsed records': lambda: to_arrays(records),
+        'text tuples + orbit_elements': lambda: orbit_elements(read_tle_catalog(text)),
+    }
+    try:
+        from sgp4.api import Satrec
+        cases['sgp4 Satrec.twoline2rv'] = lambda: [Satrec.twoline2rv(line1, line2) for _, line1, line2 in catalog]
+    except ImportError:
+        pass
+
+    results = {}
+    print(f"{args.size} element sets, best of {args.runs}")
+    print(f"{'case':<32} {'objects/s':>12} {'us/object':>10}")
+    for name, function in cases.items():
+        rate = best_rate(function, args.size, args.runs)
+        results[name] = round(rate)
+        print(f"{name:<32} {rate:>12,.0f} {1e6 / rate:>10.2f}", flush=True)
+    memory = bytes_per_record(text, args.size)
+    print(f"TleRecord memory: {memory:.0f} bytes per element set (lines and name included)")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'size': args.size, 'objects_per_s': results, 'bytes_per_record': round(memory)}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from aiohttp import web
+
+from synthetic_catalog import synthetic_catalog
+
+SECONDS_PER_DAY = 86400
+
+
+def visual_passes(sat_id: int, days: int, day_zero: int) -> list:
+    """Deterministic N2YO-style passes for one satellite: up to three per night, 2-10 minutes long."""
+    rng = random.Random(sat_id)
+    passes = []
+    for day in range(days):
+        for _ in range(rng.randint(0, 3)):
+            # 02:00-11:00 UTC is night in New Mexico
+            start = day_zero + day * SECONDS_PER_DAY + rng.randint(2 * 3600, 11 * 3600)
+            duration = rng.randint(120, 600)
+            passes.append({
+                'startAz': round(rng.uniform(0, 360), 2), 'startAzCompass': 'N', 'startEl': 10.0,
+                'startUTC': start, 'maxAz': round(rng.uniform(0, 360), 2), 'maxAzCompass': 'E',
+                'maxEl': round(rng.uniform(10, 90), 2), 'maxUTC': start + duration // 2,
+                'endAz': round(rng.uniform(0, 360), 2), 'endAzCompass': 'S', 'endEl': 10.0,
+                'endUTC': start + duration, 'mag': round(rng.uniform(-1, 5), 1), 'duration': duration,
+            })
+    return sorted(passes, key=lambda p: p['startUTC'])
+
+
+class Faults:
+    """
+    What can go wrong with a request, drawn independently per request.
+
+    Latency is log-normal with median `latency_ms` and shape `latency_sigma`;
+    with probability `stall_rate` the request instead takes `stall_s`. Then
+    `throttle_rate` of requests get 429 (Retry-After: `retry_after`),
+    `error_rate` get 500 or 503, and `drop_rate` have the connection closed
+    with no response.
+    """
+    def __init__(self, latency_ms: float = 0.0, latency_sigma: float = 0.5, stall_rate: float = 0.0,
+                 stall_s: float = 5.0, throttle_rate: float = 0.0, retry_after: int = 1, error_rate: float = 0.0,
+                 drop_rate: float = 0.0, seed: int = 1):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.stall_rate = stall_rate
+        self.stall_s = stall_s
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+
+    def delay(self) -> float:
+        if self.rng.random() < self.stall_rate:
+            return self.stall_s
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    async def inject(self, request):
+        """Sleep for the drawn latency, then maybe fail the request instead of answering it."""
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        draw = self.rng.random()
+        if draw < self.drop_rate:
+            request.transport.abort()
+            raise ConnectionResetError("dropped by mock")
+        draw -= self.drop_rate
+        if draw < self.throttle_rate:
+            raise web.HTTPTooManyRequests(headers={'Retry-After': str(self.retry_after)})
+        draw -= self.throttle_rate
+        if draw < self.error_rate:
+            raise self.rng.choice([web.HTTPInternalServerError, web.HTTPServiceUnavailable])()
+
+
+def make_app(catalog: list, day_zero: int = None, faults: Faults = None) -> web.Application:
+    """
+    aiohttp application serving the N2YO /tle and /visualpasses endpoints
+    for a (name, line1, line2) catalog. NORAD IDs are read from line 1, as
+    in the real catalog; passes come from visual_passes(). With `faults`,
+    every request first goes through Faults.inject().
+    """
+    by_id = {int(line1[2:7]): (name, line1, line2) for name, line1, line2 in catalog}
+    if day_zero is None:
+        day_zero = int(time.time()) // SECONDS_PER_DAY * SECONDS_PER_DAY
+
+    @web.middleware
+    async def inject_faults(request, handler):
+        await faults.inject(request)
+        return await handler(request)
+
+    def lookup(request):
+        sat_id = int(request.match_info['sat_id'])
+        if sat_id not in by_id:
+            raise web.HTTPNotFound()
+        return sat_id, by_id[sat_id][0]
+
+    async def tle(request):
+        sat_id, name = lookup(request)
+        _, line1, line2 = by_id[sat_id]
+        return web.json_response({'info': {'satid': sat_id, 'satname': name, 'transactionscount': 0},
+                                  'tle': f"{line1}\r\n{line2}"})
+
+    async def passes(request):
+        sat_id, name = lookup(request)
+        found = visual_passes(sat_id, int(request.match_info['days']), day_zero)
+        return web.json_response({'info': {'satid': sat_id, 'satname': name, 'transactionscount': 0,
+                                           'passescount': len(found)}, 'passes': found})
+
+    app = web.Application(middlewares=[inject_faults] if faults else [])
+    app.router.add_get('/tle/{sat_id}', tle)
+    app.router.add_get('/visualpasses/{sat_id}/{lat}/{lng}/{alt}/{days}/{min_visibility}/', passes)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand-in for the N2YO REST API over a synthetic catalog.')
+    parser.add_argument('--size', type=int, default=1000, help='Synthetic catalog size (NORAD IDs 10000 up)')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Log-normal shape of the latency')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Share of requests that take --stall-s')
+    parser.add_argument('--stall-s', type=float, default=5.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered 500/503')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Share of connections closed without a response')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    faults = Faults(args.latency_ms, args.latency_sigma, args.stall_rate, args.stall_s, args.throttle_rate,
+                    args.retry_after, args.error_rate, args.drop_rate, args.seed)
+    print(f"Serving {args.size} synthetic satellites at http://127.0.0.1:{args.port}", flush=True)
+    web.run_app(make_app(synthetic_catalog(args.size), faults=faults), host='127.0.0.1', port=args.port,
+                print=None, access_log=None)
@@ -0,0 +1,67 @@
+import argparse
+import math
+import random
+
+MU_KM3_S2 = 398600.8
+EARTH_RADIUS_KM = 6378.135
+
+# Rough make-up of the public catalog: (share, inclination range, altitude range km, eccentricity max)
+POPULATIONS = [
+    (0.35, (52.9, 53.2), (540, 560), 0.0002),     # Starlink-like shells
+    (0.25, (96.5, 99.0), (450, 900), 0.002),      # sun-synchronous
+    (0.15, (60.0, 90.0), (600, 1500), 0.01),      # high-inclination LEO and debris
+    (0.08, (0.0, 30.0), (400, 1200), 0.01),       # low-inclination LEO (never seen from 33N)
+    (0.10, (0.0, 15.0), (35700, 35900), 0.001),   # geostationary belt
+    (0.07, (50.0, 65.0), (19000, 23300), 0.01),   # MEO navigation
+]
+
+
+def tle_checksum(line: str) -> int:
+    total = 0
+    for ch in line[:68]:
+        if ch.isdigit():
+            total += int(ch)
+        elif ch == '-':
+            total += 1
+    return total % 10
+
+
+def make_tle(satnum: int, inclination: float, altitude_km: float, eccentricity: float,
+             raan: float, arg_perigee: float, mean_anomaly: float, epoch_year: int, epoch_day: float) -> tuple:
+    """Format one valid 69-column element set (checksums included)."""
+    a = EARTH_RADIUS_KM + altitude_km
+    mean_motion = 86400.0 / (2 * math.pi * math.sqrt(a ** 3 / MU_KM3_S2))
+    line1 = "1 %05dU %-8s %02d%012.8f  .00000100  00000-0  10000-3 0  999" % (
+        satnum, "24001A", epoch_year % 100, epoch_day)
+    line2 = "2 %05d %8.4f %8.4f %07d %8.4f %8.4f %11.8f%5d" % (
+        satnum, inclination, raan, int(round(eccentricity * 1e7)), arg_perigee, mean_anomaly, mean_motion, 1000)
+    return line1 + str(tle_checksum(line1)), line2 + str(tle_checksum(line2))
+
+
+def synthetic_catalog(size: int, seed: int = 42, epoch_year: int = 2026, epoch_day: float = 292.5) -> list:
+    """Deterministic (name, line1, line2) catalog with the rough make-up of the public one."""
+    rng = random.Random(seed)
+    weights = [share for share, *_ in POPULATIONS]
+    catalog = []
+    for i in range(size):
+        _, inc_range, alt_range, ecc_max = rng.choices(POPULATIONS, weights)[0]
+        satnum = 10000 + i
+        line1, line2 = make_tle(satnum, rng.uniform(*inc_range), rng.uniform(*alt_range), rng.uniform(0, ecc_max),
+                                rng.uniform(0, 360), rng.uniform(0, 360), rng.uniform(0, 360), epoch_year, epoch_day)
+        catalog.append((f"SYNTH-{satnum}", line1, line2))
+    return catalog
+
+
+def write_catalog(catalog: list, filename: str):
+    with open(filename, 'w') as file:
+        for name, line1, line2 in catalog:
+            file.write(f"0 {name}\n{line1}\n{line2}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a synthetic 3-line TLE catalog.')
+    parser.add_argument('size', type=int, help='Number of objects')
+    parser.add_argument('output', help='Catalog file to write')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    write_catalog(synthetic_catalog(args.size, args.seed), args.output)
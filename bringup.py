@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import clock
+import telemetry
+
+
+class BringupStep:
+    """
+    One bring-up action with its prerequisites.
+
+    `action` is called with no arguments on a worker thread; its return value
+    is kept in the report. A step only starts once every step named in
+    `depends_on` has succeeded. Steps marked required=False may fail or time
+    out without the bring-up as a whole being considered failed.
+    """
+    def __init__(self, name: str, action, depends_on=(), timeout: float = None, required: bool = True):
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.required = required
+
+
+class BringupReport:
+    def __init__(self):
+        self.started = clock.monotonic()
+        self.finished = None
+        self.results = {}  # name -> dict(status, start_s, duration_s, value, error)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or clock.monotonic()) - self.started
+
+    def ok(self) -> bool:
+        """True if every required step succeeded."""
+        return all(result['status'] == 'ok' for result in self.results.values() if result['required'])
+
+    def format(self) -> str:
+        lines = [f"{'step':<16} {'status':<8} {'start s':>8} {'took s':>8}"]
+        for name, result in sorted(self.results.items(), key=lambda item: item[1].get('start_s', float('inf'))):
+            start = f"{result['start_s']:.1f}" if 'start_s' in result else '-'
+            took = f"{result['duration_s']:.1f}" if 'duration_s' in result else '-'
+            lines.append(f"{name:<16} {result['status']:<8} {start:>8} {took:>8}")
+        serial = sum(result.get('duration_s', 0) for result in self.results.values())
+        lines.append(f"Ready after {self.elapsed:.1f} s (steps back to back: {serial:.1f} s)")
+        return "\n".join(lines)
+
+
+def run_bringup(steps: list, thread_initializer=None) -> BringupReport:
+    """
+    Run the steps concurrently, each as soon as its dependencies succeed.
+
+    A step that raises is 'failed'; one still running at its timeout is
+    'timeout' (its thread is left to finish on its own); steps downstream of
+    either are 'skipped'. `thread_initializer` runs once on each worker
+    thread, e.g. pythoncom.CoInitialize for COM.
+
+    Returns:
+    BringupReport with per-step status and timing.
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        for dependency in step.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Bring-up step '{step.name}' depends on unknown step '{dependency}'")
+
+    report = BringupReport()
+    for step in steps:
+        report.results[step.name] = {'status': 'pending', 'required': step.required}
+    pending = list(steps)
+    running = {}  # future -> (step, started, deadline)
+    step_done = threading.Condition()
+
+    def notify_done(future):
+        with step_done:
+            step_done.notify_all()
+
+    def run_step(step):
+        started = clock.monotonic()
+        try:
+            with telemetry.span(f'bringup.{step.name}'):
+                return step.action()
+        finally:
+            logging.info(f"Bring-up step {step.name} finished after {clock.monotonic() - started:.1f} s")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(steps)), thread_name_prefix='bringup',
+                                  initializer=thread_initializer)
+    try:
+        while pending or running:
+            # Start everything whose prerequisites are met; skip what can no longer run.
+            for step in list(pending):
+                statuses = [report.results[dependency]['status'] for dependency in step.depends_on]
+                if any(status in ('failed', 'timeout', 'skipped') for status in statuses):
+                    report.results[step.name]['status'] = 'skipped'
+                    pending.remove(step)
+                elif all(status == 'ok' for status in statuses):
+                    now = clock.monotonic()
+                    future = executor.submit(run_step, step)
+                    future.add_done_callback(notify_done)
+                    deadline = now + step.timeout if step.timeout else None
+                    running[future] = (step, now, deadline)
+                    report.results[step.name].update({'status': 'running', 'start_s': now - report.started})
+                    pending.remove(step)
+                    logging.info(f"Bring-up step {step.name} started")
+
+            if not running:
+                if pending:  # only reachable with a dependency cycle
+                    for step in pending:
+                        report.results[step.name]['status'] = 'skipped'
+                    pending.clear()
+                break
+
+            # Wait for the first step to finish or the nearest deadline, in clock time
+            deadlines = [deadline for _, _, deadline in running.values() if deadline]
+            with step_done:
+                while not any(future.done() for future in running):
+                    remaining = min(deadlines) - clock.monotonic() if deadlines else None
+                    if remaining is not None and remaining <= 0:
+                        break
+                    clock.wait(step_done, remaining)
+            done = [future for future in running if future.done()]
+
+            now = clock.monotonic()
+            for future in done:
+                step, started, _ = running.pop(future)
+                result = report.results[step.name]
+                result['duration_s'] = now - started
+                try:
+                    result['value'] = future.result()
+                    result['status'] = 'ok'
+                except Exception as e:
+                    result['status'] = 'failed'
+                    result['error'] = str(e)
+                    logging.error(f"Bring-up step {step.name} failed: {e}")
+            for future, (step, started, deadline) in list(running.items()):
+                if deadline and now >= deadline:
+                    running.pop(future)
+                    report.results[step.name].update({'status': 'timeout', 'duration_s': now - started})
+                    logging.error(f"Bring-up step {step.name} timed out after {step.timeout} s")
+    finally:
+        # Do not block on timed-out steps; their threads finish in the background.
+        executor.shutdown(wait=False)
+
+    report.finished = clock.monotonic()
+    logging.info("Bring-up timing report:\n" + report.format())
+    return report
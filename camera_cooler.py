@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import clock
+
+CAMERA_PROGID = "MaxIm.CCDCamera"
+COOLER_PROFILE_FILENAME = "cooler_profile.json"
+
+COOLER_SETPOINT = -10.0  # degrees C while observing
+WARM_TEMPERATURE = 20.0  # setpoint the sensor is ramped back to before the cooler goes off
+DEFAULT_COOLDOWN_RATE = 2.0  # degrees C per minute until one has been measured
+
+
+def load_cooldown_rate(filename: str = COOLER_PROFILE_FILENAME) -> float:
+    """Cooldown rate (C/min) measured on previous nights, or the default."""
+    try:
+        with open(filename, 'r') as file:
+            return float(json.load(file)['cooldown_rate'])
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_COOLDOWN_RATE
+
+
+def save_cooldown_rate(measured: float, filename: str = COOLER_PROFILE_FILENAME) -> float:
+    """Blend a new measurement into the stored rate (half weight) and return it."""
+    rate = 0.5 * load_cooldown_rate(filename) + 0.5 * measured
+    with open(filename + '.tmp', 'w') as file:
+        json.dump({'cooldown_rate': round(rate, 3), 'updated': clock.now().isoformat(timespec='seconds')}, file)
+    os.replace(filename + '.tmp', filename)
+    return rate
+
+
+def cooldown_lead_time(ambient: float, setpoint: float, rate: float, settle_seconds: float = 120,
+                       margin_seconds: float = 300) -> timedelta:
+    """How long before the first pass the cooler has to be switched on."""
+    cooling_seconds = max(ambient - setpoint, 0.0) / max(rate, 0.1) * 60
+    return timedelta(seconds=cooling_seconds + settle_seconds + margin_seconds)
+
+
+class CoolerManager:
+    """
+    Camera cooler on background threads: pre-cool ahead of the first pass,
+    report when the sensor is stable, ramp back up after the last one.
+
+    Each background task dispatches its own camera object on its own thread
+    (COM proxies are apartment-bound). `stable` is set once the sensor has
+    held within `tolerance` of the setpoint for `settle_seconds`, or has
+    stopped moving because the cooler cannot get any colder tonight.
+    """
+    def __init__(self, setpoint: float = COOLER_SETPOINT, tolerance: float = 0.5, settle_seconds: float = 120,
+                 poll_seconds: float = 5, profile_filename: str = COOLER_PROFILE_FILENAME, dispatch=None):
+        self.setpoint = setpoint
+        self.tolerance = tolerance
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.profile_filename = profile_filename
+        self.dispatch = dispatch
+        self.stable = threading.Event()
+        self.cancelled = threading.Event()
+        self.thread = None
+        self.state = 'off'  # off, scheduled, cooling, stable, warming
+        self.temperature = None
+        self.cooling_started_at = None
+
+    def _camera(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        if self.dispatch is None:
+            import win32com.client
+            self.dispatch = win32com.client.Dispatch
+        cam = self.dispatch(CAMERA_PROGID)
+        cam.LinkEnabled = True
+        cam.DisableAutoShutdown = True
+        return cam
+
+    def _start(self, target, *args, daemon=True):
+        self.cancel()
+        self.cancelled.clear()
+        self.thread = threading.Thread(target=target, args=args, name='camera-cooler', daemon=daemon)
+        self.thread.start()
+
+    def cancel(self):
+        """Stop whatever the cooler thread is doing (the cooler itself is left as is)."""
+        self.cancelled.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def schedule(self, first_pass_local: datetime):
+        """
+        Start cooling in time for a pass beginning at `first_pass_local`
+        (naive local time, like the plan entries). Starts at once if the
+        lead time has already passed. Does nothing if already cooling.
+        """
+        if self.state in ('scheduled', 'cooling', 'stable'):
+            return
+        self.stable.clear()
+        self.state = 'scheduled'
+        self._start(self._cool, first_pass_local)
+
+    def cool_now(self):
+        self.schedule(clock.now())
+
+    def wait_until_stable(self, timeout: float = None) -> bool:
+        return clock.wait_event(self.stable, timeout)
+
+    def warm_up(self, ramp_step: float = 5.0, step_seconds: float = 60):
+        """Ramp the setpoint back to WARM_TEMPERATURE and switch the cooler off, in the background."""
+        if self.state == 'off':
+            return
+        self.stable.clear()
+        self.state = 'warming'
+        # Not a daemon thread: a script that ends after its last pass still
+        # gets the ramp finished while the interpreter exits
+        self._start(self._warm, ramp_step, step_seconds, daemon=False)
+
+    def _cool(self, first_pass_local: datetime):
+        try:
+            self._hold_setpoint(first_pass_local)
+        except Exception as e:
+            self.state = 'off'
+            logging.error(f"Error in camera cooler: {e}")
+
+    def _hold_setpoint(self, first_pass_local: datetime):
+        cam = self._camera()
+        ambient = cam.Temperature
+        rate = load_cooldown_rate(self.profile_filename)
+        start_at = first_pass_local - cooldown_lead_time(ambient, self.setpoint, rate, self.settle_seconds)
+        wait_seconds = (start_at - clock.now()).total_seconds()
+        if wait_seconds > 0:
+            logging.info(f"Cooler: sensor at {ambient:.1f} C, cooling at {rate:.2f} C/min; "
+                         f"switching on at {start_at:%H:%M:%S} for the {first_pass_local:%H:%M:%S} pass")
+            if clock.wait_event(self.cancelled, wait_seconds):
+                self.state = 'off'
+                return
+            ambient = cam.Temperature
+
+        self.state = 'cooling'
+        cam.SetTemperature = self.setpoint
+        cam.CoolerOn = True
+        started = clock.time()
+        self.cooling_started_at = clock.now()
+        logging.info(f"Cooler on: {ambient:.1f} C -> {self.setpoint:.1f} C")
+
+        reached_at = settled_since = None
+        last_temperature = ambient
+        while not clock.wait_event(self.cancelled, self.poll_seconds):
+            temperature = self.temperature = cam.Temperature
+            at_setpoint = abs(temperature - self.setpoint) <= self.tolerance
+            plateau = abs(temperature - last_temperature) <= 0.1 * self.poll_seconds / 5
+            last_temperature = temperature
+            if at_setpoint and reached_at is None:
+                reached_at = clock.time()
+                if ambient - temperature > 1.0:
+                    measured = (ambient - temperature) / ((reached_at - started) / 60)
+                    rate = save_cooldown_rate(measured, self.profile_filename)
+                    logging.info(f"Cooler: measured {measured:.2f} C/min (stored rate now {rate:.2f})")
+            if at_setpoint or plateau:
+                settled_since = settled_since or clock.time()
+            else:
+                settled_since = None
+            if settled_since and clock.time() - settled_since >= self.settle_seconds and not self.stable.is_set():
+                self.state = 'stable'
+                self.stable.set()
+                if at_setpoint:
+                    logging.info(f"Cooler stable at {temperature:.1f} C after {clock.time() - started:.0f} s")
+                else:
+                    logging.warning(f"Cooler levelled off at {temperature:.1f} C, short of {self.setpoint:.1f} C")
+            elif self.stable.is_set() and not (at_setpoint or plateau):
+                logging.warning(f"Cooler drifted to {temperature:.1f} C")
+
+    def _warm(self, ramp_step: float, step_seconds: float):
+        cam = self._camera()
+        try:
+            setpoint = cam.Temperature
+            while setpoint < WARM_TEMPERATURE and not self.cancelled.is_set():
+                setpoint = min(setpoint + ramp_step, WARM_TEMPERATURE)
+                cam.SetTemperature = setpoint
+                clock.wait_event(self.cancelled, step_seconds)
+            if not self.cancelled.is_set():
+                cam.CoolerOn = False
+                self.state = 'off'
+                logging.info(f"Cooler off after warming to {cam.Temperature:.1f} C")
+        except Exception as e:
+            logging.error(f"Error warming up the camera: {e}")
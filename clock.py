@@ -0,0 +1,307 @@
+"""
+Time source for the observatory scripts.
+
+Everything that schedules against wall-clock time asks this module instead
+of calling datetime.now() / time.sleep() directly:
+
+    import clock
+    clock.now(tz)               # like datetime.now(tz)
+    clock.time()                # like time.time()
+    clock.monotonic()           # like time.monotonic()
+    clock.sleep(seconds)
+    clock.wait(condition, t)    # like condition.wait(t); the caller holds the condition
+    clock.wait_event(event, t)  # like event.wait(t)
+    clock.join(thread)
+    clock.call_later(delay, function)  # like threading.Timer(...).start()
+    clock.ignore(thread)        # a thread that never waits on the clock
+
+By default these are the real clock. install(VirtualClock(start)) swaps in
+a discrete-event clock for replaying a night against the simulators:
+virtual time stands still while any thread is working and jumps straight
+to the next wake-up once every thread that uses the clock is waiting on it.
+"""
+import heapq
+import threading
+import time as _time
+from datetime import datetime
+
+
+class SystemClock:
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def time(self) -> float:
+        return _time.time()
+
+    def monotonic(self) -> float:
+        return _time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def wait(self, condition, timeout: float = None) -> bool:
+        return condition.wait(timeout)
+
+    def wait_event(self, event, timeout: float = None) -> bool:
+        return event.wait(timeout)
+
+    def join(self, thread, timeout: float = None):
+        thread.join(timeout)
+
+    def ignore(self, thread):
+        pass
+
+
+class _Waiter:
+    __slots__ = ('thread', 'deadline', 'condition', 'fired', 'event')
+
+    def __init__(self, thread, deadline, condition):
+        self.thread = thread
+        self.deadline = deadline
+        self.condition = condition
+        self.fired = False
+        self.event = threading.Event()
+
+
+class VirtualClock:
+    """
+    Discrete-event clock starting at `start` (naive local time, default now).
+
+    The thread that installs the clock is a participant, and so is every
+    thread a participant starts or that waits on the clock. Time only moves
+    when every live participant is waiting on the clock, and then jumps to
+    the earliest deadline, so a night of sleeps and timeouts takes as long
+    as the work done in between. A participant blocked on something the
+    clock does not see (a socket, a plain lock, an idle worker pool) would
+    stall that rule; after `quiet` real seconds without any clock activity
+    time moves anyway.
+    """
+    def __init__(self, start: datetime = None, quiet: float = 0.05, event_poll: float = 0.005):
+        self._now = (start or datetime.now()).timestamp()
+        self._origin = self._now
+        self.quiet = quiet
+        self.event_poll = event_poll
+        self._lock = threading.Lock()
+        self._timers = []  # (deadline, seq, waiter)
+        self._seq = 0
+        self._threads = {}  # participant thread -> waiter it is blocked in, or None while running
+        self._activity = _time.monotonic()
+        self._thread_start = None
+        self.jumps = 0
+
+    def attach(self):
+        """Called by install(): adopt the installing thread and any thread a participant starts."""
+        self._threads[threading.current_thread()] = None
+        original = self._thread_start = threading.Thread.start
+        clock = self
+
+        def start(thread):
+            with clock._lock:
+                if threading.current_thread() in clock._threads:
+                    clock._threads.setdefault(thread, None)
+            original(thread)
+        threading.Thread.start = start
+
+    def detach(self):
+        if self._thread_start is not None:
+            threading.Thread.start = self._thread_start
+            self._thread_start = None
+
+    def ignore(self, thread):
+        """Stop counting `thread` as a participant, e.g. a real-time sampler that would otherwise never block."""
+        with self._lock:
+            self._threads.pop(thread, None)
+
+    def now(self, tz=None) -> datetime:
+        return datetime.fromtimestamp(self._now, tz)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now - self._origin
+
+    def elapsed(self) -> float:
+        """Virtual seconds since the clock started."""
+        return self._now - self._origin
+
+    # -- bookkeeping (under self._lock) ------------------------------------
+
+    def _block(self, timeout, condition=None) -> _Waiter:
+        thread = threading.current_thread()
+        deadline = None if timeout is None else self._now + max(0.0, timeout)
+        waiter = _Waiter(thread, deadline, condition)
+        if deadline is not None:
+            heapq.heappush(self._timers, (deadline, self._seq, waiter))
+            self._seq += 1
+        self._threads[thread] = waiter
+        self._activity = _time.monotonic()
+        return waiter
+
+    def _unblock(self, waiter: _Waiter):
+        waiter.fired = True  # its heap slot goes stale
+        if self._threads.get(waiter.thread) is waiter:
+            self._threads[waiter.thread] = None
+        self._activity = _time.monotonic()
+
+    def _advance(self, force: bool = False) -> list:
+        """Jump to the next deadline if nobody is running; returns the waiters to wake."""
+        self._threads = {thread: waiter for thread, waiter in self._threads.items()
+                         if thread.is_alive() or thread.ident is None}  # keep adopted, not yet started threads
+        if not force and any(waiter is None for waiter in self._threads.values()):
+            return []
+        while self._timers and self._timers[0][2].fired:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return []
+        self._now = max(self._now, self._timers[0][0])
+        self.jumps += 1
+        fired = []
+        while self._timers and self._timers[0][0] <= self._now:
+            waiter = heapq.heappop(self._timers)[2]
+            if not waiter.fired:
+                self._unblock(waiter)  # running again as of now, before it even wakes up
+                fired.append(waiter)
+        return fired
+
+    def _quiet(self) -> bool:
+        return _time.monotonic() - self._activity >= self.quiet
+
+    def _wake(self, fired: list):
+        for waiter in fired:
+            waiter.event.set()
+            if waiter.condition is not None:
+                with waiter.condition:
+                    waiter.condition.notify_all()
+
+    def _step(self, waiter: _Waiter) -> bool:
+        """After a real-time wait ran out: True if `waiter` has fired, else maybe move time."""
+        with self._lock:
+            if waiter.fired:
+                return True
+            fired = self._advance(force=self._quiet())
+        self._wake(fired)
+        return False
+
+    # -- waiting -----------------------------------------------------------
+
+    def sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+        with self._lock:
+            waiter = self._block(seconds)
+            fired = self._advance()
+        self._wake(fired)
+        while not waiter.event.wait(self.quiet) and not self._step(waiter):
+            pass
+
+    def wait(self, condition, timeout: float = None) -> bool:
+        """condition.wait(timeout) in virtual time; True if notified before the timeout."""
+        with self._lock:
+            waiter = self._block(timeout, condition)
+            fired = self._advance()
+        self._wake(fired)
+        while not waiter.fired:
+            notified = condition.wait(self.quiet)
+            with self._lock:
+                if waiter.fired:
+                    break
+                if notified:
+                    self._unblock(waiter)
+                    return True
+                fired = self._advance(force=self._quiet())
+            self._wake(fired)
+        return False
+
+    def wait_event(self, event, timeout: float = None) -> bool:
+        if event.is_set():
+            return True
+        with self._lock:
+            waiter = self._block(timeout)
+            fired = self._advance()
+        self._wake(fired)
+        # Nothing tells the clock when an Event is set, so poll it in short real-time slices
+        waited = 0.0
+        while True:
+            if event.wait(self.event_poll):
+                with self._lock:
+                    self._unblock(waiter)
+                return True
+            if waiter.fired:
+                return event.is_set()
+            waited += self.event_poll
+            if waited >= self.quiet:
+                waited = 0.0
+                if self._step(waiter):
+                    return event.is_set()
+
+    def join(self, thread, timeout: float = None):
+        with self._lock:
+            waiter = self._block(timeout)
+        while thread.is_alive():
+            thread.join(self.quiet)
+            if thread.is_alive() and self._step(waiter):
+                return
+        with self._lock:
+            self._unblock(waiter)
+
+
+_clock = SystemClock()
+
+
+def install(new_clock):
+    """Make `new_clock` the time source for every module; returns the previous one."""
+    global _clock
+    previous, _clock = _clock, new_clock
+    if hasattr(previous, 'detach'):
+        previous.detach()
+    if hasattr(new_clock, 'attach'):
+        new_clock.attach()
+    return previous
+
+
+def get():
+    return _clock
+
+
+def now(tz=None) -> datetime:
+    return _clock.now(tz)
+
+
+def time() -> float:
+    return _clock.time()
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
+
+
+def sleep(seconds: float):
+    _clock.sleep(seconds)
+
+
+def wait(condition, timeout: float = None) -> bool:
+    return _clock.wait(condition, timeout)
+
+
+def wait_event(event, timeout: float = None) -> bool:
+    return _clock.wait_event(event, timeout)
+
+
+def join(thread, timeout: float = None):
+    _clock.join(thread, timeout)
+
+
+def ignore(thread):
+    _clock.ignore(thread)
+
+
+def call_later(delay: float, function, *args, name: str = None) -> threading.Thread:
+    """Run `function(*args)` on a new thread after `delay` seconds of clock time."""
+    def run():
+        sleep(delay)
+        function(*args)
+    thread = threading.Thread(target=run, name=name or f"call_later-{getattr(function, '__name__', 'task')}")
+    thread.start()
+    return thread
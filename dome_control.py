@@ -0,0 +1,246 @@
+import collections
+import logging
+import queue
+import threading
+
+import clock
+
+DDW_PROGID = "TIDigitalDomeWorks.DomeControl"
+
+CLOSED = 'closed'
+OPENING = 'opening'
+OPEN = 'open'
+CLOSING = 'closing'
+FAULT = 'fault'
+SLAVED = 'slaved'
+UNKNOWN = 'unknown'
+
+TRANSITION_STATES = (OPENING, CLOSING)
+
+DomeEvent = collections.namedtuple('DomeEvent', ['old_state', 'new_state', 'timestamp', 'duration_s', 'reason'])
+
+
+class DomeController(threading.Thread):
+    """
+    DigitalDomeWorks as an explicit state machine on its own thread.
+
+    States: closed, opening, open, closing, slaved (open and following the
+    mount) and fault (DDW offline, a command failed, or a shutter move took
+    longer than `transition_timeout`).
+
+    The thread owns the COM object, so every DDW call happens in one
+    apartment; other threads send commands through a queue and wait on the
+    state. Status is polled every `fast_poll` seconds while the shutter is
+    moving and every `idle_poll` seconds otherwise. Each state change is
+    recorded as a DomeEvent (with the time spent in the previous state) and
+    passed to the `on_event` callbacks.
+    """
+    def __init__(self, progid: str = DDW_PROGID, fast_poll: float = 0.25, idle_poll: float = 10.0,
+                 transition_timeout: float = 180.0, on_event=None, dispatch=None):
+        super().__init__(name='dome-control', daemon=True)
+        self.progid = progid
+        self.fast_poll = fast_poll
+        self.idle_poll = idle_poll
+        self.transition_timeout = transition_timeout
+        self.listeners = [on_event] if on_event else []
+        self.dispatch = dispatch
+        self.events = collections.deque(maxlen=200)
+        self.commands = queue.Queue()
+        self.wakeup = threading.Event()  # set whenever a command is queued
+        self.condition = threading.Condition()
+        self.state = UNKNOWN
+        self.state_since = clock.monotonic()
+        self.fault_reason = None
+        self.ddw = None
+        self.commanded_azimuth = None
+        self._pending = None  # OPENING/CLOSING command in flight
+        self._pending_since = None
+        self._stopping = False
+
+    # -- public API (any thread) -------------------------------------------
+
+    def send(self, command: str, *args) -> threading.Event:
+        """Queue a command; the returned event is set once the dome thread has acted on it."""
+        done = threading.Event()
+        self.commands.put((command, args, done))
+        self.wakeup.set()
+        return done
+
+    def goto_azimuth(self, azimuth: float) -> threading.Event:
+        """Rotate the dome to `azimuth` degrees without waiting for it to arrive."""
+        return self.send('goto', float(azimuth) % 360)
+
+    def open_shutter(self, timeout: float = None) -> bool:
+        """Open the shutter; returns True as soon as DDW reports it open."""
+        timeout = timeout or self.transition_timeout + 10
+        return self.wait_for((OPEN, SLAVED), timeout, after=self.send('open_shutter'))
+
+    def close_shutter(self, timeout: float = None) -> bool:
+        """Close the shutter; returns True as soon as DDW reports it closed."""
+        timeout = timeout or self.transition_timeout + 10
+        return self.wait_for((CLOSED,), timeout, after=self.send('close_shutter'))
+
+    def set_slave_mode(self, enabled: bool = True, timeout: float = 30) -> bool:
+        target = (SLAVED,) if enabled else (OPEN, CLOSED)
+        return self.wait_for(target, timeout, after=self.send('slave_on' if enabled else 'slave_off'))
+
+    def refresh(self, timeout: float = 10) -> str:
+        """Poll the hardware now instead of at the next idle interval; returns the state."""
+        clock.wait_event(self.send('refresh'), timeout)
+        return self.state
+
+    def is_operational(self) -> bool:
+        return self.is_alive() and self.state not in (FAULT, UNKNOWN)
+
+    def is_shutter_open(self) -> bool:
+        return self.state in (OPEN, SLAVED)
+
+    def wait_for(self, states, timeout: float, after: threading.Event = None) -> bool:
+        """
+        Block until the dome is in one of `states` (True) or faults / times out (False).
+
+        `after` is the event returned by send(); the state is only checked once
+        that command has run, so the state from before it cannot satisfy the wait.
+        """
+        deadline = clock.monotonic() + timeout
+        if after is not None and not clock.wait_event(after, timeout):
+            return False
+        with self.condition:
+            while self.state not in states:
+                if self.state == FAULT and self._pending is None:
+                    return False
+                remaining = deadline - clock.monotonic()
+                if remaining <= 0:
+                    return False
+                clock.wait(self.condition, remaining)
+            return True
+
+    def stop(self):
+        self._stopping = True
+        self.send('refresh')
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    # -- dome thread -------------------------------------------------------
+
+    def run(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        if self.dispatch is None:
+            import win32com.client
+            self.dispatch = win32com.client.Dispatch
+        try:
+            self.ddw = self.dispatch(self.progid)
+        except Exception as e:
+            self._set_state(FAULT, f"Could not connect to DDW: {e}")
+            return
+
+        self._poll()
+        while not self._stopping:
+            interval = self.fast_poll if self.state in TRANSITION_STATES else self.idle_poll
+            if self.commands.empty() and not clock.wait_event(self.wakeup, interval):
+                self._poll()
+                continue
+            self.wakeup.clear()
+            while True:
+                try:
+                    command, args, done = self.commands.get_nowait()
+                except queue.Empty:
+                    break
+                self._execute(command, *args)
+                done.set()
+
+    def _execute(self, command: str, *args):
+        try:
+            if command == 'open_shutter':
+                if not self.ddw.statIsShutterOpen():
+                    self.ddw.actOpenShutter()
+                    self._begin_transition(OPENING)
+            elif command == 'close_shutter':
+                if self.ddw.statIsShutterOpen():
+                    self.ddw.optSlaveMode = False
+                    self.ddw.actCloseShutter()
+                    self._begin_transition(CLOSING)
+            elif command == 'slave_on':
+                self.ddw.optSlaveMode = True
+            elif command == 'slave_off':
+                self.ddw.optSlaveMode = False
+            elif command == 'goto':
+                self.ddw.actGotoAzimuth(args[0])
+                self.commanded_azimuth = args[0]
+                return  # rotation does not change the shutter state
+        except Exception as e:
+            self._pending = None
+            self._set_state(FAULT, f"{command} failed: {e}")
+            return
+        self._poll()
+
+    def _begin_transition(self, state: str):
+        self._pending = state
+        self._pending_since = clock.monotonic()
+        self._set_state(state, 'command sent')
+
+    def _poll(self):
+        try:
+            try:
+                self.ddw.actRefreshStatus()
+            except AttributeError:
+                pass
+            online = self.ddw.statIsOnline()
+            busy = self.ddw.statIsBusy()
+            shutter_open = self.ddw.statIsShutterOpen()
+            slaved = bool(self.ddw.optSlaveMode)
+        except Exception as e:
+            self._set_state(FAULT, f"status poll failed: {e}")
+            return
+
+        if not online:
+            self._pending = None
+            self._set_state(FAULT, 'DDW is not running')
+            return
+
+        if self._pending == OPENING:
+            if shutter_open and not busy:
+                self._pending = None
+            elif clock.monotonic() - self._pending_since > self.transition_timeout:
+                self._pending = None
+                self._set_state(FAULT, 'shutter did not open in time')
+                return
+            else:
+                return
+        elif self._pending == CLOSING:
+            if not shutter_open and not busy:
+                self._pending = None
+            elif clock.monotonic() - self._pending_since > self.transition_timeout:
+                self._pending = None
+                self._set_state(FAULT, 'shutter did not close in time')
+                return
+            else:
+                return
+
+        if shutter_open:
+            self._set_state(SLAVED if slaved else OPEN, 'status poll')
+        else:
+            self._set_state(CLOSED, 'status poll')
+
+    def _set_state(self, new_state: str, reason: str):
+        with self.condition:
+            if new_state == self.state:
+                return
+            now = clock.monotonic()
+            event = DomeEvent(self.state, new_state, clock.time(), now - self.state_since, reason)
+            self.state = new_state
+            self.state_since = now
+            self.fault_reason = reason if new_state == FAULT else None
+            self.events.append(event)
+            self.condition.notify_all()
+        logging.info(f"Dome {event.old_state} -> {event.new_state} after {event.duration_s:.1f} s ({reason})")
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.error(f"Dome event listener failed: {e}")
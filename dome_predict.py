@@ -0,0 +1,129 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+from pass_finder import _time_grid, look_angles
+import clock
+
+MST = timezone(timedelta(hours=-7))  # tleplan.txt times are written in MST
+
+DOME_SLEW_RATE = 4.0  # degrees of azimuth per second the dome can rotate
+SLIT_HALF_WIDTH = 8.0  # degrees of azimuth either side of the slit centre at the horizon
+COMMAND_DEADBAND = 1.0  # degrees; smaller corrections are not sent to DDW
+
+
+def azimuth_difference(a, b):
+    """Signed shortest rotation from b to a, in degrees (-180, 180]."""
+    return (np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0
+
+
+def slit_tolerance(elevation, half_width: float = SLIT_HALF_WIDTH):
+    """
+    Azimuth error the slit can absorb at a given elevation.
+
+    The slit has a fixed linear width, so it spans more azimuth the higher
+    the target; near the zenith any azimuth will do.
+    """
+    cos_el = np.cos(np.radians(np.clip(elevation, 0.0, 89.9)))
+    return np.minimum(half_width / cos_el, 180.0)
+
+
+def pass_track(tle1: str, tle2: str, start_utc: datetime, end_utc: datetime, step_s: float = 1.0,
+               slew_rate: float = DOME_SLEW_RATE) -> dict:
+    """
+    Azimuth/elevation of a satellite across a pass, sampled every `step_s` seconds.
+
+    Returns:
+    dict with 'start' (aware UTC), 'offsets' (s), 'azimuth', 'elevation' and
+    'dome_azimuth', the dome path from lead_dome_path() for a dome turning at
+    `slew_rate` deg/s.
+    """
+    grid = _time_grid(start_utc, end_utc, step_s, sun_vector=np.zeros(3))
+    elevation, azimuth, _ = look_angles(SatrecArray([Satrec.twoline2rv(tle1, tle2)]), grid)
+    track = {'start': start_utc, 'offsets': grid['offsets'], 'azimuth': azimuth[0], 'elevation': elevation[0]}
+    track['dome_azimuth'] = lead_dome_path(track, slew_rate)
+    return track
+
+
+def lead_dome_path(track: dict, slew_rate: float = DOME_SLEW_RATE) -> np.ndarray:
+    """
+    Dome azimuth for every sample of a pass, starting rotations early enough
+    that the dome never has to turn faster than `slew_rate`.
+
+    Walking the track backwards with the rotation per step capped means any
+    stretch where the satellite's azimuth changes faster than the dome can
+    turn (culmination of a high pass) is spread over the samples before it:
+    the dome leads the mount into the fast segment instead of chasing it.
+    Where the satellite is slow the path is the satellite azimuth itself.
+    """
+    azimuth = track['azimuth']
+    steps = np.diff(track['offsets']) * slew_rate
+    path = np.empty_like(azimuth)
+    path[-1] = azimuth[-1]
+    for i in range(len(azimuth) - 2, -1, -1):
+        path[i] = (path[i + 1] + np.clip(azimuth_difference(azimuth[i], path[i + 1]), -steps[i], steps[i])) % 360
+    return path
+
+
+def dome_target(track: dict, when_utc: datetime) -> float:
+    """Dome azimuth the path calls for at `when_utc` (clamped to the pass)."""
+    offset = (when_utc - track['start']).total_seconds()
+    index = int(np.clip(np.searchsorted(track['offsets'], offset), 0, len(track['offsets']) - 1))
+    return float(track['dome_azimuth'][index])
+
+
+def plan_entry_track(entry, step_s: float = 1.0) -> dict:
+    """pass_track() for a tleplan.txt PlanEntry from api_interaction.read_tle_plan (naive MST begin/end times)."""
+    start_utc = entry.begin_time_local.replace(tzinfo=MST).astimezone(timezone.utc)
+    end_utc = entry.end_time_local.replace(tzinfo=MST).astimezone(timezone.utc)
+    return pass_track(entry.tle2, entry.tle3, start_utc, end_utc, step_s)
+
+
+def preposition_dome(dome, track: dict):
+    """
+    Between passes: stop slaving and turn the slit to where the next pass
+    starts, so the dome is waiting when the mount arrives.
+    """
+    dome.set_slave_mode(False)
+    rise_azimuth = float(track['dome_azimuth'][0])
+    dome.goto_azimuth(rise_azimuth)
+    logging.info(f"Dome pre-positioned to {rise_azimuth:.1f} deg for the next pass")
+    return rise_azimuth
+
+
+class DomeLeader(threading.Thread):
+    """
+    Drives the dome along a pass's lead path while the observer exposes.
+
+    Sends a goto whenever the path has moved more than `deadband` degrees
+    from the last command; `lookahead_s` covers DDW's command latency.
+    """
+    def __init__(self, dome, track: dict, interval: float = 0.5, lookahead_s: float = 1.0,
+                 deadband: float = COMMAND_DEADBAND):
+        super().__init__(name='dome-leader', daemon=True)
+        self.dome = dome
+        self.track = track
+        self.interval = interval
+        self.lookahead_s = lookahead_s
+        self.deadband = deadband
+        self.stopped = threading.Event()
+        self.commands_sent = 0
+
+    def run(self):
+        end = self.track['start'] + timedelta(seconds=float(self.track['offsets'][-1]))
+        last_commanded = None
+        while not self.stopped.is_set():
+            now = clock.now(timezone.utc)
+            if now > end:
+                break
+            target = dome_target(self.track, now + timedelta(seconds=self.lookahead_s))
+            if last_commanded is None or abs(azimuth_difference(target, last_commanded)) > self.deadband:
+                self.dome.goto_azimuth(target)
+                last_commanded = target
+                self.commands_sent += 1
+            clock.wait_event(self.stopped, self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        clock.join(self, timeout=2 * self.interval)
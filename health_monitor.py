@@ -0,0 +1,139 @@
+import logging
+import os
+import shutil
+import threading
+import time
+
+import clock
+
+
+class HealthProbe:
+    """
+    One thing to keep an eye on.
+
+    `check` is called with no arguments on the probe's own thread and either
+    returns a short detail (anything printable) for a healthy result or
+    raises. Healthy probes run every `interval` seconds; failing ones are
+    retried after `min_backoff`, doubling up to `max_backoff`.
+    """
+    def __init__(self, name: str, check, interval: float = 30, min_backoff: float = 2, max_backoff: float = 60,
+                 timeout: float = 20, com: bool = False):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.com = com  # CoInitialize the probe thread
+
+
+class HealthMonitor:
+    """
+    Probes run concurrently in the background; readers get the latest
+    timestamped snapshot without touching any hardware. A probe that hangs
+    stops refreshing its result, so it ages out of is_healthy() instead of
+    blocking the reader.
+    """
+    def __init__(self, probes: list):
+        self.probes = {probe.name: probe for probe in probes}
+        self.condition = threading.Condition()
+        self.results = {}  # name -> dict(ok, detail, checked_at, latency_s, failures)
+        self.stopped = threading.Event()
+        self.threads = []
+
+    def start(self):
+        if self.threads:
+            return
+        for probe in self.probes.values():
+            thread = threading.Thread(target=self._run_probe, args=(probe,), name=f'health-{probe.name}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run_probe(self, probe: HealthProbe):
+        if probe.com:
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
+        backoff = probe.min_backoff
+        failures = 0
+        while not self.stopped.is_set():
+            started = time.perf_counter()
+            try:
+                detail, ok = probe.check(), True
+            except Exception as e:
+                detail, ok = str(e), False
+            latency = time.perf_counter() - started
+            if ok and latency > probe.timeout:
+                detail, ok = f"slow: {latency:.1f} s", False
+
+            failures = 0 if ok else failures + 1
+            with self.condition:
+                previous = self.results.get(probe.name)
+                self.results[probe.name] = {'ok': ok, 'detail': detail, 'checked_at': clock.time(),
+                                            'latency_s': round(latency, 3), 'failures': failures}
+                self.condition.notify_all()
+            if previous is None or previous['ok'] != ok:
+                log = logging.info if ok else logging.warning
+                log(f"Health: {probe.name} {'OK' if ok else 'FAILING'} ({detail})")
+
+            if ok:
+                backoff = probe.min_backoff
+                delay = probe.interval
+            else:
+                delay = backoff
+                backoff = min(backoff * 2, probe.max_backoff)
+            clock.wait_event(self.stopped, delay)
+
+    def snapshot(self) -> dict:
+        """Copy of the latest result of every probe, plus its age in seconds."""
+        now = clock.time()
+        with self.condition:
+            return {name: dict(result, age_s=round(now - result['checked_at'], 1)) for name, result in self.results.items()}
+
+    def _healthy(self, names, max_age: float) -> bool:
+        now = clock.time()
+        for name in names:
+            result = self.results.get(name)
+            if result is None or not result['ok'] or now - result['checked_at'] > max_age:
+                return False
+        return True
+
+    def is_healthy(self, names=None, max_age: float = 120) -> bool:
+        """All named probes (default: all) passed their last check within `max_age` seconds."""
+        with self.condition:
+            return self._healthy(names or list(self.probes), max_age)
+
+    def wait_healthy(self, names=None, max_age: float = 120, timeout: float = 300) -> bool:
+        """Return as soon as the named probes are healthy, or False after `timeout` seconds."""
+        deadline = clock.time() + timeout
+        with self.condition:
+            while not self._healthy(names or list(self.probes), max_age):
+                remaining = deadline - clock.time()
+                if remaining <= 0:
+                    return False
+                clock.wait(self.condition, min(remaining, 5))
+            return True
+
+    def format(self) -> str:
+        lines = []
+        for name, result in sorted(self.snapshot().items()):
+            lines.append(f"{name:<8} {'OK' if result['ok'] else 'FAIL':<5} {result['age_s']:>6.1f} s ago  {result['detail']}")
+        return "\n".join(lines)
+
+
+def disk_space_check(path: str, min_free_gb: float = 5.0):
+    """Probe check: at least `min_free_gb` free where frames are written."""
+    def check():
+        existing = path  # the output directory may not have been created yet
+        while not os.path.exists(existing) and os.path.dirname(existing) != existing:
+            existing = os.path.dirname(existing)
+        free_gb = shutil.disk_usage(existing).free / 1e9
+        if free_gb < min_free_gb:
+            raise Exception(f"only {free_gb:.1f} GB free on {path}")
+        return f"{free_gb:.1f} GB free"
+    return check
@@ -0,0 +1,139 @@
+"""
+Shared logging setup for the observatory scripts.
+
+    from logging_setup import setup_logging
+    setup_logging('telescope_automation_log.txt', level=logging.DEBUG)
+
+Log calls only put the record on a queue (QueueHandler); a QueueListener
+thread formats it and does the file and console I/O, so the capture loop
+never waits on a disk or a terminal. The log file rotates by size (or on a
+TimedRotatingFileHandler schedule with `when`), and on rollover() at the
+end of a night. Rotated files are moved into logs/<night>/, and nights
+older than `keep_nights` are deleted.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+from datetime import date, timedelta
+
+import clock
+from sun_ephemeris import current_night
+
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+ARCHIVE_DIR = 'logs'
+
+_listener = None
+
+
+class NightArchive:
+    """Rotator for the file handlers: moves the rotated file into <archive_dir>/<night>/ and prunes old nights."""
+    def __init__(self, archive_dir: str = ARCHIVE_DIR, keep_nights: int = 30):
+        self.archive_dir = archive_dir
+        self.keep_nights = keep_nights
+
+    def __call__(self, source: str, dest: str):
+        night_dir = os.path.join(self.archive_dir, current_night().isoformat())
+        os.makedirs(night_dir, exist_ok=True)
+        if os.path.exists(source):
+            base = target = os.path.join(night_dir, f"{os.path.basename(source)}.{clock.now():%Y%m%d_%H%M%S}")
+            n = 1
+            while os.path.exists(target):
+                n += 1
+                target = f"{base}~{n}"
+            shutil.move(source, target)
+        self.prune()
+
+    def prune(self):
+        oldest = current_night() - timedelta(days=self.keep_nights)
+        for name in os.listdir(self.archive_dir):
+            try:
+                night = date.fromisoformat(name)
+            except ValueError:
+                continue  # not one of ours
+            if night < oldest:
+                shutil.rmtree(os.path.join(self.archive_dir, name), ignore_errors=True)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def start(self):
+        super().start()
+        clock.ignore(self._thread)  # it blocks on the queue, never on the clock
+
+
+def setup_logging(filename: str, level: int = logging.INFO, console: bool = False, console_level: int = logging.INFO,
+                  max_bytes: int = 10 * 2 ** 20, when: str = None, archive_dir: str = ARCHIVE_DIR,
+                  keep_nights: int = 30, fmt: str = LOG_FORMAT, datefmt: str = None):
+    """
+    Send the root logger through a queue to `filename` (and stdout with `console`).
+
+    Only the first call in a process configures anything; later calls
+    return the same listener.
+
+    Args:
+    filename (str): The live log file.
+    level (int): Root logger level.
+    console (bool): Also echo records at `console_level` and above to stdout.
+    max_bytes (int): Roll the file over at this size (ignored with `when`).
+    when (str): TimedRotatingFileHandler schedule instead, e.g. 'midnight'.
+    archive_dir (str), keep_nights (int): Where rotated files go, and for how long.
+
+    Returns:
+    QueueListener: already started; it is stopped (and the queue drained) at exit.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(filename, when=when, backupCount=1, delay=True)
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=1, delay=True)
+    file_handler.rotator = NightArchive(archive_dir, keep_nights)
+    formatter = logging.Formatter(fmt, datefmt)
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def rollover():
+    """Archive the current log file now, e.g. at the end of a night."""
+    if _listener is None:
+        return
+    _listener.stop()  # writes out whatever is still queued, so it lands in the archived file
+    try:
+        for handler in _listener.handlers:
+            if isinstance(handler, logging.handlers.BaseRotatingHandler):
+                handler.doRollover()
+    finally:
+        _listener.start()
+
+
+class Throttle:
+    """ready() is True at most once every `interval` seconds of clock time, e.g. for per-frame progress lines."""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_at = None
+
+    def ready(self) -> bool:
+        now = clock.monotonic()
+        if self.next_at is not None and now < self.next_at:
+            return False
+        self.next_at = now + self.interval
+        return True
@@ -0,0 +1,248 @@
+"""
+SQLite record of what was planned and what was observed.
+
+The planner adds every window it writes to tleplan.txt, and the observer
+adds a row per pass it attempts (frames, time to lock, outcome and the image
+directory). Both tables are indexed by NORAD ID and time, so "when did we
+last observe 25544" is an index lookup instead of a walk through OUTPUT_PATH:
+
+    python observation_db.py last 25544
+    python observation_db.py passes --night 2024-03-02
+    python observation_db.py planned --norad 25544
+
+Times are stored as Unix seconds and shown in Mountain time.
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import clock
+import tle_elements
+from sun_ephemeris import MOUNTAIN_TIME, current_night
+
+OBSERVATION_DB = 'observations.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS planned (
+    norad_id INTEGER NOT NULL,
+    name TEXT,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    planned_at REAL NOT NULL,
+    PRIMARY KEY (norad_id, start)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS planned_by_start ON planned (start);
+
+CREATE TABLE IF NOT EXISTS passes (
+    id INTEGER PRIMARY KEY,
+    norad_id INTEGER,
+    name TEXT,
+    planned_start REAL,
+    planned_end REAL,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    time_to_lock_s REAL,
+    outcome TEXT NOT NULL,
+    error TEXT,
+    image_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS passes_by_norad ON passes (norad_id, started);
+CREATE INDEX IF NOT EXISTS passes_by_started ON passes (started);
+"""
+
+_db = None
+
+
+def norad_id(line1: str) -> int:
+    """NORAD catalog number from TLE line 1, or None if it is not one."""
+    try:
+        return tle_elements.norad_id(line1)
+    except (TypeError, ValueError):
+        return None
+
+
+def epoch(value) -> float:
+    """Unix seconds from an aware datetime (or Unix seconds already)."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if value.tzinfo is None:
+        raise ValueError(f"Naive datetime {value}; say which time zone it is in")
+    return value.timestamp()
+
+
+def night_bounds(night: date) -> tuple:
+    """Unix seconds from local noon on `night` to local noon the next day, as current_night() counts nights."""
+    next_night = night + timedelta(days=1)
+    return (MOUNTAIN_TIME.localize(datetime(night.year, night.month, night.day, 12)).timestamp(),
+            MOUNTAIN_TIME.localize(datetime(next_night.year, next_night.month, next_night.day, 12)).timestamp())
+
+
+class ObservationDB:
+    """
+    One connection shared by the threads of a process; writes are serialized
+    with a lock. WAL mode lets the query CLI (or another process) read while
+    the planner or the observer writes.
+    """
+    def __init__(self, filename: str = OBSERVATION_DB):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(filename, timeout=10, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def record_planned(self, windows: list):
+        """
+        Add or update planned windows, as (norad_id, name, start, end) tuples
+        with aware datetimes. Replanning the same pass updates its row.
+        """
+        now = clock.time()
+        rows = [(int(norad), name, epoch(start), epoch(end), now) for norad, name, start, end in windows]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO planned (norad_id, name, start, end, planned_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (norad_id, start) DO UPDATE SET name = excluded.name, end = excluded.end, "
+                "planned_at = excluded.planned_at", rows)
+
+    def record_pass(self, norad_id: int, name: str, started: float, ended: float, frames: int, outcome: str,
+                    planned_start=None, planned_end=None, time_to_lock_s: float = None, error: str = None,
+                    image_dir: str = None) -> int:
+        """Add one attempted pass; returns its row id."""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO passes (norad_id, name, planned_start, planned_end, started, ended, frames, "
+                "time_to_lock_s, outcome, error, image_dir) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (norad_id, name, epoch(planned_start), epoch(planned_end), epoch(started), epoch(ended), frames,
+                 time_to_lock_s, outcome, error, image_dir))
+            return cursor.lastrowid
+
+    def _select(self, table: str, time_column: str, norad_id: int = None, since: float = None,
+                until: float = None, limit: int = None, newest_first: bool = True) -> list:
+        where, params = [], []
+        if norad_id is not None:
+            where.append("norad_id = ?")
+            params.append(norad_id)
+        if since is not None:
+            where.append(f"{time_column} >= ?")
+            params.append(since)
+        if until is not None:
+            where.append(f"{time_column} < ?")
+            params.append(until)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {time_column} {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def passes(self, norad_id: int = None, since: float = None, until: float = None, limit: int = None,
+               newest_first: bool = True) -> list:
+        """Attempted passes as dicts, newest first unless `newest_first` is False."""
+        return self._select('passes', 'started', norad_id, since, until, limit, newest_first)
+
+    def planned(self, norad_id: int = None, since: float = None, until: float = None, limit: int = None,
+                newest_first: bool = True) -> list:
+        """Planned windows as dicts, newest first unless `newest_first` is False."""
+        return self._select('planned', 'start', norad_id, since, until, limit, newest_first)
+
+    def last_pass(self, norad_id: int, observed_only: bool = True) -> dict:
+        """The most recent pass of `norad_id` (with frames, unless `observed_only` is False), or None."""
+        sql = "SELECT * FROM passes WHERE norad_id = ?" + (" AND frames > 0" if observed_only else "")
+        with self.lock:
+            row = self.conn.execute(sql + " ORDER BY started DESC LIMIT 1", (norad_id,)).fetchone()
+        return dict(row) if row else None
+
+    def totals(self, norad_id: int) -> dict:
+        """Passes attempted, passes with frames and total frames for `norad_id`."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS attempted, COALESCE(SUM(frames > 0), 0) AS observed, "
+                "COALESCE(SUM(frames), 0) AS frames FROM passes WHERE norad_id = ?", (norad_id,)).fetchone()
+        return dict(row)
+
+
+def get_db() -> ObservationDB:
+    """The shared database, opened the first time it is needed."""
+    global _db
+    if _db is None:
+        _db = ObservationDB()
+    return _db
+
+
+def parse_night(value: str) -> date:
+    return current_night() if value == 'tonight' else date.fromisoformat(value)
+
+
+def local(seconds: float) -> str:
+    if seconds is None:
+        return '-'
+    return datetime.fromtimestamp(seconds, MOUNTAIN_TIME).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_passes(rows: list) -> str:
+    lines = [f"{'NORAD':>6} {'name':<20} {'started':<19} {'min':>5} {'frames':>7} {'lock s':>7} {'outcome':<9}  image dir"]
+    for row in rows:
+        lock = '-' if row['time_to_lock_s'] is None else f"{row['time_to_lock_s']:.1f}"
+        lines.append(f"{row['norad_id'] or '-':>6} {(row['name'] or '')[:20]:<20} {local(row['started']):<19} "
+                     f"{(row['ended'] - row['started']) / 60:>5.1f} {row['frames']:>7} {lock:>7} "
+                     f"{row['outcome']:<9}  {row['image_dir'] or row['error'] or ''}")
+    return "\n".join(lines)
+
+
+def format_planned(rows: list) -> str:
+    lines = [f"{'NORAD':>6} {'name':<20} {'start':<19} {'end':<19} {'planned at':<19}"]
+    for row in rows:
+        lines.append(f"{row['norad_id']:>6} {(row['name'] or '')[:20]:<20} {local(row['start']):<19} "
+                     f"{local(row['end']):<19} {local(row['planned_at']):<19}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the observation database.')
+    parser.add_argument('--db', default=OBSERVATION_DB, help=f'Database file (default: {OBSERVATION_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    last = commands.add_parser('last', help='Last observed pass of a satellite, with its totals')
+    last.add_argument('norad_id', type=int)
+    for name, help_text in (('passes', 'Attempted passes'), ('planned', 'Planned windows')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--norad', type=int, help='Only this NORAD ID')
+        command.add_argument('--night', type=parse_night, help="Only this night: YYYY-MM-DD of the evening, or 'tonight'")
+        command.add_argument('--limit', type=int, default=50, help='At most this many rows (0 for all)')
+    args = parser.parse_args(argv)
+
+    db = ObservationDB(args.db)
+    started = time.perf_counter()
+    if args.command == 'last':
+        row = db.last_pass(args.norad_id)
+        totals = db.totals(args.norad_id)
+        elapsed = time.perf_counter() - started
+        if row is None:
+            print(f"No observed passes of {args.norad_id} ({totals['attempted']} attempted)")
+        else:
+            print(format_passes([row]))
+            print(f"{totals['observed']} of {totals['attempted']} passes observed, {totals['frames']} frames in all")
+        count = 1
+    else:
+        since, until = night_bounds(args.night) if args.night else (None, None)
+        query = db.passes if args.command == 'passes' else db.planned
+        rows = query(args.norad, since, until, args.limit, newest_first=not args.night)
+        elapsed = time.perf_counter() - started
+        print(format_passes(rows) if args.command == 'passes' else format_planned(rows))
+        count = len(rows)
+    print(f"({count} rows in {elapsed * 1000:.1f} ms)", file=sys.stderr)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
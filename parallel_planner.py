@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pass_finder import _find_passes_chunk, _time_grid, night_windows
+from sun_ephemeris import current_night
+from tle_elements import TleError, tle_lines
+
+# Satellites per shard. Small enough that a 10-night plan for a few hundred
+# targets spreads evenly over the pool, large enough to keep SGP4 vectorized.
+SHARD_SIZE = 64
+
+
+def tle_entries(tle_data_by_id: dict) -> list:
+    """Turn N2YO /tle responses into (sat_id, name, line1, line2) entries, skipping failures."""
+    entries = []
+    for sat_id, tle_data in tle_data_by_id.items():
+        if not tle_data:
+            continue
+        try:
+            line1, line2 = tle_lines(tle_data["tle"])
+        except TleError:
+            continue
+        entries.append((sat_id, tle_data['info']['satname'], line1, line2))
+    return entries
+
+
+def _plan_shard(entries: list, window: tuple, min_elevation: float, min_duration_s: float, step_s: float) -> list:
+    """Worker: passes of one satellite shard during one night."""
+    grid = _time_grid(window[0], window[1], step_s)
+    passes = _find_passes_chunk([(name, line1, line2) for _, name, line1, line2 in entries], [grid],
+                                min_elevation, min_duration_s)
+    sat_ids = {line1[2:7].strip(): sat_id for sat_id, _, line1, _ in entries}
+    return [(sat_ids[p['norad_id']], p) for p in passes]
+
+
+def compute_night_passes(entries: list, days: int, start_date: date = None, workers: int = None,
+                         min_elevation: float = 10.0, min_duration_s: float = 300.0, step_s: float = 30.0,
+                         shard_size: int = SHARD_SIZE) -> list:
+    """
+    Compute visible passes for every night, sharded by satellite and by night.
+
+    Each (night, satellite shard) pair is one task on a ProcessPoolExecutor.
+    Results are regrouped per night and sorted by (start, sat_id), so the
+    output does not depend on worker count or completion order.
+
+    Returns:
+    list (one element per night, earliest first) of lists of
+    (sat_id, visual_pass) tuples, where visual_pass carries N2YO-style
+    'startUTC'/'endUTC' timestamps alongside the pass details.
+    """
+    if start_date is None:
+        start_date = current_night()
+    windows = night_windows(start_date, days)
+    shards = [entries[i:i + shard_size] for i in range(0, len(entries), shard_size)]
+    tasks = [(night, shard) for night in range(len(windows)) for shard in shards]
+
+    nights = [[] for _ in windows]
+    if workers == 1 or len(tasks) <= 1:
+        for night, shard in tasks:
+            nights[night].extend(_plan_shard(shard, windows[night], min_elevation, min_duration_s, step_s))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = [(night, executor.submit(_plan_shard, shard, windows[night], min_elevation, min_duration_s, step_s))
+                       for night, shard in tasks]
+            for night, future in futures:
+                nights[night].extend(future.result())
+
+    for night_passes in nights:
+        for _, p in night_passes:
+            p['startUTC'] = int(p['start'].timestamp())
+            p['endUTC'] = int(p['end'].timestamp())
+        night_passes.sort(key=lambda item: (item[1]['startUTC'], item[0]))
+    return nights
@@ -0,0 +1,294 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+from sun_ephemeris import julian_day, solar_coordinates, solar_events
+
+# Coordinates for Cloudcroft, New Mexico (the site used for N2YO pass queries)
+OBSERVER_LAT = 32.903
+OBSERVER_LNG = -105.5295
+OBSERVER_ALT = 2225  # metres
+
+EARTH_RADIUS_KM = 6378.135  # WGS72, matching SGP4
+MU_KM3_S2 = 398600.8
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+
+# Anything with a perigee this low has decayed or is about to.
+MIN_PERIGEE_ALT_KM = 90.0
+
+
+def read_tle_catalog(text: str) -> list:
+    """
+    Parse a 2-line or 3-line TLE catalog into (name, line1, line2) tuples.
+
+    Name lines may be bare or use the '0 NAME' form; entries without a name
+    are named after their catalog number.
+    """
+    catalog = []
+    name = None
+    line1 = None
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line:
+            continue
+        if line.startswith('1 ') and len(line) >= 69:
+            line1 = line
+        elif line.startswith('2 ') and len(line) >= 69 and line1 is not None:
+            catalog.append((name or line1[2:7].strip(), line1, line))
+            name = line1 = None
+        else:
+            name = line[2:].strip() if line.startswith('0 ') else line.strip()
+    return catalog
+
+
+def orbit_elements(catalog: list) -> dict:
+    """
+    Pull the fields needed for pruning out of line 2 of every entry.
+
+    Returns:
+    dict of NumPy arrays: inclination (deg), eccentricity, mean_motion
+    (rev/day), period (min), perigee_km and apogee_km (radii from geocentre).
+    """
+    inclination = np.array([float(line2[8:16]) for _, _, line2 in catalog])
+    eccentricity = np.array([float('0.' + line2[26:33].strip()) for _, _, line2 in catalog])
+    mean_motion = np.array([float(line2[52:63]) for _, _, line2 in catalog])
+
+    mean_motion_rad_s = mean_motion * 2 * math.pi / 86400.0
+    with np.errstate(divide='ignore'):
+        semi_major_axis = np.cbrt(MU_KM3_S2 / mean_motion_rad_s ** 2)
+    return {
+        'inclination': inclination,
+        'eccentricity': eccentricity,
+        'mean_motion': mean_motion,
+        'period': 1440.0 / mean_motion,
+        'perigee_km': semi_major_axis * (1 - eccentricity),
+        'apogee_km': semi_major_axis * (1 + eccentricity),
+    }
+
+
+def prefilter_catalog(catalog: list, lat: float = OBSERVER_LAT, min_elevation: float = 10.0,
+                      max_period: float = None) -> tuple:
+    """
+    Drop objects that can never rise above `min_elevation` at latitude `lat`.
+
+    An orbit's ground track never goes poleward of its inclination (or 180
+    minus it for retrograde orbits). From apogee radius r the satellite is
+    above elevation e out to an Earth central angle of acos(R cos e / r) - e,
+    so the site must lie within that reach of the ground-track limit.
+    Decayed objects are pruned as well, and objects with a period of
+    `max_period` minutes or more if one is given. Long-period objects (GNSS,
+    Molniya and GEO) do rise over the site, so none are cut by default.
+
+    Returns:
+    tuple: (survivors, stats) where stats counts the objects pruned per reason.
+    """
+    if not catalog:
+        return [], {'total': 0, 'decayed': 0, 'long_period': 0, 'latitude': 0, 'survivors': 0}
+
+    elements = orbit_elements(catalog)
+    el_rad = math.radians(min_elevation)
+
+    decayed = elements['perigee_km'] < EARTH_RADIUS_KM + MIN_PERIGEE_ALT_KM
+    long_period = elements['period'] >= (np.inf if max_period is None else max_period)
+
+    max_ground_lat = np.where(elements['inclination'] <= 90, elements['inclination'], 180 - elements['inclination'])
+    cos_arg = np.clip(EARTH_RADIUS_KM * math.cos(el_rad) / elements['apogee_km'], -1.0, 1.0)
+    reach = np.degrees(np.arccos(cos_arg) - el_rad)
+    out_of_reach = abs(lat) > max_ground_lat + reach
+
+    keep = ~(decayed | long_period | out_of_reach)
+    stats = {
+        'total': len(catalog),
+        'decayed': int(decayed.sum()),
+        'long_period': int((long_period & ~decayed).sum()),
+        'latitude': int((out_of_reach & ~decayed & ~long_period).sum()),
+        'survivors': int(keep.sum()),
+    }
+    survivors = [entry for entry, k in zip(catalog, keep) if k]
+    return survivors, stats
+
+
+def night_windows(start_date: date, days: int, twilight: str = 'civil') -> list:
+    """Dark intervals (dusk, dawn) as aware UTC datetimes for each local night."""
+    windows = []
+    for offset in range(days):
+        night = start_date + timedelta(days=offset)
+        dusk = solar_events(night)[f'{twilight}_dusk']
+        dawn = solar_events(night + timedelta(days=1))[f'{twilight}_dawn']
+        if dusk is None or dawn is None:
+            continue
+        windows.append((dusk.astimezone(timezone.utc), dawn.astimezone(timezone.utc)))
+    return windows
+
+
+def _time_grid(start_utc: datetime, end_utc: datetime, step_s: float, sun_vector: np.ndarray = None) -> dict:
+    """
+    Sample times plus the Earth-rotation and Sun geometry SGP4 output needs.
+
+    A fixed `sun_vector` may be supplied for short grids; the Sun moves well
+    under a tenth of a degree in the span of one coarse step.
+    """
+    offsets = np.arange(0.0, (end_utc - start_utc).total_seconds() + step_s, step_s)
+    jd0 = julian_day(start_utc)
+    jd_full = jd0 + offsets / 86400.0
+    jd = np.floor(jd_full)
+    fr = jd_full - jd
+
+    # Greenwich mean sidereal time, IAU 1982 (what TEME is referenced to).
+    t = (jd_full - 2451545.0) / 36525.0
+    gmst = np.radians((280.46061837 + 360.98564736629 * (jd_full - 2451545.0)
+                       + t * t * (0.000387933 - t / 38710000.0)) % 360)
+
+    if sun_vector is not None:
+        sun = np.broadcast_to(sun_vector, (len(offsets), 3))
+    else:
+        sun = np.empty((len(offsets), 3))
+        for i, jd_i in enumerate(jd_full):
+            declination, right_ascension, _ = solar_coordinates(jd_i)
+            dec_r, ra_r = math.radians(declination), math.radians(right_ascension)
+            sun[i] = (math.cos(dec_r) * math.cos(ra_r), math.cos(dec_r) * math.sin(ra_r), math.sin(dec_r))
+
+    return {'start': start_utc, 'offsets': offsets, 'jd': jd, 'fr': fr, 'gmst': gmst, 'sun': sun}
+
+
+def _site_ecef(lat: float, lng: float, alt_m: float) -> np.ndarray:
+    lat_r, lng_r = math.radians(lat), math.radians(lng)
+    e2 = WGS84_F * (2 - WGS84_F)
+    n = WGS84_A_KM / math.sqrt(1 - e2 * math.sin(lat_r) ** 2)
+    alt_km = alt_m / 1000.0
+    return np.array([(n + alt_km) * math.cos(lat_r) * math.cos(lng_r),
+                     (n + alt_km) * math.cos(lat_r) * math.sin(lng_r),
+                     (n * (1 - e2) + alt_km) * math.sin(lat_r)])
+
+
+def look_angles(sat_array: SatrecArray, grid: dict, lat: float = OBSERVER_LAT,
+                lng: float = OBSERVER_LNG, alt_m: float = OBSERVER_ALT) -> tuple:
+    """
+    Propagate every satellite in `sat_array` over the time grid at once.
+
+    Returns:
+    tuple of (n_sats, n_times) arrays: (elevation_degs, azimuth_degs, sunlit)
+    where sunlit is False while the satellite is in Earth's (cylindrical)
+    shadow or SGP4 reported an error.
+    """
+    errors, position, _ = sat_array.sgp4(grid['jd'], grid['fr'])
+
+    cos_g, sin_g = np.cos(grid['gmst']), np.sin(grid['gmst'])
+    x = cos_g * position[..., 0] + sin_g * position[..., 1]
+    y = -sin_g * position[..., 0] + cos_g * position[..., 1]
+    z = position[..., 2]
+
+    site = _site_ecef(lat, lng, alt_m)
+    rx, ry, rz = x - site[0], y - site[1], z - site[2]
+    lat_r, lng_r = math.radians(lat), math.radians(lng)
+    sin_lat, cos_lat = math.sin(lat_r), math.cos(lat_r)
+    sin_lng, cos_lng = math.sin(lng_r), math.cos(lng_r)
+    east = -sin_lng * rx + cos_lng * ry
+    north = -sin_lat * cos_lng * rx - sin_lat * sin_lng * ry + cos_lat * rz
+    up = cos_lat * cos_lng * rx + cos_lat * sin_lng * ry + sin_lat * rz
+
+    elevation = np.degrees(np.arctan2(up, np.hypot(east, north)))
+    azimuth = np.degrees(np.arctan2(east, north)) % 360
+
+    sun_projection = np.einsum('stk,tk->st', position, grid['sun'])
+    perpendicular_sq = np.einsum('stk,stk->st', position, position) - sun_projection ** 2
+    sunlit = ((sun_projection > 0) | (perpendicular_sq > EARTH_RADIUS_KM ** 2)) & (errors == 0)
+
+    return elevation, azimuth, sunlit
+
+
+def _runs(mask: np.ndarray) -> list:
+    """(first, last) index pairs of every run of True values in a 1-D mask."""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[0::2], edges[1::2] - 1))
+
+
+def _refine_edge(satrec: Satrec, grid: dict, inside: int, outside: int, min_elevation: float) -> datetime:
+    """Narrow a visibility boundary between two coarse samples to 1 s."""
+    lo, hi = sorted((grid['offsets'][inside], grid['offsets'][outside]))
+    fine = _time_grid(grid['start'] + timedelta(seconds=float(lo)), grid['start'] + timedelta(seconds=float(hi)), 1.0,
+                      sun_vector=grid['sun'][inside])
+    elevation, _, sunlit = look_angles(SatrecArray([satrec]), fine)
+    visible = (elevation[0] >= min_elevation) & sunlit[0]
+    hits = np.flatnonzero(visible)
+    if len(hits) == 0:
+        index = 0 if inside < outside else len(fine['offsets']) - 1
+    else:
+        index = hits[0] if outside < inside else hits[-1]
+    return fine['start'] + timedelta(seconds=float(fine['offsets'][index]))
+
+
+def _find_passes_chunk(entries: list, grids: list, min_elevation: float, min_duration_s: float) -> list:
+    """Worker: vectorized pass search for one chunk of the catalog."""
+    satrecs = [Satrec.twoline2rv(line1, line2) for _, line1, line2 in entries]
+    sat_array = SatrecArray(satrecs)
+    passes = []
+    for grid in grids:
+        elevation, azimuth, sunlit = look_angles(sat_array, grid)
+        visible = (elevation >= min_elevation) & sunlit
+        last = len(grid['offsets']) - 1
+        for row in np.flatnonzero(visible.any(axis=1)):
+            name, line1, line2 = entries[row]
+            for first, final in _runs(visible[row]):
+                start = grid['start'] + timedelta(seconds=float(grid['offsets'][first]))
+                end = grid['start'] + timedelta(seconds=float(grid['offsets'][final]))
+                if first > 0:
+                    start = _refine_edge(satrecs[row], grid, first, first - 1, min_elevation)
+                if final < last:
+                    end = _refine_edge(satrecs[row], grid, final, final + 1, min_elevation)
+                if (end - start).total_seconds() < min_duration_s:
+                    continue
+                peak = first + int(np.argmax(elevation[row, first:final + 1]))
+                passes.append({
+                    'norad_id': line1[2:7].strip(),
+                    'name': name,
+                    'line1': line1,
+                    'line2': line2,
+                    'start': start,
+                    'end': end,
+                    'max_elevation': float(elevation[row, peak]),
+                    'max_elevation_time': grid['start'] + timedelta(seconds=float(grid['offsets'][peak])),
+                    'start_azimuth': float(azimuth[row, first]),
+                    'end_azimuth': float(azimuth[row, final]),
+                })
+    return passes
+
+
+def find_passes(catalog: list, windows: list, min_elevation: float = 10.0, step_s: float = 30.0,
+                min_duration_s: float = 0.0, workers: int = None, chunk_size: int = 256) -> list:
+    """
+    Find every visible pass of the catalog inside the given dark windows.
+
+    A pass is visible while the satellite is at or above `min_elevation`,
+    sunlit, and the site is inside one of `windows` (dusk, dawn) pairs.
+    The catalog is split into chunks of `chunk_size` objects; each chunk is
+    propagated as one SatrecArray and chunks are spread across a process
+    pool of `workers` processes (workers=1 runs in-process).
+
+    Returns:
+    list of pass dicts sorted by start time.
+    """
+    grids = [_time_grid(start, end, step_s) for start, end in windows]
+    chunks = [catalog[i:i + chunk_size] for i in range(0, len(catalog), chunk_size)]
+    search = partial(_find_passes_chunk, grids=grids, min_elevation=min_elevation, min_duration_s=min_duration_s)
+
+    passes = []
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            passes.extend(search(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_passes in executor.map(search, chunks):
+                passes.extend(chunk_passes)
+
+    passes.sort(key=lambda p: (p['start'], p['norad_id']))
+    return passes
+
+
+def rank_passes(passes: list) -> list:
+    """Order passes best-first: highest culmination, then longest, then earliest."""
+    return sorted(passes, key=lambda p: (-p['max_elevation'], -(p['end'] - p['start']).total_seconds(), p['start']))
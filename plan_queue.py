@@ -0,0 +1,225 @@
+import heapq
+import logging
+import threading
+
+import clock
+
+
+def entry_key(entry):
+    """Identity of a plan entry: its begin time and NAME field."""
+    return (entry.begin_time_local, entry.name)
+
+
+def entry_norad_id(entry) -> str:
+    """Catalog number from the entry's TLE line 1 (entry.tle2; tle1 is the '0 name' line)."""
+    return entry.tle2[2:7].strip()
+
+
+class PlanItem:
+    """
+    A queued plan entry.
+
+    `version` goes up whenever the entry's elements are replaced, so anything
+    derived from them (dome track) can be recomputed. `state` is pending,
+    claimed (slewing or observing; no longer changed by the queue),
+    cancelled, preempted or missed.
+    """
+    __slots__ = ('entry', 'priority', 'version', 'state')
+
+    def __init__(self, entry, priority: int = 0):
+        self.entry = entry
+        self.priority = priority
+        self.version = 0
+        self.state = 'pending'
+
+
+class PlanQueue:
+    """
+    Time-ordered queue of plan entries that can change while the observer runs.
+
+    Entries come out in begin-time order (higher priority first on ties).
+    Other threads may insert, cancel and update elements of pending entries
+    at any time; an entry leaves the queue's control once the observer claims
+    it to slew. A higher-priority entry that overlaps a due one preempts it.
+    """
+    def __init__(self, entries=(), clock=clock.now):
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.heap = []  # (begin, -priority, seq, item); stale items are skipped lazily
+        self.items = {}  # key -> PlanItem (pending or claimed)
+        self.finished = set()  # keys already observed; a reloaded plan does not queue them again
+        self.seq = 0
+        self.changes = 0
+        self.closed = False
+        for entry in entries:
+            self.insert(entry)
+
+    def _changed(self):
+        self.changes += 1
+        self.condition.notify_all()
+
+    def insert(self, entry, priority: int = 0) -> bool:
+        """Queue an entry; False if one with the same begin time and name is already queued."""
+        with self.condition:
+            key = entry_key(entry)
+            if key in self.items or key in self.finished:
+                return False
+            item = PlanItem(entry, priority)
+            self.items[key] = item
+            heapq.heappush(self.heap, (entry.begin_time_local, -priority, self.seq, item))
+            self.seq += 1
+            self._changed()
+            return True
+
+    def cancel(self, key, state: str = 'cancelled') -> bool:
+        """Drop a pending entry by key; claimed entries are left alone."""
+        with self.condition:
+            item = self.items.get(key)
+            if item is None or item.state != 'pending':
+                return False
+            item.state = state
+            del self.items[key]
+            self._changed()
+            return True
+
+    def update_tle(self, norad_id: str, line1: str, line2: str, name_line: str = None) -> int:
+        """
+        Replace the elements of every pending entry for `norad_id`.
+
+        Returns:
+        int: number of entries updated.
+        """
+        updated = 0
+        with self.condition:
+            for item in self.items.values():
+                if item.state != 'pending' or entry_norad_id(item.entry) != str(norad_id):
+                    continue
+                if (item.entry.tle2, item.entry.tle3) == (line1, line2):
+                    continue
+                if name_line:
+                    item.entry.tle1 = name_line
+                item.entry.tle2, item.entry.tle3 = line1, line2
+                item.version += 1
+                updated += 1
+            if updated:
+                self._changed()
+        return updated
+
+    def sync(self, entries) -> dict:
+        """
+        Make the pending entries match a freshly read plan: insert new ones,
+        cancel ones no longer planned and take over changed elements.
+        Claimed entries are not touched.
+        """
+        counts = {'inserted': 0, 'cancelled': 0, 'updated': 0}
+        with self.condition:
+            incoming = {entry_key(entry): entry for entry in entries}
+            for key, item in list(self.items.items()):
+                if item.state == 'pending' and key not in incoming:
+                    counts['cancelled'] += self.cancel(key)
+            for key, entry in incoming.items():
+                item = self.items.get(key)
+                if item is None:
+                    if entry.end_time_local > self.clock():
+                        counts['inserted'] += self.insert(entry)
+                elif item.state == 'pending' and (item.entry.tle2, item.entry.tle3) != (entry.tle2, entry.tle3):
+                    counts['updated'] += self.update_tle(entry_norad_id(item.entry), entry.tle2, entry.tle3, entry.tle1)
+        return counts
+
+    def close(self, cancel_pending: bool = False):
+        """No more inserts are expected: peek() returns None once the queue drains."""
+        with self.condition:
+            self.closed = True
+            if cancel_pending:
+                for key, item in list(self.items.items()):
+                    if item.state == 'pending':
+                        self.cancel(key)
+            self._changed()
+
+    def observing(self) -> bool:
+        """True while a claimed entry is being observed."""
+        with self.condition:
+            return any(item.state == 'claimed' for item in self.items.values())
+
+    def pending(self) -> list:
+        with self.condition:
+            return sorted((item for item in self.items.values() if item.state == 'pending'),
+                          key=lambda item: (item.entry.begin_time_local, -item.priority))
+
+    def _top(self):
+        """Earliest live pending item, discarding stale heap slots and missed entries."""
+        now = self.clock()
+        while self.heap:
+            item = self.heap[0][3]
+            key = entry_key(item.entry)
+            if item.state != 'pending' or self.items.get(key) is not item:
+                heapq.heappop(self.heap)
+            elif item.entry.end_time_local <= now:
+                heapq.heappop(self.heap)
+                item.state = 'missed'
+                del self.items[key]
+                logging.warning(f"Plan entry {item.entry.name} at {item.entry.begin_time_local} was missed")
+            else:
+                return item
+        return None
+
+    def seconds_until_next(self):
+        """Seconds until the next pending entry begins, or None if nothing is pending."""
+        with self.condition:
+            item = self._top()
+            if item is None:
+                return None
+            return (item.entry.begin_time_local - self.clock()).total_seconds()
+
+    def peek(self, timeout: float = None):
+        """
+        The next pending PlanItem, waiting while the queue is empty.
+
+        Returns None once the queue is closed and empty, or on timeout.
+        """
+        with self.condition:
+            while True:
+                item = self._top()
+                if item is not None or self.closed:
+                    return item
+                if not clock.wait(self.condition, timeout) and timeout is not None:
+                    return None
+
+    def claim_when_due(self, item: PlanItem) -> bool:
+        """
+        Wait until `item` begins and claim it for observing.
+
+        Returns False as soon as anything about the queue changes (an earlier
+        insert, a cancellation, new elements, a preemption) so the caller can
+        peek() again and re-prepare; True once the item is claimed.
+        """
+        with self.condition:
+            changes = self.changes
+            while True:
+                if self._top() is not item or self.changes != changes:
+                    return False
+                wait = (item.entry.begin_time_local - self.clock()).total_seconds()
+                if wait <= 0:
+                    break
+                clock.wait(self.condition, wait)
+
+            preemptor = next((other for other in self.items.values()
+                              if other is not item and other.state == 'pending' and other.priority > item.priority
+                              and other.entry.begin_time_local < item.entry.end_time_local), None)
+            if preemptor is not None:
+                logging.info(f"Plan entry {item.entry.name} preempted by {preemptor.entry.name}")
+                self.cancel(entry_key(item.entry), state='preempted')
+                return False
+
+            heapq.heappop(self.heap)
+            item.state = 'claimed'
+            return True
+
+    def done(self, item: PlanItem):
+        """Forget a claimed item once it has been observed."""
+        with self.condition:
+            key = entry_key(item.entry)
+            if self.items.get(key) is item:
+                del self.items[key]
+            self.finished.add(key)
+            item.state = 'done'
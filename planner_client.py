@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+import requests
+
+PLANNER_URL = os.getenv("PLANNER_URL", "http://127.0.0.1:8230")
+
+
+class PlannerError(Exception):
+    """The planner service answered, but planning failed."""
+
+
+class PlannerUnavailable(PlannerError):
+    """Nothing is listening at PLANNER_URL."""
+
+
+def _request(method: str, path: str, timeout: float, **kwargs) -> dict:
+    try:
+        response = requests.request(method, PLANNER_URL + path, timeout=timeout, **kwargs)
+    except requests.ConnectionError as e:
+        raise PlannerUnavailable(f"Planner service not reachable at {PLANNER_URL}: {e}")
+    except requests.Timeout as e:
+        # A status query that hangs means no usable service; a /plan that runs
+        # past its timeout may still be writing tleplan.txt, so it is not retried elsewhere
+        if method == 'GET':
+            raise PlannerUnavailable(f"Planner service at {PLANNER_URL} did not answer: {e}")
+        raise PlannerError(f"Planner request timed out: {e}")
+    except requests.RequestException as e:
+        raise PlannerError(f"Planner request failed: {e}")
+    try:
+        data = response.json()
+    except ValueError:
+        data = {}
+    if response.status_code != 200:
+        raise PlannerError(data.get('error', f"HTTP {response.status_code}"))
+    return data
+
+
+def request_plan(days: int = 1, observation_window=2, norad_ids: list = None, workers: int = None,
+                 rolling: bool = False, timeout: float = 900) -> dict:
+    """Ask the planner service to regenerate tleplan.txt and wait for the result."""
+    body = {'days': days, 'observation_window': observation_window, 'rolling': rolling}
+    if norad_ids:
+        body['norad_ids'] = norad_ids
+    if workers:
+        body['workers'] = workers
+    return _request('POST', '/plan', timeout, json=body)
+
+
+def planner_status(timeout: float = 2) -> dict:
+    return _request('GET', '/status', timeout)
+
+
+def next_pass(timeout: float = 2) -> dict:
+    """Next pass in the current plan, or {'status': 'none'}."""
+    return _request('GET', '/next-pass', timeout)
+
+
+def is_planner_running() -> bool:
+    try:
+        planner_status()
+        return True
+    except PlannerError:
+        return False
+
+
+def ensure_planner_daemon(wait_seconds: float = 30) -> bool:
+    """Start planner_daemon.py in the background unless it is already running."""
+    if is_planner_running():
+        return True
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'planner_daemon.py')
+    subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script),
+                     creationflags=getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
+    deadline = time.time() + wait_seconds
+    while time.time() < deadline:
+        time.sleep(0.5)
+        if is_planner_running():
+            return True
+    return False
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+import aiohttp
+from aiohttp import web
+import clock
+from api_interaction import RollingPlan, get_cache, plan, plan_rolling, read_norad_ids, read_tle_plan
+from logging_setup import setup_logging
+
+PLANNER_HOST = '127.0.0.1'
+PLANNER_PORT = 8230
+TLE_PLAN_FILENAME = "tleplan.txt"
+
+
+class NotifyingRollingPlan(RollingPlan):
+    """RollingPlan that lets the service know as soon as tonight is committed."""
+    def __init__(self, filename: str, service):
+        super().__init__(filename)
+        self.service = service
+        self.first_commit = asyncio.Event()
+
+    def commit(self, night_date, filtered_observation_times: list):
+        super().commit(night_date, filtered_observation_times)
+        self.service.last_plan['entries'] = sum(len(entries) for entries in self.nights.values())
+        self.service.last_plan['committed_nights'] = [str(night) for night in sorted(self.nights)]
+        self.first_commit.set()
+
+
+class PlannerService:
+    """
+    Long-lived planner: one aiohttp session, the in-memory TLE cache and the
+    imported planning code stay warm between requests.
+    """
+    def __init__(self, plan_filename: str = TLE_PLAN_FILENAME):
+        self.plan_filename = plan_filename
+        self.session = None
+        self.lock = asyncio.Lock()
+        self.started = time.time()
+        self.state = 'idle'
+        self.last_plan = {}
+        self.rolling_task = None
+
+    async def on_startup(self, app):
+        self.session = aiohttp.ClientSession()
+        logging.info("Planner service started.")
+
+    async def on_cleanup(self, app):
+        await self.cancel_rolling()
+        await self.session.close()
+        logging.info("Planner service stopped.")
+
+    async def cancel_rolling(self):
+        if self.rolling_task and not self.rolling_task.done():
+            self.rolling_task.cancel()
+            try:
+                await self.rolling_task
+            except asyncio.CancelledError:
+                pass
+        self.rolling_task = None
+
+    async def handle_plan(self, request):
+        # Bad input is a 400 and an unreadable NoradId.txt a 500, both as JSON like every other failure
+        try:
+            body = await request.json() if request.can_read_body else {}
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            days_ahead = min(max(int(body.get('days', 1)), 1), 10)
+            observation_window = body.get('observation_window', 2)
+            if observation_window != 'full':
+                observation_window = int(observation_window)
+            workers = int(body['workers']) if body.get('workers') else None
+            rolling = bool(body.get('rolling', False))
+            refine_hours = float(body.get('refine_hours', 0))
+            refresh_minutes = float(body.get('refresh_minutes', 60))
+            norad_ids = body.get('norad_ids')
+            if norad_ids is not None and not isinstance(norad_ids, list):
+                raise ValueError("norad_ids must be a list")
+        except (ValueError, TypeError) as e:
+            logging.warning(f"Rejected plan request: {e}")
+            return web.json_response({'status': 'error', 'error': f"Bad request: {e}"}, status=400)
+        if not norad_ids:
+            try:
+                norad_ids = read_norad_ids()
+            except OSError as e:
+                logging.exception("Could not read the NORAD ID list")
+                return web.json_response({'status': 'error', 'error': f"No NORAD IDs given and the NORAD ID list could not be read: {e}"}, status=500)
+            if not norad_ids:
+                return web.json_response({'status': 'error', 'error': "No NORAD IDs given and NoradId.txt is empty"},
+                                         status=400)
+
+        async with self.lock:
+            await self.cancel_rolling()
+            self.state = 'planning'
+            started = time.perf_counter()
+            self.last_plan = {'requested_at': datetime.now(timezone.utc).isoformat(), 'norad_ids': len(norad_ids),
+                              'days': days_ahead, 'observation_window': observation_window, 'rolling': rolling}
+            try:
+                if rolling:
+                    await self.start_rolling(norad_ids, days_ahead, observation_window, workers, refine_hours,
+                                             refresh_minutes)
+                else:
+                    entries = await plan(norad_ids, days_ahead, observation_window, workers,
+                                         session=self.session, filename=self.plan_filename)
+                    self.last_plan['entries'] = len(entries)
+            except Exception as e:
+                logging.exception("Planning failed")
+                self.state = 'error'
+                self.last_plan['error'] = str(e)
+                return web.json_response({'status': 'error', 'error': str(e)}, status=500)
+
+            self.last_plan['elapsed_s'] = round(time.perf_counter() - started, 3)
+            self.state = 'refining' if self.rolling_task else 'idle'
+            logging.info(f"Plan written: {self.last_plan}")
+            return web.json_response({'status': 'ok', **self.last_plan})
+
+    async def start_rolling(self, norad_ids, days_ahead, observation_window, workers, refine_hours, refresh_minutes):
+        """Start rolling-horizon planning and return once tonight is committed."""
+        rolling_plan = NotifyingRollingPlan(self.plan_filename, self)
+        self.rolling_task = asyncio.create_task(plan_rolling(
+            norad_ids, days_ahead, observation_window, workers,
+            refine_hours=refine_hours, refresh_minutes=refresh_minutes,
+            rolling_plan=rolling_plan, session=self.session))
+        self.rolling_task.add_done_callback(self._rolling_done)
+        first_commit = asyncio.create_task(rolling_plan.first_commit.wait())
+        await asyncio.wait([first_commit, self.rolling_task], return_when=asyncio.FIRST_COMPLETED)
+        first_commit.cancel()
+        if self.rolling_task.done() and not rolling_plan.first_commit.is_set():
+            self.rolling_task.result()  # re-raise the planning error
+
+    def _rolling_done(self, task):
+        if self.state == 'refining':
+            self.state = 'idle'
+        if not task.cancelled() and task.exception():
+            logging.error(f"Rolling planner stopped: {task.exception()}")
+
+    async def handle_status(self, request):
+        return web.json_response({
+            'state': self.state,
+            'uptime_s': round(time.time() - self.started, 1),
+            'cached_tles': len(get_cache().cache),
+            'last_plan': self.last_plan,
+        })
+
+    async def handle_next_pass(self, request):
+        # The observer's reader, compared with local time as the observer does, so both agree on the next pass
+        try:
+            entries = read_tle_plan(self.plan_filename).entries
+        except FileNotFoundError:
+            entries = []
+        except Exception as e:
+            logging.exception("Could not read the plan")
+            return web.json_response({'status': 'error', 'error': str(e)}, status=500)
+        now = clock.now()
+        for entry in entries:
+            if entry.end_time_local > now:
+                return web.json_response({
+                    'status': 'ok',
+                    'name': entry.name,
+                    'begin_local': entry.begin_time_local.strftime('%Y-%m-%d %H:%M:%S'),
+                    'end_local': entry.end_time_local.strftime('%Y-%m-%d %H:%M:%S'),
+                    'seconds_until_begin': round((entry.begin_time_local - now).total_seconds(), 1),
+                    'tle': [entry.tle1, entry.tle2, entry.tle3],
+                })
+        return web.json_response({'status': 'none'})
+
+
+def make_app(service: PlannerService) -> web.Application:
+    app = web.Application()
+    app.router.add_post('/plan', service.handle_plan)
+    app.router.add_get('/status', service.handle_status)
+    app.router.add_get('/next-pass', service.handle_next_pass)
+    app.on_startup.append(service.on_startup)
+    app.on_cleanup.append(service.on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Persistent planning service for the TLE updater.')
+    parser.add_argument('--host', default=PLANNER_HOST, help='Interface to listen on (default: localhost only)')
+    parser.add_argument('--port', type=int, default=PLANNER_PORT, help=f'Port to listen on (default: {PLANNER_PORT})')
+    args = parser.parse_args()
+
+    setup_logging('planner_daemon_log.txt')
+    web.run_app(make_app(PlannerService()), host=args.host, port=args.port)
@@ -0,0 +1,275 @@
+"""
+Opt-in profiling for planning runs and observing nights.
+
+    AUTOSAT_PROFILE=sample python automated2.py
+    python api_interaction.py --non-interactive --profile cprofile
+
+Modes:
+    cprofile  deterministic, every call on the profiled thread; best for short
+              runs such as one planning run or one pass
+    sample    a background thread records every thread's stack every few
+              milliseconds; low overhead, fine for a whole night
+
+Each run writes profiles/<label>-<YYYYmmdd_HHMMSS>.* : cProfile gives a .prof
+file (pstats, snakeviz) and a .txt of the top functions; sampling gives a
+.folded file of collapsed stacks (flamegraph.pl, speedscope) and a .txt of
+the busiest functions. watch_tasks() adds per-coroutine asyncio timing to
+the planner's profile. With profiling off, profiled() hands back a shared
+no-op context and nothing is installed.
+"""
+import asyncio
+import collections.abc
+import contextlib
+import cProfile
+import glob
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import clock
+
+PROFILE_ENV = 'AUTOSAT_PROFILE'
+PROFILE_DIR_ENV = 'AUTOSAT_PROFILE_DIR'
+MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL_S = 0.005
+TOP_FUNCTIONS = 40
+
+_off = contextlib.nullcontext()
+_active_mode = None
+
+
+def mode_from_env(mode: str = None) -> str:
+    """`mode` if given, else $AUTOSAT_PROFILE; None when profiling is off."""
+    mode = mode or os.environ.get(PROFILE_ENV, '').strip().lower()
+    if not mode or mode in ('0', 'off', 'none'):
+        return None
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode '{mode}' (use one of {', '.join(MODES)})")
+    return mode
+
+
+def mode_from_argv(argv: list) -> str:
+    """--profile MODE or --profile=MODE from a plain argv list, else $AUTOSAT_PROFILE."""
+    for i, arg in enumerate(argv):
+        if arg.startswith('--profile='):
+            return mode_from_env(arg.split('=', 1)[1])
+        if arg == '--profile' and i + 1 < len(argv):
+            return mode_from_env(argv[i + 1])
+    return mode_from_env()
+
+
+def profile_base(label: str) -> str:
+    """profiles/<label>-<timestamp>, with a counter added if a run in the same second already used it."""
+    directory = os.environ.get(PROFILE_DIR_ENV, 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    base = candidate = os.path.join(directory, f"{label}-{clock.now():%Y%m%d_%H%M%S}")
+    n = 1
+    while glob.glob(glob.escape(candidate) + '.*') or glob.glob(glob.escape(candidate) + '-*'):
+        n += 1
+        candidate = f"{base}_{n}"
+    return candidate
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler for every thread in the process.
+
+    Threads blocked in a wait are sampled too, so the profile shows where
+    time went rather than only where CPU went. Samples are taken in real
+    time even on a virtual clock.
+    """
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.stacks = Counter()  # "thread;outer;...;inner" -> samples
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self.thread.start()
+        clock.ignore(self.thread)  # it never waits on the clock
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, base: str) -> str:
+        folded = base + '.folded'
+        with open(folded, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]
+            if frames:
+                own[frames[-1]] += count
+            for function in set(frames):
+                total[function] += count
+        with open(base + '.txt', 'w') as file:
+            file.write(f"{self.samples} samples every {self.interval * 1000:.0f} ms across all threads\n\n")
+            file.write(f"{'own':>8} {'total':>8}  function\n")
+            for function, count in total.most_common(TOP_FUNCTIONS):
+                file.write(f"{own[function]:>8} {count:>8}  {function}\n")
+        return folded
+
+
+class TaskStats:
+    """Per-coroutine asyncio timing: how many tasks, how long they lived and how long they ran on the loop."""
+    def __init__(self):
+        self.by_name = {}  # coroutine name -> [tasks, lifetime_s, busy_s, max_lifetime_s]
+
+    def add(self, name: str, lifetime: float, busy: float):
+        row = self.by_name.setdefault(name, [0, 0.0, 0.0, 0.0])
+        row[0] += 1
+        row[1] += lifetime
+        row[2] += busy
+        row[3] = max(row[3], lifetime)
+
+    def format(self) -> str:
+        lines = [f"{'coroutine':<40} {'tasks':>7} {'alive s':>9} {'on loop s':>10} {'max alive s':>12}"]
+        for name, (tasks, lifetime, busy, longest) in sorted(self.by_name.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40} {tasks:>7} {lifetime:>9.3f} {busy:>10.3f} {longest:>12.3f}")
+        return "\n".join(lines)
+
+
+class _TimedCoroutine(collections.abc.Coroutine):
+    """Wraps a task's coroutine to add up the time each step spends running on the event loop."""
+    __slots__ = ('coro', 'busy')
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.busy = 0.0
+
+    def send(self, value):
+        started = time.perf_counter()
+        try:
+            return self.coro.send(value)
+        finally:
+            self.busy += time.perf_counter() - started
+
+    def throw(self, *args):
+        started = time.perf_counter()
+        try:
+            return self.coro.throw(*args)
+        finally:
+            self.busy += time.perf_counter() - started
+
+    def close(self):
+        return self.coro.close()
+
+    def __await__(self):
+        return self.coro.__await__()
+
+
+async def watch_tasks(coro, stats: TaskStats):
+    """Run `coro` with every task created on the loop timed into `stats`."""
+    loop = asyncio.get_running_loop()
+    previous = loop.get_task_factory()
+
+    def factory(loop, task_coro, **kwargs):
+        name = getattr(task_coro, '__qualname__', type(task_coro).__name__)
+        timed = _TimedCoroutine(task_coro)
+        task = asyncio.Task(timed, loop=loop, **kwargs)
+        created = time.perf_counter()
+        task.add_done_callback(lambda _: stats.add(name, time.perf_counter() - created, timed.busy))
+        return task
+
+    loop.set_task_factory(factory)
+    try:
+        return await coro
+    finally:
+        loop.set_task_factory(previous)
+
+
+class Profile:
+    """One profiling session; see profiled()."""
+    def __init__(self, label: str, mode: str):
+        self.label = label
+        self.mode = mode
+        self.tasks = TaskStats()
+        self.profiler = None
+
+    def start(self):
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+
+    def stop(self) -> str:
+        base = profile_base(self.label)
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+            path = base + '.prof'
+            self.profiler.dump_stats(path)
+            with open(base + '.txt', 'w') as file:
+                pstats.Stats(self.profiler, stream=file).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        else:
+            self.profiler.stop()
+            path = self.profiler.write(base)
+        if self.tasks.by_name:
+            with open(base + '-tasks.txt', 'w') as file:
+                file.write(self.tasks.format() + "\n")
+        return path
+
+    def watch_tasks(self, coro):
+        return watch_tasks(coro, self.tasks)
+
+
+@contextlib.contextmanager
+def _session(label: str, mode: str):
+    global _active_mode
+    profile = Profile(label, mode)
+    previous, _active_mode = _active_mode, mode
+    profile.start()
+    try:
+        yield profile
+    finally:
+        _active_mode = previous
+        path = profile.stop()
+        logging.info(f"Profile of {label} written to {path}")
+        print(f"Profile of {label} written to {path}")
+
+
+def profiled(label: str, mode: str = None):
+    """
+    Context manager profiling the enclosed block under `mode` (or
+    $AUTOSAT_PROFILE); it yields the Profile, or None when profiling is off.
+    """
+    mode = mode_from_env(mode)
+    if mode is None:
+        return _off
+    return _session(label, mode)
+
+
+def profiled_thread(label: str):
+    """
+    For a thread started inside a cProfile session: profile it too, since
+    cProfile only sees the thread that enabled it. The sampler already sees
+    every thread, so otherwise this does nothing.
+    """
+    if _active_mode == 'cprofile':
+        return _session(label, 'cprofile')
+    return _off
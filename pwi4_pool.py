@@ -0,0 +1,195 @@
+import http.client
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlencode
+from pwi4_client import PWI4
+import clock
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float('inf'))
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given fraction of calls."""
+        target = fraction * self.count
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            running += count
+            if running >= target and count:
+                return bound
+        return 0.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(1000 * self.total_s / self.count, 2) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(1000 * self.max_s, 2),
+            'buckets': {f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts) if count},
+        }
+
+
+class KeepAliveCommunicator:
+    """
+    Drop-in for pwi4_client's HTTP communicator that reuses connections.
+
+    Idle HTTP/1.1 connections are kept in a pool, so back-to-back requests
+    skip the TCP handshake. Every request's latency is recorded per path.
+    """
+    def __init__(self, host: str = "localhost", port: int = 8220, pool_size: int = 4, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.io_seconds = 0.0
+
+    def _new_connection(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        connection.connect()
+        # Small request/response pairs on a long-lived socket: do not let Nagle hold them back
+        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection
+
+    def _connection(self):
+        try:
+            return self.idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection, response):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, path: str, **kwargs) -> bytes:
+        url = path + ("?" + urlencode(kwargs) if kwargs else "")
+        started = time.perf_counter()
+        connection, reused = self._connection()
+        try:
+            connection.request("GET", url)
+            response = connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # The server dropped an idle connection; retry once on a fresh one
+            connection, reused = self._new_connection(), False
+            connection.request("GET", url)
+            response = connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+        body = response.read()
+        self._release(connection, response)
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.histograms.setdefault(path, LatencyHistogram()).record(elapsed)
+            self.io_seconds += elapsed
+        if response.status != 200:
+            raise Exception(f"PWI4 returned HTTP {response.status} for {path}: {body.decode('utf-8', 'replace')}")
+        return body
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class PooledPWI4(PWI4):
+    """
+    PWI4 client sharing one keep-alive connection pool and one status cache.
+
+    status() returns the last status if it is at most `max_status_age`
+    seconds old; otherwise concurrent callers share a single in-flight
+    /status request. Mount commands refresh the cache with the status they
+    return. latency_report() gives per-endpoint histograms of the HTTP
+    round trips.
+    """
+    def __init__(self, host: str = "localhost", port: int = 8220, max_status_age: float = 0.2, pool_size: int = 4):
+        super().__init__(host, port)
+        self.comm = KeepAliveCommunicator(host, port, pool_size)
+        self.max_status_age = max_status_age
+        self.status_lock = threading.Lock()
+        self.cached_status = None
+        self.cached_at = 0.0
+        self.in_flight = None
+
+    @property
+    def io_seconds(self) -> float:
+        """Total time spent waiting on PWI4 so far."""
+        return self.comm.io_seconds
+
+    def status(self, max_age: float = None):
+        max_age = self.max_status_age if max_age is None else max_age
+        with self.status_lock:
+            if self.cached_status is not None and clock.monotonic() - self.cached_at <= max_age:
+                return self.cached_status
+            future = self.in_flight
+            owner = future is None
+            if owner:
+                future = self.in_flight = Future()
+        if not owner:
+            return future.result()
+
+        requested_at = clock.monotonic()
+        try:
+            status = super().status()
+        except Exception as e:
+            with self.status_lock:
+                self.in_flight = None
+            future.set_exception(e)
+            raise
+        with self.status_lock:
+            self.cached_status, self.cached_at = status, requested_at
+            self.in_flight = None
+        future.set_result(status)
+        return status
+
+    def request_with_status(self, path, **kwargs):
+        status = super().request_with_status(path, **kwargs)
+        if path != "/status":
+            # A command changed mount state; its reply is the freshest status there is
+            with self.status_lock:
+                self.cached_status, self.cached_at = status, clock.monotonic()
+        return status
+
+    def latency_report(self) -> dict:
+        with self.comm.lock:
+            return {path: histogram.summary() for path, histogram in sorted(self.comm.histograms.items())}
+
+    def format_latency_report(self) -> str:
+        lines = [f"{'endpoint':<28} {'calls':>6} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}"]
+        for path, summary in self.latency_report().items():
+            lines.append(f"{path:<28} {summary['count']:>6} {summary['mean_ms']:>8} {summary['p50_ms']:>7} "
+                         f"{summary['p99_ms']:>7} {summary['max_ms']:>7}")
+        return "\n".join(lines)
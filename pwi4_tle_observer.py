@@ -1,14 +1,22 @@
-from datetime import datetime
+import logging
 import os
-from io import StringIO  # Modified line
-import time
 import pythoncom
-from pwi4_client import PWI4
+import clock
+import telemetry
+from profiling import profiled
+from pwi4_pool import PooledPWI4
 from win32com.client import Dispatch
+from dome_predict import DomeLeader, plan_entry_track, preposition_dome
+from camera_cooler import CoolerManager
+from plan_queue import PlanQueue
+from logging_setup import Throttle
+from observation_db import get_db, norad_id
+from api_interaction import PLAN_TIMEZONE, read_tle_plan
 
 OUTPUT_PATH = 'D:\\SatelliteData'
 EXPOSURE_LENGTH_SEC = 0.1
 TLE_PLAN_FILENAME = "tleplan.txt"
+LOCK_ARCSEC = 60  # both axes this close to the target counts as locked on
 
 # Here are the sample contents of a TLE plan file:
 SAMPLE_TLE_PLAN_TEXT = """
@@ -27,183 +35,270 @@ NAME 14820U
 2 14820 082.5420 250.6068 0017200 253.3402 106.5925 14.83611386847046
 """
 
-def run_observer(tle_data):
+def connect_observer(pwi=None):
+    """PWI4 client and linked camera for the calling thread, or (None, None) if the mount is not connected."""
+    pythoncom.CoInitialize()
+    log("Checking connection to PWI4...")
+    if pwi is None:
+        pwi = PooledPWI4()
+
+    status = pwi.status()
+    if not status.mount.is_connected:
+        log("ERROR: Not connected to mount")
+        return None, None
+
+    log("Connecting to camera")
+    cam = Dispatch("MaxIm.CCDCamera")
+    cam.LinkEnabled = True
+    cam.DisableAutoShutdown = True
+    return pwi, cam
+
+def read_plan(filename=TLE_PLAN_FILENAME):
+    return read_tle_plan(filename)
+
+def prepare_dome(entry, dome):
+    # Pass track for the dome, with the slit sent to the rise azimuth; None without a dome
+    if dome is None:
+        return None
     try:
-        pythoncom.CoInitialize()
-        log("Checking connection to PWI4...")
-        pwi = PWI4()
-
-        # Camera initialization and cooler control
-        log("Connecting to camera")
-        cam = Dispatch("MaxIm.CCDCamera")
-        cam.LinkEnabled = True
-        cam.DisableAutoShutdown = True
-        cam.CoolerOn = True  # Turn on the cooler
-        # cam.SetTemperature = 20  # Set to a high temperature if needed
-
-        status = pwi.status()
-        if not status.mount.is_connected:
-            log("ERROR: Not connected to mount")
-            return "Mount not connected."
+        track = plan_entry_track(entry)
+        log("Pre-positioning dome to %.1f deg for %s" % (preposition_dome(dome, track), entry.name))
+        return track
+    except Exception as e:
+        log("Could not compute dome track for %s: %s" % (entry.name, e))
+        return None
+
+FOLLOW_LOG_INTERVAL = 10  # seconds between "Following target" lines; frame paths are logged at DEBUG
+
+logger = logging.getLogger('pwi4_tle_observer')
+
+def follow_entry(pwi, cam, entry, dome=None, track=None, cooler=None, result=None):
+    # Slews to the pass, follows it and saves frames until it ends; returns the
+    # frame count. The image directory and time to lock go into `result`.
+    result = {} if result is None else result
+    if cooler is not None and not cooler.stable.is_set():
+        log("WARNING: Camera cooler not yet stable (%s)" % cooler.state)
+    log("Slewing to %s" % entry.name)
+    slew_started = clock.monotonic()
+    with telemetry.span('observer.slew', target=entry.name):
+        response = pwi.mount_follow_tle(entry.tle1, entry.tle2, entry.tle3)
+    log("Response: %s" % response)
+    locked = False
+
+    leader = None
+    if track is not None:
+        leader = DomeLeader(dome, track)
+        leader.start()
+
+    # Also when a frame fails: stop the mount, and hand the dome back to slaving
+    # so it does not keep following the abandoned pass
+    try:
+        timestamp = clock.now().strftime("%Y%m%d_%H%M%S")
+        subdir_name = "%s_%s" % (timestamp, entry.name)
+        image_dir = result['image_dir'] = os.path.join(OUTPUT_PATH, subdir_name)
+        if not os.path.exists(image_dir):
+            log("Creating directory %s" % image_dir)
+            os.makedirs(image_dir)
+
+        image_count = 1
+        started = clock.monotonic()
+        io_started = pwi.io_seconds
+        progress = Throttle(FOLLOW_LOG_INTERVAL)
 
-        log("Connecting to camera")
-        cam = Dispatch("MaxIm.CCDCamera")
-        cam.LinkEnabled = True
-        cam.DisableAutoShutdown = True
-
-        f = open(TLE_PLAN_FILENAME)
-        tle_plan_text = f.read()
-        f.close()
-
-        plan = Plan()
-        plan.parse(tle_plan_text)
-
-        for entry in plan.entries:
-            while True:
-                seconds_until_begin = (entry.begin_time_local - datetime.now()).total_seconds()
-                if seconds_until_begin > 0:
-                    log("Sleeping %d seconds until next target %s" % (seconds_until_begin, entry.name))
-                    time.sleep(1)
-                else:
-                    break
-            log("Slewing to %s" % entry.name)
-            response = pwi.mount_follow_tle(entry.tle1, entry.tle2, entry.tle3)
-            log("Response: %s" % response)
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            subdir_name = "%s_%s" % (timestamp, entry.name)
-            image_dir = os.path.join(OUTPUT_PATH, subdir_name)
-            if not os.path.exists(image_dir):
-                log("Creating directory %s" % image_dir)
-                os.makedirs(image_dir)
-
-            image_count = 1
-
-            while True:
-                seconds_until_end = (entry.end_time_local - datetime.now()).total_seconds()
-                if seconds_until_end < 0:
-                    log("Finished with target")
-                    pwi.mount_stop()
-                    break
-                else:
+        while True:
+            seconds_until_end = (entry.end_time_local - clock.now()).total_seconds()
+            if seconds_until_end < 0:
+                log("Finished with target")
+                break
+            else:
+                with telemetry.span('observer.expose'):
                     cam.Expose(EXPOSURE_LENGTH_SEC, 1)
 
+                with telemetry.span('observer.status'):
                     status = pwi.status()
-                    azimuth_degs = status.mount.azimuth_degs
-                    altitude_degs = status.mount.altitude_degs
-                    axis0_dist_to_target_arcsec = status.mount.axis0.dist_to_target_arcsec
-                    axis1_dist_to_target_arcsec = status.mount.axis1.dist_to_target_arcsec
-
-                    filename = "%04d_Azm_%.3f_Alt_%.3f_Axis0Dist_%.2f_Axis1Dist_%.2f.fits" % (
-                        image_count,
-                        azimuth_degs,
-                        altitude_degs,
-                        axis0_dist_to_target_arcsec,
-                        axis1_dist_to_target_arcsec
-                    )
-
+                azimuth_degs = status.mount.azimuth_degs
+                altitude_degs = status.mount.altitude_degs
+                axis0_dist_to_target_arcsec = status.mount.axis0.dist_to_target_arcsec
+                axis1_dist_to_target_arcsec = status.mount.axis1.dist_to_target_arcsec
+                if not locked and max(axis0_dist_to_target_arcsec, axis1_dist_to_target_arcsec) <= LOCK_ARCSEC:
+                    locked = True
+                    result['time_to_lock_s'] = clock.monotonic() - slew_started
+                    telemetry.record('observer.time_to_lock', result['time_to_lock_s'], target=entry.name)
+
+                filename = "%04d_Azm_%.3f_Alt_%.3f_Axis0Dist_%.2f_Axis1Dist_%.2f.fits" % (
+                    image_count,
+                    azimuth_degs,
+                    altitude_degs,
+                    axis0_dist_to_target_arcsec,
+                    axis1_dist_to_target_arcsec
+                )
+
+                with telemetry.span('observer.image_ready_wait'):
                     while not cam.ImageReady:
-                        time.sleep(0.1)
-                    
-                    full_file_path = os.path.join(image_dir, filename)
-                    log(full_file_path)
+                        clock.sleep(0.1)
+            
+                full_file_path = os.path.join(image_dir, filename)
+                logger.debug(full_file_path)
+                with telemetry.span('observer.save'):
                     cam.SaveImage(full_file_path)
-                    image_count += 1
+                image_count += 1
 
+                if progress.ready():
                     log("    Following target for %d more seconds" % seconds_until_end)
 
+    finally:
+        try:
+            pwi.mount_stop()
+        finally:
+            if leader is not None:
+                leader.stop()
+                dome.set_slave_mode(True)
+
+    frames = image_count - 1
+    if frames:
+        period_ms = 1000 * (clock.monotonic() - started) / frames
+        io_ms = 1000 * (pwi.io_seconds - io_started) / frames
+        log("Mount I/O: %.1f ms of each %.1f ms frame period (%.0f%%)" % (io_ms, period_ms, 100 * io_ms / period_ms))
+    return frames
+
+def observe_queue(pwi, cam, plan_queue, dome=None, cooler=None, on_done=None):
+    # Observes entries as plan_queue hands them out until it is closed and
+    # drained. Inserts, cancellations and new elements for the next target are
+    # picked up while waiting for it; on_done(entry, frames) runs after each pass.
+    passes_observed = 0
+    prepared = None
+    track = None
+    while True:
+        item = plan_queue.peek()
+        if item is None:
+            break
+        if prepared != (item, item.version):
+            log("Next target %s at %s" % (item.entry.name, item.entry.begin_time_local))
+            with telemetry.span('observer.dome_prepare'):
+                track = prepare_dome(item.entry, dome)
+            prepared = (item, item.version)
+        with telemetry.span('observer.wait_for_pass'):
+            due = plan_queue.claim_when_due(item)
+        if not due:
+            continue  # the queue changed while waiting
+
+        result = {}
+        error = None
+        started = clock.time()
+        try:
+            with telemetry.span('observer.pass', target=item.entry.name) as span:
+                frames = follow_entry(pwi, cam, item.entry, dome, track, cooler, result)
+                span.attrs['frames'] = frames
+        except Exception as e:
+            log("Observation of %s failed: %s" % (item.entry.name, e))
+            frames = 0
+            error = str(e)
+        finally:
+            plan_queue.done(item)
+        record_pass(item.entry, started, frames, error, result)
+        passes_observed += 1
+        if on_done is not None:
+            on_done(item.entry, frames)
+    return passes_observed
+
+def record_pass(entry, started, frames, error, result):
+    # One row per attempted pass in observations.db; a database problem never stops observing
+    outcome = 'failed' if error else 'observed' if frames else 'no_frames'
+    try:
+        get_db().record_pass(norad_id(entry.tle2), entry.name, started, clock.time(), frames, outcome,
+                             entry.begin_time_local.replace(tzinfo=PLAN_TIMEZONE),
+                             entry.end_time_local.replace(tzinfo=PLAN_TIMEZONE),
+                             result.get('time_to_lock_s'), error, result.get('image_dir'))
+    except Exception as e:
+        log("Could not record %s in the observation database: %s" % (entry.name, e))
+
+def run_observer(tle_data, dome=None, cooler=None, plan_queue=None, profile=None):
+    # dome: optional dome_control.DomeController; when given, the slit is
+    # pre-positioned between passes and led along each pass track.
+    # cooler: optional camera_cooler.CoolerManager owned by the caller; without
+    # one, a manager is created here and warms the camera up when we finish.
+    # plan_queue: optional live plan_queue.PlanQueue; without one, the entries
+    # in tleplan.txt are observed and the function returns.
+    # profile: 'cprofile' or 'sample' to profile the run into profiles/
+    # (default: $AUTOSAT_PROFILE, else off).
+    with profiled('observer', profile):
+        return _run_observer(tle_data, dome, cooler, plan_queue)
+
+def _run_observer(tle_data, dome, cooler, plan_queue):
+    owns_cooler = cooler is None
+    if owns_cooler:
+        cooler = CoolerManager()
+    flusher = telemetry.start_flusher(label='observer')
+    try:
+        pwi, cam = connect_observer()
+        if pwi is None:
+            return "Mount not connected."
+
+        if plan_queue is None:
+            plan_queue = PlanQueue(read_plan().entries)
+            plan_queue.close()
+
+        pending = plan_queue.pending()
+        if pending:
+            # Starts the cooler early enough to be stable by the first pass
+            cooler.schedule(pending[0].entry.begin_time_local)
+
+        observe_queue(pwi, cam, plan_queue, dome, cooler)
+
         return "Observation completed successfully."
 
     except Exception as e:
         return f"Observation failed: {str(e)}"
 
     finally:
-        # Turn off the cooler safely
+        # Ramp the cooler back up in the background; mount and dome shutdown
+        # does not have to wait for it
         try:
-            if cam:
-                log("Setting cooler to high temperature before shutting off")
-                cam.SetTemperature = 20  # Set to a high temperature before turning off
-                time.sleep(60)  # Wait for 60 seconds (adjust as needed)
-                cam.CoolerOn = False  # Turn off the cooler
+            if owns_cooler:
+                log("Warming up camera cooler in the background")
+                cooler.warm_up()
         except Exception as e:
             log(f"Error in turning off the cooler: {str(e)}")
 
+        flusher.stop()
+        log("Time by stage:\n" + telemetry.format_summary())
+
         # Any other cleanup code, if needed
         pass
 
 def log(line):
-    print (line)    
+    logger.info(line)
 
-class PlanEntry:
-    def __init__(self):
-        self.begin_time_local = None
-        self.end_time_local = None
-        self.name = None
-        self.tle1 = None
-        self.tle2 = None
-        self.tle3 = None
+class PlanWatcher:
+    # Picks up rewrites of the plan file by polling its modification time and
+    # size (the planners replace it atomically, so a changed file is complete)
+    def __init__(self, filename=TLE_PLAN_FILENAME):
+        self.filename = filename
+        self.signature = None
 
-class Plan:
-    def __init__(self):
-        self.entries = []
-
-    def parse(self, plan_text):
-        reader = StringIO(plan_text)
-
-        while True:
-            next_entry = self.parse_single_entry(reader)
-            if next_entry == None:
-                return  # End of file reached
-            self.entries.append(next_entry)
-
-    def parse_single_entry(self, plan_reader):
-        begin_local_str = self.read_next_record("BEGINLOCAL", plan_reader)
-        end_local_str = self.read_next_record("ENDLOCAL", plan_reader)
-        name = self.read_next_record("NAME", plan_reader)
-        tle1 = self.read_next_record(None, plan_reader)
-        tle2 = self.read_next_record(None, plan_reader)
-        tle3 = self.read_next_record(None, plan_reader)
-
-        if tle3 == None:
-            return None # End of file
-
-        entry = PlanEntry()
-        entry.begin_time_local = self.parse_time(begin_local_str)
-        entry.end_time_local = self.parse_time(end_local_str)
-        entry.name = name
-        entry.tle1 = tle1
-        entry.tle2 = tle2
-        entry.tle3 = tle3
-
-        return entry
-        
-    
-    def read_next_record(self, expected_prefix, plan_reader):
-        line = self.read_next_nonempty_line(plan_reader)
-        if line == None:
-            return None  # End of file
-        
-        if expected_prefix == None:
-            return line
-
-        fields = line.split(' ', 1)
-        if fields[0] != expected_prefix:
-            raise Exception("Expected prefix '%s', got '%s'" % (expected_prefix, fields[0]))
-        return fields[1]
-    
-    def read_next_nonempty_line(self, plan_reader):
-        while True:
-            line = plan_reader.readline()
-            if line == '':
-                return None # End of file
-            
-            line = line.strip()
-            if line == '':
-                continue # Blank line
-            return line
-
-    def parse_time(self, time_string):
-        return datetime.strptime(time_string, "%Y-%m-%d %H:%M:%S")
+    def _stat(self):
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def changed(self):
+        return self._stat() != self.signature
+
+    def poll(self):
+        # Entries of the plan if it changed since the last poll, else None
+        signature = self._stat()
+        if signature == self.signature:
+            return None
+        self.signature = signature
+        if signature is None:
+            return []
+        try:
+            return read_plan(self.filename).entries
+        except Exception as e:
+            log("Could not read plan %s: %s" % (self.filename, e))
+            return None
         
 
 
@@ -2,18 +2,20 @@
 import requests
 import tkinter as tk
 from tkinter import messagebox, font, simpledialog, PhotoImage
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageTk
 import subprocess
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 import threading
 import json
 import pytz
+from sun_ephemeris import sun_times
+from weather_image import WeatherImageFetcher
+import clock
+from planner_client import PlannerError, PlannerUnavailable, ensure_planner_daemon, is_planner_running, request_plan
 import os
 import re
 import sys
 import traceback
-import urllib.request
-import time
 print(sys.executable)
 
 def show_button_info(info_text):
@@ -27,59 +29,18 @@ def show_button_info(info_text):
     close_button = tk.Button(info_popup, text="Close", command=info_popup.destroy)
     close_button.pack(pady=10)
 
-def download_and_convert_image(url, jpg_filename, png_filename, size=(500, 500), observatory_coords=(305, 263), label_text="New Mexico Skies"):
-    try:
-        # Download the image
-        print("Downloading image...")
-        urllib.request.urlretrieve(url, jpg_filename)
-        print("Image downloaded at:", os.path.abspath(jpg_filename))
-
-        # Open the downloaded image
-        with Image.open(jpg_filename) as img:
-            # Resize the image
-            img = img.resize(size, Image.Resampling.LANCZOS)  # Updated line
-            
-            # Draw a circle and label on the image
-            draw = ImageDraw.Draw(img)
-            draw.ellipse((observatory_coords[0]-4, observatory_coords[1]-4, observatory_coords[0]+4, observatory_coords[1]+4), fill='red')
-            
-            # Load a font
-            font_path = "arial.ttf"  # Ensure this path is correct or accessible on your system
-            try:
-                font = ImageFont.truetype(font_path, 14)
-            except IOError:
-                print(f"Warning: Unable to load font '{font_path}'. Using default font.")
-                font = ImageFont.load_default()
-            
-            # Draw text
-            draw.text((314, 263), label_text, fill="white", font=font)
-            
-            # Save the modified image as PNG
-            img.save(png_filename)
-        
-        print("Image processed. Final image at:", os.path.abspath(png_filename))
-        return True
-    except Exception as e:
-        print(f"Error processing the image: {e}")
-        return False
+WEATHER_POLL_MS = 1000  # how often the Tk thread looks for a new weather image
 
 
-def update_image_label():
-    jpg_filename = "weather.jpg"
-    png_filename = "weather.png"
-    image_url = "https://cdn.star.nesdis.noaa.gov/GOES16/ABI/SECTOR/sr/GEOCOLOR/600x600.jpg"
-
-    if download_and_convert_image(image_url, jpg_filename, png_filename):
-        if os.path.exists(png_filename):
-            print("PNG file exists, updating label.")
-            photo = tk.PhotoImage(file=png_filename)
-            image_label.config(image=photo)
-            image_label.image = photo  # keep a reference
-        else:
-            print("PNG file does not exist.")
-
-    # Schedule the next update
-    image_label.after(300000, update_image_label)  # Update every 5 minutes
+def show_weather_image():
+    # Runs on the Tk thread: picks up whatever the background fetcher has
+    # finished; the download and image processing never happen here
+    image = weather_fetcher.latest()
+    if image is not None:
+        photo = ImageTk.PhotoImage(image)
+        image_label.config(image=photo)
+        image_label.image = photo  # keep a reference
+    image_label.after(WEATHER_POLL_MS, show_weather_image)
 
 
 def log_user_access(user_name):
@@ -114,38 +75,8 @@ def check_observatory_status():
 
 def update_sun_times():
     try:
-        lat, lng = 32.957313, -105.742485  # Coordinates for Cloudcroft, New Mexico
-        today = datetime.now(pytz.timezone('America/Denver')).date()
-        tomorrow = today + timedelta(days=1)
-
-        # Fetch sunset time for today
-        sunset_response = requests.get(f"https://api.sunrise-sunset.org/json?lat={lat}&lng={lng}&date={today}&formatted=0")
-        # Fetch sunrise time for tomorrow
-        sunrise_response = requests.get(f"https://api.sunrise-sunset.org/json?lat={lat}&lng={lng}&date={tomorrow}&formatted=0")
-
-        if sunset_response.status_code != 200 or sunrise_response.status_code != 200:
-            print(f"Failed to retrieve data from API. Status codes: {sunset_response.status_code}, {sunrise_response.status_code}")
-            return None, None
-
-        sunset_data = sunset_response.json()
-        sunrise_data = sunrise_response.json()
-
-        if 'results' not in sunset_data or 'sunset' not in sunset_data['results']:
-            print("Malformed sunset API response: Missing 'results' or 'sunset' data.")
-            return None, None
-
-        if 'results' not in sunrise_data or 'sunrise' not in sunrise_data['results']:
-            print("Malformed sunrise API response: Missing 'results' or 'sunrise' data.")
-            return None, None
-
-        sunset_utc = datetime.fromisoformat(sunset_data['results']['sunset'])
-        sunrise_utc = datetime.fromisoformat(sunrise_data['results']['sunrise'])
-
-        mountain_time = pytz.timezone('America/Denver')
-        sunset_local = sunset_utc.replace(tzinfo=timezone.utc).astimezone(mountain_time)
-        sunrise_local = sunrise_utc.replace(tzinfo=timezone.utc).astimezone(mountain_time)
-
-        return sunrise_local, sunset_local
+        # Computed locally and memoized per date; no network round trip.
+        return sun_times()
     except Exception as e:
         print(f"Error in update_sun_times: {e}")
         return None, None
@@ -176,7 +107,7 @@ def schedule_automation_function():
         return
 
     # Schedule the observation cycle
-    current_time = datetime.now()
+    current_time = clock.now()
     for day in range(num_days):
         cycle_datetime = current_time.replace(hour=daily_start_time.hour, minute=daily_start_time.minute, second=0, microsecond=0) + timedelta(days=day)
 
@@ -184,7 +115,7 @@ def schedule_automation_function():
             cycle_datetime += timedelta(days=1)
 
         wait_time = (cycle_datetime - current_time).total_seconds()
-        threading.Timer(wait_time, automated_observation_cycle).start()
+        clock.call_later(wait_time, automated_observation_cycle)
 
         # Print the scheduled time for the observation cycle
         print(f"Automated observation cycle scheduled for {cycle_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -211,9 +142,50 @@ def run_script(script_name, status_label, shutdown=False, args=None, completion_
 
     threading.Thread(target=target).start()
 
+def run_planner_request(status_label, **plan_args):
+    def target():
+        try:
+            status_label.config(text="Status: Running")
+            result = request_plan(**plan_args)
+            print(f"Planner service wrote {result.get('entries', 0)} observations in {result.get('elapsed_s', 0)} s")
+            status_label.config(text="Status: Finished")
+        except Exception as e:
+            error_message = f"Error requesting plan: {e}\n{traceback.format_exc()}"
+            print(error_message)  # Print the error message in the terminal
+            status_label.config(text="Status: Error")
+
+    threading.Thread(target=target).start()
+
 def run_apiinteraction():
+    # The service probe can wait out its timeout, so it runs off the Tk thread
+    # and the dialogs are opened back on it
+    def probe():
+        running = is_planner_running()
+        app.after(0, ask_plan_parameters if running else run_tle_updater_script)
+
+    threading.Thread(target=probe, name='planner-probe', daemon=True).start()
+
+def run_tle_updater_script():
+    # No planner service: fall back to the interactive script
     run_script('api_interaction.py', tle_updater_status_label)
 
+def ask_plan_parameters():
+    norad_ids_str = simpledialog.askstring("TLE Updater", "NORAD IDs (comma-separated, blank to use NoradId.txt):", parent=app)
+    if norad_ids_str is None:  # User cancelled
+        return
+    days = simpledialog.askinteger("TLE Updater", "Days ahead for observation (max 10):", parent=app, minvalue=1, maxvalue=10, initialvalue=1)
+    if days is None:
+        return
+    observation_window_str = simpledialog.askstring("TLE Updater", "Observation window in minutes (or 'full'):", parent=app, initialvalue="2")
+    if observation_window_str is None:
+        return
+
+    norad_ids = [id.strip() for id in norad_ids_str.split(',') if id.strip()]
+    observation_window = int(observation_window_str) if observation_window_str.isdigit() else 2
+    if observation_window_str.lower() == 'full':
+        observation_window = 'full'
+    run_planner_request(tle_updater_status_label, days=days, observation_window=observation_window, norad_ids=norad_ids)
+
 def open_tleplan():
     try:
         os.startfile('tleplan.txt')
@@ -228,17 +200,21 @@ def automated_observation_cycle(num_days=None, daily_start_time=None):
         num_days = 1  # Default number of days
     if daily_start_time is None:
         # Default start time to current time
-        daily_start_time = datetime.now().time()  
+        daily_start_time = clock.now().time()  
 
     print("Automated observation cycle started.")
     for day in range(num_days):
         if not skip_scripts_var.get():
             # Run the TLE Updater script if the checkbox is not checked
             try:
-                print("Running the TLE updater script.")
-                subprocess.run(['python', 'api_interaction.py', '--non-interactive', '--days', '1', '--observation-window', '2'], check=True)
+                try:
+                    print("Requesting a new plan from the planner service.")
+                    request_plan(days=1, observation_window=2)
+                except PlannerUnavailable:
+                    print("Planner service not running. Running the TLE updater script.")
+                    subprocess.run(['python', 'api_interaction.py', '--non-interactive', '--days', '1', '--observation-window', '2'], check=True)
                 tle_updater_status_label.config(text="TLE Updater: Finished")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, PlannerError) as e:
                 tle_updater_status_label.config(text=f"TLE Updater: Error ({e})")
                 continue  # Skip the rest of the loop on error
 
@@ -257,19 +233,19 @@ def automated_observation_cycle(num_days=None, daily_start_time=None):
 
             # Start Observation Function
             def start_observation():
-                start_check_time = datetime.now()  # Record the time when checking starts
+                start_check_time = clock.now()  # Record the time when checking starts
                 while True:
                     status = check_observatory_status()
                     if status == "Open":
                         print("Observatory is open. Starting the observation script.")
                         break
-                    elif (datetime.now() - start_check_time).total_seconds() > 5 * 3600:
+                    elif (clock.now() - start_check_time).total_seconds() > 5 * 3600:
                         print("Observatory not open for 5 hours. Initiating shutdown.")
                         initiate_shutdown()
                         exit()  # Quit the script
                     else:
                         print("Observatory is not open. Checking again in one minute.")
-                        time.sleep(60)
+                        clock.sleep(60)
 
                 # Run Automated2.py Script
                 run_script('automated2.py', automated2_status_label)
@@ -279,7 +255,7 @@ def automated_observation_cycle(num_days=None, daily_start_time=None):
                 print("Initiating the shutdown sequence.")
                 run_script('automated2.py', automated2_status_label, shutdown=True)
 
-            current_time = datetime.now(pytz.timezone('America/Denver'))
+            current_time = clock.now(pytz.timezone('America/Denver'))
 
             # Check if it's already past the start time
             if current_time > start_time:
@@ -302,13 +278,13 @@ def automated_observation_cycle(num_days=None, daily_start_time=None):
 
 def schedule_task(task_time, task_function):
     # Get the current time with the same timezone as task_time
-    now = datetime.now(pytz.timezone('America/Denver'))
+    now = clock.now(pytz.timezone('America/Denver'))
     wait_time = (task_time - now).total_seconds()
     if wait_time > 0:
-        threading.Timer(wait_time, task_function).start()
+        clock.call_later(wait_time, task_function)
 
 def schedule_daily_cycle(num_days, daily_start_time):
-    current_time = datetime.now()
+    current_time = clock.now()
     for day in range(num_days):
         # Calculate the date and time for the next cycle
         cycle_time = current_time.replace(hour=daily_start_time.hour, minute=daily_start_time.minute, second=0, microsecond=0) + timedelta(days=day)
@@ -318,7 +294,7 @@ def schedule_daily_cycle(num_days, daily_start_time):
             cycle_time += timedelta(days=1)
 
         wait_time = (cycle_time - current_time).total_seconds()
-        threading.Timer(wait_time, automated_observation_cycle).start()
+        clock.call_later(wait_time, automated_observation_cycle)
 app = tk.Tk()
 app.title("New Mexico Skies Command Center")
 
@@ -489,6 +465,12 @@ schedule_automation_status_label.pack(side=tk.LEFT)
 image_label = tk.Label(app)
 image_label.pack(pady=5)
 
-update_image_label()
+# Downloaded and processed in the background (every 5 minutes, skipped when unchanged)
+weather_fetcher = WeatherImageFetcher(interval=300)
+weather_fetcher.start()
+show_weather_image()
+
+# Keep the planner service warm for the TLE updater and the automated cycle
+threading.Thread(target=ensure_planner_daemon, daemon=True).start()
 
 app.mainloop()
@@ -0,0 +1,12 @@
+"""
+Stand-ins for the observatory hardware, for running the real scripts on Linux.
+
+pwi4_sim      PWI4 HTTP API on localhost with slew/settle timing
+com_fakes     MaxIm.CCDCamera and TIDigitalDomeWorks.DomeControl objects
+shims/        win32com / pythoncom modules that hand out the fakes
+vendor/       minimal pwi4_client, used only when PlaneWave's is not on the path
+run           runs a script (or module:function) against all of the above
+
+    python -m simulators.run automated2.py
+    python -m simulators.run --mount-ready --readout 0.05 --call pwi4_tle_observer:run_observer tleplan.txt
+"""
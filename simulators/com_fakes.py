@@ -0,0 +1,213 @@
+import os
+import threading
+
+import clock
+from simulators.pwi4_sim import azimuth_difference
+
+CAMERA_PROGID = "MaxIm.CCDCamera"
+DOME_PROGID = "TIDigitalDomeWorks.DomeControl"
+
+
+class FakeMaxImCamera:
+    """
+    MaxIm.CCDCamera with timing.
+
+    Expose() returns at once, like MaxIm; ImageReady turns true after the
+    exposure plus `readout_seconds`. SaveImage() blocks for `save_seconds`
+    and writes a small FITS file. The sensor relaxes toward the setpoint
+    (cooler on) or `ambient` (cooler off) at `cooling_rate` deg C per
+    second.
+    """
+    def __init__(self, readout_seconds: float = 0.5, save_seconds: float = 0.1, ambient: float = 18.0,
+                 cooling_rate: float = 0.5, image_bytes: int = 0):
+        self.readout_seconds = readout_seconds
+        self.save_seconds = save_seconds
+        self.ambient = ambient
+        self.cooling_rate = cooling_rate
+        self.image_bytes = image_bytes
+        self.lock = threading.Lock()
+        self.LinkEnabled = False
+        self.DisableAutoShutdown = False
+        self.SetTemperature = ambient
+        self._cooler_on = False
+        self._temperature = ambient
+        self._thermal_at = None
+        self._ready_at = None
+        self.exposures = 0
+        self.saved = []  # (clock time, path) of every frame written
+
+    def _thermal_update(self):
+        now = clock.monotonic()
+        if self._thermal_at is None:
+            self._thermal_at = now
+        target = self.SetTemperature if self._cooler_on else self.ambient
+        step = self.cooling_rate * (now - self._thermal_at)
+        self._temperature += max(-step, min(step, target - self._temperature))
+        self._thermal_at = now
+
+    @property
+    def CoolerOn(self) -> bool:
+        return self._cooler_on
+
+    @CoolerOn.setter
+    def CoolerOn(self, value):
+        with self.lock:
+            self._thermal_update()
+            self._cooler_on = bool(value)
+
+    @property
+    def Temperature(self) -> float:
+        with self.lock:
+            self._thermal_update()
+            return self._temperature
+
+    def _check_link(self):
+        if not self.LinkEnabled:
+            raise Exception("Camera is not connected")
+
+    def Expose(self, duration: float, light: int = 1, filter_slot: int = -1):
+        with self.lock:
+            self._check_link()
+            self._ready_at = clock.monotonic() + duration + self.readout_seconds
+            self.exposures += 1
+
+    @property
+    def ImageReady(self) -> bool:
+        with self.lock:
+            return self._ready_at is not None and clock.monotonic() >= self._ready_at
+
+    def AbortExposure(self):
+        with self.lock:
+            self._ready_at = None
+
+    def SaveImage(self, path: str):
+        with self.lock:
+            self._check_link()
+            if not (self._ready_at is not None and clock.monotonic() >= self._ready_at):
+                raise Exception("No image to save")
+        clock.sleep(self.save_seconds)
+        write_fits(path, self.image_bytes)
+        with self.lock:
+            self.saved.append((clock.time(), path))
+
+
+def write_fits(path: str, data_bytes: int = 0):
+    """Minimal valid FITS file: one header block, optionally followed by zero-filled 8-bit data."""
+    width = max(data_bytes, 0)
+    cards = ["SIMPLE  =                    T", "BITPIX  =                    8",
+             "NAXIS   =                    1", f"NAXIS1  = {width:>20}", "END"]
+    header = "".join(card.ljust(80) for card in cards).ljust(2880).encode('ascii')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(header)
+        if width:
+            f.write(bytes(width))
+            f.write(bytes(-width % 2880))
+
+
+class FakeDomeControl:
+    """
+    TIDigitalDomeWorks.DomeControl with a shutter that takes
+    `shutter_seconds` to open or close and a dome that turns at
+    `rotation_rate` deg/s. While slaved the dome follows the azimuth of
+    `mount` (a simulators.pwi4_sim.MountSimulator), if one is given.
+    """
+    def __init__(self, shutter_seconds: float = 20.0, rotation_rate: float = 4.0, mount=None):
+        self.shutter_seconds = shutter_seconds
+        self.rotation_rate = rotation_rate
+        self.mount = mount
+        self.lock = threading.Lock()
+        self.online = True
+        self.door_open = True
+        self.azimuth = 180.0
+        self.target_azimuth = None
+        self.optSlaveMode = False
+        self._shutter = 0.0  # 0 closed .. 1 open
+        self._shutter_target = 0.0
+        self._updated_at = None
+
+    def _update(self):
+        now = clock.monotonic()
+        dt, self._updated_at = now - (self._updated_at if self._updated_at is not None else now), now
+        if self.shutter_seconds > 0:
+            step = dt / self.shutter_seconds
+        else:
+            step = 1.0
+        self._shutter += max(-step, min(step, self._shutter_target - self._shutter))
+
+        target = self.target_azimuth
+        if self.optSlaveMode and self.mount is not None:
+            target = self.mount.azimuth
+        if target is not None:
+            turn = self.rotation_rate * dt
+            self.azimuth = (self.azimuth + max(-turn, min(turn, azimuth_difference(target, self.azimuth)))) % 360
+            if not self.optSlaveMode and abs(azimuth_difference(target, self.azimuth)) < 0.01:
+                self.target_azimuth = None
+
+    def _rotating(self) -> bool:
+        return self.target_azimuth is not None and not self.optSlaveMode
+
+    def statIsOnline(self) -> bool:
+        return self.online
+
+    def statIsBusy(self) -> bool:
+        with self.lock:
+            self._update()
+            return self._shutter != self._shutter_target or self._rotating()
+
+    def statIsShutterOpen(self) -> bool:
+        with self.lock:
+            self._update()
+            return self._shutter >= 1.0
+
+    def statIsDomeDoorOpen(self) -> bool:
+        return self.door_open
+
+    def actOpenShutter(self):
+        with self.lock:
+            self._update()
+            self._shutter_target = 1.0
+
+    def actCloseShutter(self):
+        with self.lock:
+            self._update()
+            self._shutter_target = 0.0
+
+    def actGotoAzimuth(self, azimuth: float):
+        with self.lock:
+            self._update()
+            self.target_azimuth = float(azimuth) % 360
+
+    def actRefreshStatus(self):
+        with self.lock:
+            self._update()
+
+    @property
+    def statAzimuth(self) -> float:
+        with self.lock:
+            self._update()
+            return self.azimuth
+
+
+# One shared object per ProgID, like the out-of-process COM servers
+registry = {}
+registry_lock = threading.Lock()
+
+
+def register(progid: str, obj):
+    with registry_lock:
+        registry[progid] = obj
+
+
+def dispatch(progid: str):
+    with registry_lock:
+        if progid not in registry:
+            if progid == CAMERA_PROGID:
+                registry[progid] = FakeMaxImCamera()
+            elif progid == DOME_PROGID:
+                registry[progid] = FakeDomeControl()
+            else:
+                raise Exception(f"Invalid class string: {progid}")
+        return registry[progid]
@@ -0,0 +1,229 @@
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+
+import clock
+from pass_finder import OBSERVER_ALT, OBSERVER_LAT, OBSERVER_LNG, _time_grid, look_angles
+
+HOME_ALT_AZ = (45.0, 0.0)
+ON_TARGET_ARCSEC = 10.0
+
+
+def azimuth_difference(a: float, b: float) -> float:
+    return (a - b + 180.0) % 360.0 - 180.0
+
+
+def radec_to_altaz(ra_hours: float, dec_degs: float, when_utc: datetime, lat: float, lng: float) -> tuple:
+    """Alt/az of fixed J2000 coordinates (precession ignored; plenty for a simulator)."""
+    jd = when_utc.timestamp() / 86400.0 + 2440587.5
+    gmst = (280.46061837 + 360.98564736629 * (jd - 2451545.0)) % 360
+    hour_angle = math.radians((gmst + lng - ra_hours * 15.0) % 360)
+    lat_r, dec_r = math.radians(lat), math.radians(dec_degs)
+    sin_alt = math.sin(lat_r) * math.sin(dec_r) + math.cos(lat_r) * math.cos(dec_r) * math.cos(hour_angle)
+    alt = math.asin(max(-1.0, min(1.0, sin_alt)))
+    az = math.atan2(-math.cos(dec_r) * math.sin(hour_angle),
+                    math.sin(dec_r) * math.cos(lat_r) - math.cos(dec_r) * math.sin(lat_r) * math.cos(hour_angle))
+    return math.degrees(alt), math.degrees(az) % 360
+
+
+class MountSimulator:
+    """
+    Alt-az mount with rate-limited axes.
+
+    Axis 0 is azimuth, axis 1 altitude. Each axis moves toward the current
+    target at `slew_rate` deg/s; the mount counts as slewing until it has
+    been within ON_TARGET_ARCSEC for `settle_seconds`. Positions are
+    integrated lazily whenever the state is read, in clock time, so the
+    mount keeps pace with a VirtualClock too.
+    """
+    def __init__(self, slew_rate: float = 6.0, settle_seconds: float = 1.5, lat: float = OBSERVER_LAT,
+                 lng: float = OBSERVER_LNG, alt_m: float = OBSERVER_ALT):
+        self.slew_rate = slew_rate
+        self.settle_seconds = settle_seconds
+        self.lat, self.lng, self.alt_m = lat, lng, alt_m
+        self.lock = threading.Lock()
+        self.connected = False
+        self.enabled = [False, False]
+        self.azimuth, self.altitude = 180.0, 20.0  # parked
+        self.target = None  # callable(now_utc) -> (alt, az), or None when stopped
+        self.tracking = False
+        self.last_update = None  # set on first use, after any clock has been installed
+        self.on_target_since = None
+        self.distance = (0.0, 0.0)
+
+    def _update(self):
+        now = clock.monotonic()
+        dt, self.last_update = now - (self.last_update if self.last_update is not None else now), now
+        if self.target is None or not all(self.enabled):
+            self.distance = (0.0, 0.0)
+            return
+        target_alt, target_az = self.target(clock.now(timezone.utc))
+        step = self.slew_rate * dt
+        daz = azimuth_difference(target_az, self.azimuth)
+        dalt = target_alt - self.altitude
+        self.azimuth = (self.azimuth + max(-step, min(step, daz))) % 360
+        self.altitude += max(-step, min(step, dalt))
+        self.distance = (abs(azimuth_difference(target_az, self.azimuth)) * 3600, abs(target_alt - self.altitude) * 3600)
+        if max(self.distance) <= ON_TARGET_ARCSEC:
+            self.on_target_since = self.on_target_since or now
+            if not self.tracking:
+                self.target = None  # fixed goto / home reached
+        else:
+            self.on_target_since = None
+
+    def is_slewing(self) -> bool:
+        if self.target is None:
+            return False
+        return self.on_target_since is None or clock.monotonic() - self.on_target_since < self.settle_seconds
+
+    def command(self, path: str, params: dict):
+        with self.lock:
+            self._update()
+            if path == '/mount/connect':
+                self.connected = True
+                return
+            if not self.connected:
+                raise ValueError("Mount is not connected")
+            if path == '/mount/disconnect':
+                self.connected, self.enabled, self.target = False, [False, False], None
+            elif path == '/mount/enable':
+                self.enabled[int(params.get('axis', 0))] = True
+            elif path == '/mount/disable':
+                self.enabled[int(params.get('axis', 0))] = False
+                self.target = None
+            elif path == '/mount/stop':
+                self.target, self.tracking = None, False
+            elif path == '/mount/find_home':
+                self._goto(lambda now: HOME_ALT_AZ, tracking=False)
+            elif path == '/mount/goto_alt_az':
+                alt, az = float(params['alt_degs']), float(params['az_degs'])
+                self._goto(lambda now: (alt, az), tracking=False)
+            elif path == '/mount/goto_ra_dec_j2000':
+                ra, dec = float(params['ra_hours']), float(params['dec_degs'])
+                self._goto(lambda now: radec_to_altaz(ra, dec, now, self.lat, self.lng), tracking=True)
+            elif path == '/mount/follow_tle':
+                satrec = Satrec.twoline2rv(params['line2'], params['line3'])
+                self._goto(self._tle_target(satrec), tracking=True)
+            else:
+                raise KeyError(path)
+
+    def _goto(self, target, tracking: bool):
+        if not all(self.enabled):
+            raise ValueError("Mount axes are not enabled")
+        self.target, self.tracking, self.on_target_since = target, tracking, None
+
+    def _tle_target(self, satrec):
+        sat_array = SatrecArray([satrec])
+
+        def target(now):
+            grid = _time_grid(now, now, 1.0, sun_vector=np.zeros(3))
+            elevation, azimuth, _ = look_angles(sat_array, grid, self.lat, self.lng, self.alt_m)
+            return float(elevation[0, 0]), float(azimuth[0, 0])
+        return target
+
+    def status_text(self) -> str:
+        with self.lock:
+            self._update()
+            slewing = self.is_slewing()
+            values = {
+                'pwi4.version': '4.0.99-sim',
+                'response.timestamp_utc': clock.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f'),
+                'site.latitude_degs': self.lat,
+                'site.longitude_degs': self.lng,
+                'site.height_meters': self.alt_m,
+                'mount.is_connected': self.connected,
+                'mount.geometry': 0,
+                'mount.azimuth_degs': self.azimuth,
+                'mount.altitude_degs': self.altitude,
+                'mount.is_slewing': slewing,
+                'mount.is_tracking': self.tracking and not slewing,
+                'mount.ra_apparent_hours': 0.0,
+                'mount.dec_apparent_degs': 0.0,
+                'mount.ra_j2000_hours': 0.0,
+                'mount.dec_j2000_degs': 0.0,
+                'mount.target_ra_apparent_hours': 0.0,
+                'mount.target_dec_apparent_degs': 0.0,
+                'mount.field_angle_here_degs': 0.0,
+                'mount.field_angle_at_target_degs': 0.0,
+                'mount.field_angle_rate_at_target_degs_per_sec': 0.0,
+                'mount.path_angle_at_target_degs': 0.0,
+                'mount.path_angle_rate_at_target_degs_per_sec': 0.0,
+                'focuser.is_connected': False,
+                'focuser.is_enabled': False,
+                'focuser.position': 0,
+                'focuser.is_moving': False,
+                'rotator.is_connected': False,
+                'rotator.is_enabled': False,
+                'rotator.mech_position_degs': 0.0,
+                'rotator.field_angle_degs': 0.0,
+                'rotator.is_moving': False,
+                'rotator.is_slewing': False,
+                'm3.port': 0,
+                'autofocus.is_running': False,
+                'autofocus.success': False,
+                'autofocus.best_position': 0,
+                'autofocus.tolerance': 0,
+            }
+            for axis, position in ((0, self.azimuth), (1, self.altitude)):
+                values[f'mount.axis{axis}.is_enabled'] = self.enabled[axis]
+                values[f'mount.axis{axis}.rms_error_arcsec'] = 0.0
+                values[f'mount.axis{axis}.dist_to_target_arcsec'] = self.distance[axis]
+                values[f'mount.axis{axis}.servo_error_arcsec'] = 0.0
+                values[f'mount.axis{axis}.position_degs'] = position
+                values[f'mount.axis{axis}.position_timestamp'] = clock.time()
+        lines = []
+        for key, value in values.items():
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            lines.append(f"{key}={value}")
+        return "\n".join(lines) + "\n"
+
+
+class PWI4Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like PWI4
+    disable_nagle_algorithm = True
+    mount = None  # set by make_server
+    latency = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if self.latency:
+            time.sleep(self.latency)  # network latency is real time, also under a VirtualClock
+        try:
+            if url.path != '/status':
+                self.mount.command(url.path, params)
+            status, body = 200, self.mount.status_text()
+        except KeyError as e:
+            status, body = 404, f"Unknown command {e}"
+        except (ValueError, TypeError) as e:
+            status, body = 409, str(e)
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(mount: MountSimulator, host: str = '127.0.0.1', port: int = 8220, latency: float = 0.0):
+    """HTTP server answering the PWI4 API for `mount`; call serve_forever() (e.g. on a thread)."""
+    handler = type('BoundPWI4Handler', (PWI4Handler,), {'mount': mount, 'latency': latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(mount: MountSimulator, host: str = '127.0.0.1', port: int = 8220, latency: float = 0.0):
+    server = make_server(mount, host, port, latency)
+    threading.Thread(target=server.serve_forever, name='pwi4-sim', daemon=True).start()
+    return server
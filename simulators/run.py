@@ -0,0 +1,100 @@
+"""
+Run an observatory script against the simulators.
+
+    python -m simulators.run [options] script.py [script args...]
+    python -m simulators.run [options] --call module:function [args...]
+
+The PWI4 simulator listens on --pwi4-port, win32com / pythoncom resolve to
+the fakes in com_fakes, and pwi4_client falls back to simulators/vendor if
+PlaneWave's client is not installed. The script itself is not modified.
+
+With --virtual the run uses a clock.VirtualClock: sleeps and timeouts take
+no real time, so a whole night replays in about as long as the work done.
+"""
+import argparse
+import importlib
+import logging
+import os
+import runpy
+import sys
+from datetime import datetime
+
+import clock
+from simulators import com_fakes
+from simulators.pwi4_sim import MountSimulator, start_server
+
+SIMULATORS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIMULATORS_DIR)
+
+
+def install(args) -> MountSimulator:
+    """Start the PWI4 simulator, register the COM fakes and put the shims on sys.path."""
+    mount = MountSimulator(slew_rate=args.slew_rate, settle_seconds=args.settle)
+    if args.mount_ready:
+        mount.connected, mount.enabled = True, [True, True]
+    start_server(mount, port=args.pwi4_port, latency=args.pwi4_latency)
+    com_fakes.register(com_fakes.CAMERA_PROGID, com_fakes.FakeMaxImCamera(
+        readout_seconds=args.readout, save_seconds=args.save_latency, cooling_rate=args.cooling_rate,
+        image_bytes=args.image_bytes))
+    com_fakes.register(com_fakes.DOME_PROGID, com_fakes.FakeDomeControl(
+        shutter_seconds=args.shutter_seconds, rotation_rate=args.dome_rate, mount=mount))
+
+    sys.path.insert(0, os.path.join(SIMULATORS_DIR, 'shims'))
+    if REPO_DIR not in sys.path:
+        sys.path.insert(1, REPO_DIR)
+    sys.path.append(os.path.join(SIMULATORS_DIR, 'vendor'))  # last: a real pwi4_client wins
+
+    if args.virtual is not None:
+        # After the server thread has started, so it is not taken for a clock participant
+        start = datetime.strptime(args.virtual, "%Y-%m-%d %H:%M") if args.virtual else None
+        clock.install(clock.VirtualClock(start))
+        logging.Formatter.converter = lambda *unused: clock.now().timetuple()
+    return mount
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run a script against simulated PWI4, MaxIm and DDW.")
+    parser.add_argument('--pwi4-port', type=int, default=8220)
+    parser.add_argument('--pwi4-latency', type=float, default=0.0, help="extra seconds per PWI4 request")
+    parser.add_argument('--mount-ready', action='store_true',
+                        help="start with the mount connected and enabled, as after bring-up")
+    parser.add_argument('--slew-rate', type=float, default=6.0, help="mount slew rate, deg/s")
+    parser.add_argument('--settle', type=float, default=1.5, help="mount settle time, s")
+    parser.add_argument('--readout', type=float, default=0.5, help="camera readout time, s")
+    parser.add_argument('--save-latency', type=float, default=0.1, help="SaveImage time, s")
+    parser.add_argument('--image-bytes', type=int, default=0, help="data written per frame after the FITS header")
+    parser.add_argument('--cooling-rate', type=float, default=0.5, help="sensor temperature change, C/s")
+    parser.add_argument('--shutter-seconds', type=float, default=20.0, help="dome shutter open/close time, s")
+    parser.add_argument('--dome-rate', type=float, default=4.0, help="dome rotation rate, deg/s")
+    parser.add_argument('--virtual', nargs='?', const='', metavar='"YYYY-MM-DD HH:MM"',
+                        help="run on a virtual clock starting now or at the given local time")
+    parser.add_argument('--call', help="module:function to call (with the remaining arguments) instead of a script")
+    parser.add_argument('script', nargs='?')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if not args.call and not args.script:
+        parser.error("give a script or --call module:function")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    install(args)
+    if args.call:
+        module_name, function_name = args.call.split(':')
+        call_args = ([args.script] if args.script else []) + args.script_args
+        result = getattr(importlib.import_module(module_name), function_name)(*call_args)
+        if result is not None:
+            print(result)
+        return
+
+    script = os.path.abspath(args.script)
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script] + args.script_args
+    runpy.run_path(script, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""pythoncom stand-in; the fakes are plain thread-safe Python objects, so there is no apartment to join."""
+
+
+def CoInitialize():
+    pass
+
+
+def CoUninitialize():
+    pass
@@ -0,0 +1,2 @@
+"""win32com.client stand-in: Dispatch() hands out the simulators' fake COM objects."""
+from simulators.com_fakes import dispatch as Dispatch  # noqa: F401
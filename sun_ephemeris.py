@@ -0,0 +1,186 @@
+import math
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import pytz
+import clock
+
+# Coordinates for Cloudcroft, New Mexico
+SITE_LAT = 32.957313
+SITE_LNG = -105.742485
+MOUNTAIN_TIME = pytz.timezone('America/Denver')
+
+# Solar altitude (degrees) of the centre of the disc for each event.
+# Sunrise/sunset includes standard refraction and the solar semidiameter.
+SUNRISE_SUNSET_ALT = -0.833
+CIVIL_TWILIGHT_ALT = -6.0
+NAUTICAL_TWILIGHT_ALT = -12.0
+ASTRONOMICAL_TWILIGHT_ALT = -18.0
+
+EVENT_ALTITUDES = {
+    'sun': SUNRISE_SUNSET_ALT,
+    'civil': CIVIL_TWILIGHT_ALT,
+    'nautical': NAUTICAL_TWILIGHT_ALT,
+    'astronomical': ASTRONOMICAL_TWILIGHT_ALT,
+}
+
+
+def julian_day(dt_utc: datetime) -> float:
+    """Julian day for an aware (or naive UTC) datetime."""
+    if dt_utc.tzinfo is None:
+        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+    return dt_utc.timestamp() / 86400.0 + 2440587.5
+
+
+def solar_coordinates(jd: float) -> tuple:
+    """
+    Low-precision solar position (NOAA / Meeus), good to about a minute of time.
+
+    Returns:
+    tuple: (declination_degs, right_ascension_degs, equation_of_time_minutes)
+    """
+    t = (jd - 2451545.0) / 36525.0
+    mean_long = (280.46646 + t * (36000.76983 + t * 0.0003032)) % 360
+    mean_anom = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    ecc = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (math.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + math.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+              + math.sin(3 * mean_anom) * 0.000289)
+    omega = math.radians(125.04 - 1934.136 * t)
+    apparent_long = math.radians(mean_long + center - 0.00569 - 0.00478 * math.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliq = math.radians(mean_obliq + 0.00256 * math.cos(omega))
+
+    declination = math.degrees(math.asin(math.sin(obliq) * math.sin(apparent_long)))
+    right_ascension = math.degrees(math.atan2(math.cos(obliq) * math.sin(apparent_long), math.cos(apparent_long))) % 360
+
+    y = math.tan(obliq / 2) ** 2
+    l0 = math.radians(mean_long)
+    eq_time = 4 * math.degrees(y * math.sin(2 * l0)
+                               - 2 * ecc * math.sin(mean_anom)
+                               + 4 * ecc * y * math.sin(mean_anom) * math.cos(2 * l0)
+                               - 0.5 * y * y * math.sin(4 * l0)
+                               - 1.25 * ecc * ecc * math.sin(2 * mean_anom))
+    return declination, right_ascension, eq_time
+
+
+def sun_altitude(dt: datetime, lat: float = SITE_LAT, lng: float = SITE_LNG) -> float:
+    """Geometric altitude of the Sun in degrees at the given time and place."""
+    jd = julian_day(dt)
+    declination, _, eq_time = solar_coordinates(jd)
+    utc = dt.astimezone(timezone.utc) if dt.tzinfo else dt
+    minutes = utc.hour * 60 + utc.minute + utc.second / 60.0
+    hour_angle = math.radians(((minutes + eq_time + 4 * lng) / 4.0) - 180.0)
+    lat_r = math.radians(lat)
+    dec_r = math.radians(declination)
+    sin_alt = (math.sin(lat_r) * math.sin(dec_r)
+               + math.cos(lat_r) * math.cos(dec_r) * math.cos(hour_angle))
+    return math.degrees(math.asin(max(-1.0, min(1.0, sin_alt))))
+
+
+def _event_utc(local_date, altitude: float, rising: bool, lat: float, lng: float):
+    """
+    UTC time the Sun's centre crosses `altitude` on the given local date.
+
+    Solar noon for a western-hemisphere site falls on the same UTC date, so
+    every event is expressed as minutes after UTC midnight of `local_date`
+    (sunset may spill past 24:00). Returns None if the Sun never reaches the
+    altitude on that date.
+    """
+    midnight_utc = datetime(local_date.year, local_date.month, local_date.day, tzinfo=timezone.utc)
+    lat_r = math.radians(lat)
+    event_minutes = 720 - 4 * lng  # first guess: local solar noon
+
+    # A few refinement passes are plenty for a minute-level result.
+    for _ in range(3):
+        jd = julian_day(midnight_utc + timedelta(minutes=event_minutes))
+        declination, _, eq_time = solar_coordinates(jd)
+        dec_r = math.radians(declination)
+        cos_ha = ((math.sin(math.radians(altitude)) - math.sin(lat_r) * math.sin(dec_r))
+                  / (math.cos(lat_r) * math.cos(dec_r)))
+        if cos_ha < -1.0 or cos_ha > 1.0:
+            return None
+        hour_angle = math.degrees(math.acos(cos_ha))
+        if rising:
+            hour_angle = -hour_angle
+        event_minutes = 720 - 4 * (lng - hour_angle) - eq_time
+
+    return midnight_utc + timedelta(minutes=event_minutes)
+
+
+@lru_cache(maxsize=64)
+def solar_events(local_date, lat: float = SITE_LAT, lng: float = SITE_LNG) -> dict:
+    """
+    Sunrise, sunset and twilight times for a local calendar date.
+
+    Results are memoized per (date, site), so repeated calls during a night
+    cost nothing and need no network access.
+
+    Returns:
+    dict: keys 'sunrise', 'sunset', '<kind>_dawn' and '<kind>_dusk' for
+    kind in civil/nautical/astronomical, as aware America/Denver datetimes
+    (None where the Sun never reaches that altitude).
+    """
+    events = {}
+    for kind, altitude in EVENT_ALTITUDES.items():
+        rise = _event_utc(local_date, altitude, True, lat, lng)
+        set_ = _event_utc(local_date, altitude, False, lat, lng)
+        rise = rise.astimezone(MOUNTAIN_TIME) if rise else None
+        set_ = set_.astimezone(MOUNTAIN_TIME) if set_ else None
+        if kind == 'sun':
+            events['sunrise'], events['sunset'] = rise, set_
+        else:
+            events[f'{kind}_dawn'], events[f'{kind}_dusk'] = rise, set_
+    return events
+
+
+def sun_times(now: datetime = None) -> tuple:
+    """
+    Tonight's observing bounds in local time.
+
+    Returns:
+    tuple: (sunrise_local, sunset_local) - tomorrow's sunrise and today's
+    sunset, the same shape the sunrise-sunset.org lookup used to return.
+    """
+    if now is None:
+        now = clock.now(MOUNTAIN_TIME)
+    today = now.astimezone(MOUNTAIN_TIME).date()
+    tomorrow = today + timedelta(days=1)
+    return solar_events(tomorrow)['sunrise'], solar_events(today)['sunset']
+
+
+def current_night(now: datetime = None):
+    """
+    Local date of the night in progress (or about to start).
+
+    The observing night straddles midnight, so anything before local noon
+    still belongs to the previous evening's night.
+    """
+    if now is None:
+        now = clock.now(MOUNTAIN_TIME)
+    return (now.astimezone(MOUNTAIN_TIME) - timedelta(hours=12)).date()
+
+
+def twilight_times(now: datetime = None, kind: str = 'astronomical') -> tuple:
+    """
+    Tonight's twilight bounds in local time.
+
+    Returns:
+    tuple: (dawn_local, dusk_local) - tomorrow's dawn and today's dusk for
+    the requested twilight kind (civil, nautical or astronomical).
+    """
+    if now is None:
+        now = clock.now(MOUNTAIN_TIME)
+    today = now.astimezone(MOUNTAIN_TIME).date()
+    tomorrow = today + timedelta(days=1)
+    return solar_events(tomorrow)[f'{kind}_dawn'], solar_events(today)[f'{kind}_dusk']
+
+
+if __name__ == "__main__":
+    sunrise, sunset = sun_times()
+    print(f"Sunset today:     {sunset.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    for kind in ('civil', 'nautical', 'astronomical'):
+        dawn, dusk = twilight_times(kind=kind)
+        print(f"{kind.capitalize():<13} dusk: {dusk.strftime('%H:%M:%S')}  dawn: {dawn.strftime('%H:%M:%S')}")
+    print(f"Sunrise tomorrow: {sunrise.strftime('%Y-%m-%d %H:%M:%S %Z')}")
@@ -0,0 +1,244 @@
+"""
+Timing spans for the observing pipeline.
+
+    import telemetry
+    with telemetry.span('observer.save', target=entry.name):
+        cam.SaveImage(path)
+    telemetry.record('observer.time_to_lock', seconds)  # a duration measured elsewhere
+
+Recording a span only appends a tuple to an in-memory ring, so it is cheap
+enough for every frame. start_flusher() drains the ring every few seconds on
+a background thread: spans are appended to spans-<label>-<night>.jsonl and
+the per-span totals are rewritten to metrics-<label>.prom in the Prometheus
+text format (for node_exporter's textfile collector, or just for reading).
+Each process passes its own label, so the planner and the observer sharing
+telemetry/ do not overwrite each other's files. Durations are
+in clock time, so a night replayed on a virtual clock reports simulated
+seconds. format_summary() is the per-night table of where the time went.
+"""
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+import clock
+from sun_ephemeris import current_night
+
+# Upper bounds of the Prometheus histogram buckets, in seconds
+BUCKETS_S = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60, 300, float('inf'))
+
+
+class SpanStats:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_S)
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def add(self, seconds: float):
+        for i, bound in enumerate(BUCKETS_S):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (s) of the bucket holding the given fraction of spans."""
+        running = 0
+        for bound, count in zip(BUCKETS_S, self.counts):
+            running += count
+            if running >= fraction * self.count and count:
+                return bound
+        return 0.0
+
+
+class Recorder:
+    """
+    Ring of finished spans plus running totals per span name.
+
+    record() may be called from any thread; deque appends are atomic, so the
+    hot path takes no lock. When more than `capacity` spans pile up between
+    drains the oldest are lost and counted (roughly) in `dropped`.
+    """
+    def __init__(self, capacity: int = 65536):
+        self.ring = deque(maxlen=capacity)
+        self.dropped = 0
+        self.stats = {}  # name -> SpanStats, over every drained span
+        self.started_at = None
+        self.lock = threading.Lock()  # serializes drains
+
+    def reset(self):
+        """Forget everything recorded so far and start the elapsed time now."""
+        with self.lock:
+            self.ring.clear()
+            self.stats = {}
+            self.dropped = 0
+            self.started_at = clock.time()
+
+    def record(self, name: str, duration: float, start: float = None, **attrs):
+        if len(self.ring) == self.ring.maxlen:
+            self.dropped += 1
+        self.ring.append((name, clock.time() - duration if start is None else start, duration, attrs))
+
+    def span(self, name: str, **attrs) -> 'Span':
+        return Span(self, name, attrs)
+
+    def drain(self) -> list:
+        """Take the spans recorded since the last drain and fold them into the totals."""
+        with self.lock:
+            spans = []
+            while True:
+                try:
+                    spans.append(self.ring.popleft())
+                except IndexError:
+                    break
+            for name, _, duration, _ in spans:
+                stats = self.stats.get(name)
+                if stats is None:
+                    stats = self.stats[name] = SpanStats()
+                stats.add(duration)
+            return spans
+
+    def prometheus_text(self) -> str:
+        lines = ["# HELP autosat_span_seconds Time spent in each instrumented stage.",
+                 "# TYPE autosat_span_seconds histogram"]
+        for name, stats in sorted(self.stats.items()):
+            running = 0
+            for bound, count in zip(BUCKETS_S, stats.counts):
+                running += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'autosat_span_seconds_bucket{{span="{name}",le="{le}"}} {running}')
+            lines.append(f'autosat_span_seconds_sum{{span="{name}"}} {stats.total_s:.6f}')
+            lines.append(f'autosat_span_seconds_count{{span="{name}"}} {stats.count}')
+        lines += ["# HELP autosat_spans_dropped_total Spans lost because the ring filled between flushes.",
+                  "# TYPE autosat_spans_dropped_total counter",
+                  f"autosat_spans_dropped_total {self.dropped}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Per-span totals, largest first, with their share of the time since reset()."""
+        elapsed = max(clock.time() - (self.started_at or clock.time()), 1e-9)
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'dropped': self.dropped,
+            'spans': {name: {'count': stats.count, 'total_s': round(stats.total_s, 3),
+                             'share': round(stats.total_s / elapsed, 4),
+                             'mean_ms': round(1000 * stats.total_s / stats.count, 2),
+                             'p99_s': stats.percentile(0.99), 'max_s': round(stats.max_s, 3)}
+                      for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total_s)},
+        }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = [f"{'span':<28} {'count':>7} {'total s':>10} {'share':>7} {'mean ms':>9} {'max s':>8}"]
+        for name, stats in summary['spans'].items():
+            lines.append(f"{name:<28} {stats['count']:>7} {stats['total_s']:>10.1f} {stats['share']:>7.1%} "
+                         f"{stats['mean_ms']:>9.1f} {stats['max_s']:>8.2f}")
+        lines.append(f"Elapsed {summary['elapsed_s']:.1f} s; nested spans overlap their parents"
+                     + (f"; {summary['dropped']} spans dropped" if summary['dropped'] else ""))
+        return "\n".join(lines)
+
+
+class Span:
+    """Context manager that records its own duration; an exception is noted in the 'error' attribute."""
+    __slots__ = ('recorder', 'name', 'attrs', 'started', 'start_time')
+
+    def __init__(self, recorder: Recorder, name: str, attrs: dict):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start_time = clock.time()
+        self.started = clock.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.recorder.record(self.name, clock.monotonic() - self.started, self.start_time, **self.attrs)
+        return False
+
+
+class Flusher:
+    """Background thread writing the recorder out every `interval` seconds of clock time."""
+    def __init__(self, recorder: Recorder, directory: str = 'telemetry', interval: float = 10, label: str = None):
+        self.recorder = recorder
+        self.directory = directory
+        self.interval = interval
+        self.label = label
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name='telemetry-flush', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the thread and write out whatever is left, including summary-<label>-<night>.json."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        with open(self._path('summary', f"-{current_night():%Y%m%d}.json"), 'w') as file:
+            json.dump(self.recorder.summary(), file, indent=2)
+
+    def _path(self, kind: str, suffix: str) -> str:
+        # e.g. telemetry/spans-observer-20240302.jsonl
+        name = kind if self.label is None else f"{kind}-{self.label}"
+        return os.path.join(self.directory, name + suffix)
+
+    def _run(self):
+        while not clock.wait_event(self.stopped, self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Telemetry flush failed: {e}")
+
+    def flush(self):
+        spans = self.recorder.drain()
+        if spans:
+            with open(self._path('spans', f"-{current_night():%Y%m%d}.jsonl"), 'a') as file:
+                for name, start, duration, attrs in spans:
+                    file.write(json.dumps({'span': name, 'start': round(start, 6), 'duration_s': round(duration, 6),
+                                           **attrs}, default=str) + "\n")
+        # Renamed into place so a scraper never reads half a file
+        metrics = self._path('metrics', '.prom')
+        with open(metrics + '.tmp', 'w') as file:
+            file.write(self.recorder.prometheus_text())
+        os.replace(metrics + '.tmp', metrics)
+
+
+_recorder = Recorder()
+
+
+def get() -> Recorder:
+    return _recorder
+
+
+def span(name: str, **attrs) -> Span:
+    return Span(_recorder, name, attrs)
+
+
+def record(name: str, duration: float, start: float = None, **attrs):
+    _recorder.record(name, duration, start, **attrs)
+
+
+def start_flusher(directory: str = 'telemetry', interval: float = 10, label: str = None) -> Flusher:
+    """
+    Reset the shared recorder and write it to `directory` every `interval`
+    seconds until stop(). `label` names this process in the file names.
+    """
+    _recorder.reset()
+    flusher = Flusher(_recorder, directory, interval, label)
+    flusher.start()
+    return flusher
+
+
+def format_summary() -> str:
+    _recorder.drain()
+    return _recorder.format_summary()
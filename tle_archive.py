@@ -0,0 +1,345 @@
+"""
+Append-only history of every TLE the planner has fetched.
+
+get_tle() adds each element set it receives; a set already archived for the
+same object and epoch is skipped. The archive lives in tle_archive/:
+
+    journal.bin    new element sets, appended as fixed-size NumPy records
+    elements.npz   compacted columns (one array per field), sorted by NORAD ID
+                   then epoch, so any lookup is two binary searches
+
+compact() folds the journal into elements.npz, drops duplicates and applies
+the retention policy: element sets older than `keep_days` are deleted, but
+the newest one of every object is always kept, so there is something to plan
+from when N2YO cannot be reached. Epochs are Unix seconds (UTC).
+
+    python tle_archive.py lookup 25544 --before 2024-03-02T06:00
+    python tle_archive.py history 25544
+    python tle_archive.py compact --keep-days 90
+
+The planner, the planner service and the CLI may all use one archive, so
+appends and compaction hold an exclusive lock on tle_archive/archive.lock
+and compact() merges what is on disk rather than its own view.
+"""
+import argparse
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import clock
+from tle_elements import TleRecord, from_tle_data
+
+ARCHIVE_DIR = 'tle_archive'
+KEEP_DAYS = 180
+COMPACT_AFTER = 20000  # journal records before flush() compacts on its own
+
+# One archived element set. Angles in degrees, mean motion in rev/day.
+RECORD = np.dtype([
+    ('norad_id', '<i4'),
+    ('epoch', '<f8'),
+    ('fetched', '<f8'),
+    ('mean_motion', '<f8'),
+    ('eccentricity', '<f8'),
+    ('inclination', '<f4'),
+    ('raan', '<f4'),
+    ('arg_perigee', '<f4'),
+    ('mean_anomaly', '<f4'),
+    ('bstar', '<f4'),
+    ('name', 'S24'),
+    ('line1', 'S69'),
+    ('line2', 'S69'),
+])
+
+_archive = None
+
+
+@contextmanager
+def file_lock(filename: str):
+    """Hold an exclusive lock on `filename` (created if missing), across processes."""
+    with open(filename, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # gives up after 10 s, so retry
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def archive_record(record: TleRecord, fetched: float = None) -> tuple:
+    """One RECORD, as a tuple in field order, from a parsed element set."""
+    return (
+        record.norad_id,
+        record.epoch,
+        clock.time() if fetched is None else fetched,
+        record.mean_motion,
+        record.eccentricity,
+        record.inclination,
+        record.raan,
+        record.arg_perigee,
+        record.mean_anomaly,
+        record.bstar,
+        (record.name or '').encode('ascii', 'replace')[:24],
+        record.line1.encode('ascii'),
+        record.line2.encode('ascii'),
+    )
+
+
+def _sort_unique(records: np.ndarray) -> np.ndarray:
+    # Sorted by (norad_id, epoch); of several copies of one element set the first fetched is kept
+    records = records[np.lexsort((records['fetched'], records['epoch'], records['norad_id']))]
+    if len(records) > 1:
+        same = (records['norad_id'][1:] == records['norad_id'][:-1]) & (records['epoch'][1:] == records['epoch'][:-1])
+        records = records[np.r_[True, ~same]]
+    return records
+
+
+def row_dict(record) -> dict:
+    """A RECORD as a plain dict, with text decoded and the epoch as an aware datetime."""
+    row = {name: record[name].item() for name in RECORD.names}
+    for name in ('name', 'line1', 'line2'):
+        row[name] = row[name].decode('ascii')
+    row['epoch'] = datetime.fromtimestamp(row['epoch'], timezone.utc)
+    row['fetched'] = datetime.fromtimestamp(row['fetched'], timezone.utc)
+    return row
+
+
+def tle_data(row: dict) -> dict:
+    """An archived element set shaped like an N2YO /tle response, for the planner."""
+    return {'info': {'satid': row['norad_id'], 'satname': row['name'], 'transactionscount': 0},
+            'tle': f"{row['line1']}\r\n{row['line2']}"}
+
+
+class TleArchive:
+    """
+    The archive in `directory`. add() only buffers; flush() appends the
+    buffer to the journal in one write, so the planner pays one small write
+    per fetch rather than one per TLE.
+    """
+    def __init__(self, directory: str = ARCHIVE_DIR, keep_days: float = KEEP_DAYS,
+                 compact_after: int = COMPACT_AFTER):
+        self.directory = directory
+        self.keep_days = keep_days
+        self.compact_after = compact_after
+        self.base_file = os.path.join(directory, 'elements.npz')
+        self.journal_file = os.path.join(directory, 'journal.bin')
+        self.lock_file = os.path.join(directory, 'archive.lock')
+        self.lock = threading.Lock()
+        self.base = None      # sorted RECORD array from elements.npz
+        self.journal = None   # RECORD array, in append order
+        self.latest = None    # norad_id -> newest archived epoch
+        self.pending = []     # archive_record() tuples not yet in the journal
+
+    def _load(self):
+        if self.base is not None:
+            return
+        self.base, self.journal = self._read()
+        self._index()
+
+    def _read(self) -> tuple:
+        # (base, journal) as they are on disk now
+        if os.path.exists(self.base_file):
+            with np.load(self.base_file) as columns:
+                base = np.empty(len(columns['norad_id']), dtype=RECORD)
+                for name in RECORD.names:
+                    base[name] = columns[name]
+        else:
+            base = np.empty(0, dtype=RECORD)
+        journal = np.empty(0, dtype=RECORD)
+        if os.path.exists(self.journal_file):
+            raw = np.fromfile(self.journal_file, dtype=np.uint8)
+            # A write cut short by a crash leaves a partial record at the end
+            whole = len(raw) - len(raw) % RECORD.itemsize
+            journal = raw[:whole].view(RECORD).copy()
+        return base, journal
+
+    def _index(self):
+        # latest from the loaded records, plus what is still pending
+        pending = np.array(self.pending, dtype=RECORD)
+        ids = np.concatenate([self.base['norad_id'], self.journal['norad_id'], pending['norad_id']])
+        epochs = np.concatenate([self.base['epoch'], self.journal['epoch'], pending['epoch']])
+        order = np.lexsort((epochs, ids))
+        ids, epochs = ids[order], epochs[order]
+        last = np.r_[ids[1:] != ids[:-1], True] if len(ids) else np.zeros(0, bool)
+        self.latest = dict(zip(ids[last].tolist(), epochs[last].tolist()))
+
+    def _records_of(self, norad_id: int) -> list:
+        # Base slice (sorted by epoch), then journal and pending records of one object
+        low, high = np.searchsorted(self.base['norad_id'], [norad_id, norad_id + 1])
+        pending = np.array([record for record in self.pending if record[0] == norad_id], dtype=RECORD)
+        return [self.base[low:high], self.journal[self.journal['norad_id'] == norad_id], pending]
+
+    def add(self, record: TleRecord, fetched: float = None) -> bool:
+        """Buffer one element set; False if this object's newest archived set already has that epoch."""
+        norad_id, epoch = record.norad_id, record.epoch
+        record = archive_record(record, fetched)
+        with self.lock:
+            self._load()
+            if self.latest.get(norad_id) == epoch:
+                return False
+            # An older epoch than the newest is still kept; compact() removes it if it was a repeat
+            self.latest[norad_id] = max(epoch, self.latest.get(norad_id, -np.inf))
+            self.pending.append(record)
+            return True
+
+    def add_tle_data(self, data: dict) -> bool:
+        """add() for an N2YO /tle response."""
+        return self.add(from_tle_data(data))
+
+    def flush(self):
+        """Append the buffered element sets to the journal, compacting once it has grown large."""
+        with self.lock:
+            if not self.pending:
+                return
+            records = np.array(self.pending, dtype=RECORD)
+            self.pending = []
+            os.makedirs(self.directory, exist_ok=True)
+            with file_lock(self.lock_file):
+                with open(self.journal_file, 'ab') as file:
+                    file.write(records.tobytes())
+                    # Counts what other processes appended as well
+                    compact = file.tell() // RECORD.itemsize >= self.compact_after
+            self.journal = np.concatenate([self.journal, records])
+        if compact:
+            self.compact()
+
+    def compact(self, keep_days: float = None) -> dict:
+        """
+        Fold the journal into elements.npz, de-duplicate and apply retention.
+
+        Returns:
+        dict: rows before and after, and how many were dropped as duplicates
+        or for age.
+        """
+        keep_days = self.keep_days if keep_days is None else keep_days
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with file_lock(self.lock_file):
+                # Re-read under the lock: another process may have appended or compacted since _load()
+                base, journal = self._read()
+                merged = np.concatenate([base, journal])
+                unique = _sort_unique(merged)
+                newest = np.r_[unique['norad_id'][1:] != unique['norad_id'][:-1], True] if len(unique) else np.zeros(0, bool)
+                kept = unique[newest | (unique['epoch'] >= clock.time() - keep_days * 86400)]
+                temp_file = self.base_file + '.tmp.npz'
+                np.savez_compressed(temp_file, **{name: kept[name] for name in RECORD.names})
+                os.replace(temp_file, self.base_file)
+                # After the base is safely in place; a crash in between only leaves duplicates
+                open(self.journal_file, 'wb').close()
+            self.base, self.journal = kept, np.empty(0, dtype=RECORD)
+            self._index()
+        stats = {'before': len(merged), 'after': len(kept), 'duplicates': len(merged) - len(unique),
+                 'expired': len(unique) - len(kept)}
+        logging.info(f"TLE archive compacted: {stats}")
+        return stats
+
+    def history(self, norad_id: int) -> np.ndarray:
+        """Every archived element set of `norad_id`, oldest epoch first."""
+        with self.lock:
+            self._load()
+            records = np.concatenate(self._records_of(int(norad_id)))
+        return _sort_unique(records)
+
+    def lookup(self, norad_id: int, before=None) -> dict:
+        """
+        The freshest element set of `norad_id` with an epoch at or before
+        `before` (an aware datetime or Unix seconds; default: any), or None.
+        """
+        if isinstance(before, datetime):
+            before = before.timestamp()
+        before = np.inf if before is None else before
+        with self.lock:
+            self._load()
+            base, *unsorted = self._records_of(int(norad_id))
+        best = None
+        index = np.searchsorted(base['epoch'], before, side='right') - 1
+        if index >= 0:
+            best = base[index]
+        for records in unsorted:
+            eligible = records[records['epoch'] <= before]
+            if len(eligible):
+                candidate = eligible[np.argmax(eligible['epoch'])]
+                if best is None or candidate['epoch'] > best['epoch']:
+                    best = candidate
+        return None if best is None else row_dict(best)
+
+    def stats(self) -> dict:
+        with self.lock:
+            self._load()
+            objects = len(self.latest)
+            rows = len(self.base) + len(self.journal) + len(self.pending)
+        size = sum(os.path.getsize(f) for f in (self.base_file, self.journal_file) if os.path.exists(f))
+        return {'objects': objects, 'element_sets': rows, 'journal': len(self.journal), 'bytes': size}
+
+
+def get_archive() -> TleArchive:
+    """The shared archive, loaded from disk the first time it is needed."""
+    global _archive
+    if _archive is None:
+        _archive = TleArchive()
+    return _archive
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and maintain the TLE history archive.')
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help=f'Archive directory (default: {ARCHIVE_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    lookup = commands.add_parser('lookup', help='Freshest element set at or before a time')
+    lookup.add_argument('norad_id', type=int)
+    lookup.add_argument('--before', type=datetime.fromisoformat, help='UTC time, e.g. 2024-03-02T06:00 (default: now)')
+    history = commands.add_parser('history', help='Every archived epoch of one object, with element drift')
+    history.add_argument('norad_id', type=int)
+    compact = commands.add_parser('compact', help='Fold the journal in and apply retention')
+    compact.add_argument('--keep-days', type=float, default=KEEP_DAYS, help=f'Days of history to keep (default: {KEEP_DAYS})')
+    commands.add_parser('stats', help='Objects, element sets and size on disk')
+    args = parser.parse_args(argv)
+
+    archive = TleArchive(args.dir)
+    if args.command == 'lookup':
+        before = args.before.replace(tzinfo=timezone.utc) if args.before else None
+        row = archive.lookup(args.norad_id, before)
+        if row is None:
+            print(f"No element set for {args.norad_id}" + (f" before {before}" if before else ""))
+            return
+        print(f"{row['norad_id']} {row['name']}  epoch {row['epoch']:%Y-%m-%d %H:%M:%S} UTC")
+        print(row['line1'])
+        print(row['line2'])
+    elif args.command == 'history':
+        records = archive.history(args.norad_id)
+        print(f"{'epoch (UTC)':<19} {'rev/day':>12} {'d rev/day':>11} {'ecc':>9} {'incl':>8} {'raan':>8} {'bstar':>11}")
+        previous = None
+        for record in records:
+            drift = '' if previous is None else f"{record['mean_motion'] - previous:+.8f}"
+            print(f"{datetime.fromtimestamp(record['epoch'], timezone.utc):%Y-%m-%d %H:%M:%S} "
+                  f"{record['mean_motion']:>12.8f} {drift:>11} {record['eccentricity']:>9.7f} "
+                  f"{record['inclination']:>8.4f} {record['raan']:>8.4f} {record['bstar']:>11.4e}")
+            previous = record['mean_motion']
+    elif args.command == 'compact':
+        print(archive.compact(args.keep_days))
+    else:
+        print(archive.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Two-line element sets parsed once into numbers.
+
+    record = from_tle_data(n2yo_response)   # or parse_tle(line1, line2, name)
+    record.norad_id, record.epoch, record.mean_motion, record.line1
+
+Fields are sliced from the fixed TLE columns and both lines' mod-10
+checksums are verified, so a garbled element set fails here instead of
+somewhere downstream. The original lines are kept for tleplan.txt and SGP4.
+Epochs are Unix seconds (UTC); angles are degrees and mean motion rev/day.
+benchmarks/bench_tle_parse.py measures catalog parsing in objects per second.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# bytes.translate table for the checksum: digits count their value, '-' counts 1, anything else 0
+_CHECKSUM_TABLE = bytes((ch - 48) if 48 <= ch <= 57 else 1 if ch == 45 else 0 for ch in range(256))
+_ALPHA5 = 'ABCDEFGHJKLMNPQRSTUVWXYZ'  # Alpha-5 catalog numbers skip I and O
+NUMERIC_FIELDS = ('epoch', 'ndot', 'nddot', 'bstar', 'inclination', 'raan', 'eccentricity', 'arg_perigee',
+                  'mean_anomaly', 'mean_motion')
+
+
+class TleError(ValueError):
+    """An element set that is malformed or fails its checksum."""
+
+
+def checksum(line: str) -> int:
+    """Mod-10 checksum of the first 68 columns of a TLE line."""
+    return sum(line[:68].encode('ascii').translate(_CHECKSUM_TABLE)) % 10
+
+
+def norad_id(line1: str) -> int:
+    """Catalog number from columns 3-7 of either line (Alpha-5 numbers such as 'A0001' included)."""
+    field = line1[2:7]
+    if field[:1].isalpha():
+        return (_ALPHA5.index(field[0].upper()) + 10) * 10000 + int(field[1:])
+    return int(field)
+
+
+def implied_decimal(field: str) -> float:
+    """TLE shorthand for a signed mantissa and exponent: ' 12345-4' is 0.12345e-4."""
+    field = field.strip()
+    if not field:
+        return 0.0
+    sign = '-' if field[0] == '-' else ''
+    field = field.lstrip('+-')
+    return float(f"{sign}0.{field[:-2]}e{field[-2:]}")
+
+
+@lru_cache(maxsize=None)
+def _year_start(two_digit_year: str) -> float:
+    year = int(two_digit_year)
+    year += 2000 if year < 57 else 1900
+    return datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def tle_epoch(line1: str) -> float:
+    """Epoch of TLE line 1 in Unix seconds."""
+    return _year_start(line1[18:20]) + (float(line1[20:32]) - 1) * 86400.0
+
+
+def tle_lines(text: str) -> tuple:
+    """(line1, line2) from TLE text with any line endings, e.g. N2YO's 'line1\\r\\nline2'."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    lines = [line for line in lines if line[:2] in ('1 ', '2 ')]
+    if len(lines) < 2:
+        raise TleError(f"Expected two TLE lines, got {text!r}")
+    return lines[0], lines[1]
+
+
+class TleRecord:
+    __slots__ = ('name', 'line1', 'line2', 'norad_id', 'classification', 'intl_designator', 'epoch',
+                 'ndot', 'nddot', 'bstar', 'element_set', 'inclination', 'raan', 'eccentricity',
+                 'arg_perigee', 'mean_anomaly', 'mean_motion', 'rev_number')
+
+    def __init__(self, line1: str, line2: str, name: str = None, verify: bool = True):
+        if len(line1) < 69 or len(line2) < 69 or line1[0] != '1' or line2[0] != '2':
+            raise TleError(f"Not a TLE: {line1!r} / {line2!r}")
+        if verify:
+            for line in (line1, line2):
+                if not line[68].isdigit() or checksum(line) != int(line[68]):
+                    raise TleError(f"Checksum mismatch (expected {checksum(line)}): {line!r}")
+        if line1[2:7] != line2[2:7]:
+            raise TleError(f"Catalog numbers of the two lines differ: {line1[2:7]!r} / {line2[2:7]!r}")
+        try:
+            self.norad_id = norad_id(line1)
+            self.classification = line1[7]
+            self.intl_designator = line1[9:17].strip()
+            self.epoch = tle_epoch(line1)
+            self.ndot = float(line1[33:43])
+            self.nddot = implied_decimal(line1[44:52])
+            self.bstar = implied_decimal(line1[53:61])
+            self.element_set = int(line1[64:68] or 0)
+            self.inclination = float(line2[8:16])
+            self.raan = float(line2[17:25])
+            self.eccentricity = float('0.' + line2[26:33].strip())
+            self.arg_perigee = float(line2[34:42])
+            self.mean_anomaly = float(line2[43:51])
+            self.mean_motion = float(line2[52:63])
+            self.rev_number = int(line2[63:68] or 0)
+        except ValueError as e:
+            raise TleError(f"Bad TLE field ({e}): {line1!r} / {line2!r}") from None
+        self.name = name or line1[2:7].strip()
+        self.line1 = line1
+        self.line2 = line2
+
+    @property
+    def epoch_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.epoch, timezone.utc)
+
+    @property
+    def period_min(self) -> float:
+        return 1440.0 / self.mean_motion
+
+    def __repr__(self):
+        return f"TleRecord({self.norad_id} {self.name!r}, epoch {self.epoch_datetime:%Y-%m-%d %H:%M:%S})"
+
+
+def parse_tle(line1: str, line2: str, name: str = None, verify: bool = True) -> TleRecord:
+    return TleRecord(line1, line2, name, verify)
+
+
+def from_tle_data(tle_data: dict, verify: bool = True) -> TleRecord:
+    """The record for an N2YO /tle response."""
+    line1, line2 = tle_lines(tle_data['tle'])
+    return TleRecord(line1, line2, tle_data['info'].get('satname'), verify)
+
+
+def parse_catalog(text: str, verify: bool = True, errors: list = None) -> list:
+    """
+    Records for a 2-line or 3-line catalog ('0 NAME' or bare name lines).
+
+    Element sets that fail to parse are skipped; pass a list as `errors` to
+    collect the TleErrors.
+    """
+    records = []
+    name = line1 = None
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line:
+            continue
+        if line.startswith('1 ') and len(line) >= 69:
+            line1 = line
+        elif line.startswith('2 ') and len(line) >= 69 and line1 is not None:
+            try:
+                records.append(TleRecord(line1, line, name, verify))
+            except TleError as e:
+                if errors is not None:
+                    errors.append(e)
+            name = line1 = None
+        else:
+            name = line[2:].strip() if line.startswith('0 ') else line.strip()
+    return records
+
+
+def to_arrays(records: list) -> dict:
+    """The numeric fields of many records as NumPy columns, for vectorized work."""
+    import numpy as np
+    columns = {'norad_id': np.fromiter((record.norad_id for record in records), np.int32, len(records))}
+    for field in NUMERIC_FIELDS:
+        columns[field] = np.fromiter((getattr(record, field) for record in records), np.float64, len(records))
+    return columns
@@ -0,0 +1,86 @@
+import argparse
+import os
+import time
+from datetime import datetime
+import pytz
+import requests
+from api_interaction import utc_to_mst
+from pass_finder import find_passes, night_windows, prefilter_catalog, rank_passes, read_tle_catalog
+
+CATALOG_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle"
+CATALOG_FILENAME = "catalog.txt"
+RECORD_FILENAME = "satellite_passes_record.txt"
+
+
+def load_catalog(filename: str, url: str = CATALOG_URL) -> list:
+    """Read the TLE catalog from disk, downloading it once if it is missing."""
+    if not os.path.exists(filename):
+        print(f"Downloading catalog from {url}...")
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        with open(filename, 'w') as file:
+            file.write(response.text)
+    with open(filename, 'r') as file:
+        return read_tle_catalog(file.read())
+
+
+def write_passes_record(passes: list, filename: str = RECORD_FILENAME):
+    """
+    Append ranked passes to the record file in the satellite_passes_record format.
+
+    Satellites are listed best pass first; each satellite's passes are in time order.
+    """
+    by_satellite = {}
+    for p in rank_passes(passes):
+        by_satellite.setdefault(p['norad_id'], []).append(p)
+
+    with open(filename, "a") as file:
+        file.write(f"\n--- Satellite Passes Recorded at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} MST ---\n")
+        for sat_id, sat_passes in by_satellite.items():
+            file.write(f"\nSatellite NORAD ID: {sat_id}\n")
+            for p in sorted(sat_passes, key=lambda p: p['start']):
+                pass_start_mst = utc_to_mst(p['start'])
+                file.write(f"  Visible pass starts at: {pass_start_mst.strftime('%Y-%m-%d %H:%M:%S')} MST\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find tonight's visible satellite passes across a full TLE catalog.")
+    parser.add_argument('--catalog', default=CATALOG_FILENAME, help='TLE catalog file (downloaded from CelesTrak if missing)')
+    parser.add_argument('--catalog-url', default=CATALOG_URL, help='Where to download the catalog from')
+    parser.add_argument('--start', default=None, help='First local night to search, YYYY-MM-DD (default: tonight)')
+    parser.add_argument('--days', type=int, default=1, help='Number of nights to search (default: 1)')
+    parser.add_argument('--min-elevation', type=float, default=10.0, help='Minimum elevation in degrees (default: 10)')
+    parser.add_argument('--min-duration', type=float, default=60.0, help='Minimum visible duration in seconds (default: 60)')
+    parser.add_argument('--step', type=float, default=30.0, help='Coarse propagation step in seconds (default: 30)')
+    parser.add_argument('--twilight', default='civil', choices=['civil', 'nautical', 'astronomical'], help='Darkness required at the site')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--max-period', type=float, default=None, help='Skip objects with an orbital period of this many minutes or more (default: keep all)')
+    parser.add_argument('--top', type=int, default=None, help='Only record the N best passes')
+    parser.add_argument('--output', default=RECORD_FILENAME, help='Record file to append to')
+    args = parser.parse_args()
+
+    if args.start:
+        start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
+    else:
+        start_date = datetime.now(pytz.timezone('America/Denver')).date()
+
+    started = time.perf_counter()
+    catalog = load_catalog(args.catalog, args.catalog_url)
+    survivors, stats = prefilter_catalog(catalog, min_elevation=args.min_elevation, max_period=args.max_period)
+    print(f"Catalog: {stats['total']} objects, pruned {stats['decayed']} decayed, {stats['long_period']} long-period, "
+          f"{stats['latitude']} never above {args.min_elevation:g} deg; propagating {stats['survivors']}")
+
+    windows = night_windows(start_date, args.days, args.twilight)
+    passes = find_passes(survivors, windows, min_elevation=args.min_elevation, step_s=args.step,
+                         min_duration_s=args.min_duration, workers=args.workers)
+    if args.top:
+        passes = rank_passes(passes)[:args.top]
+
+    write_passes_record(passes, args.output)
+    elapsed = time.perf_counter() - started
+    print(f"Found {len(passes)} visible passes of {len({p['norad_id'] for p in passes})} satellites "
+          f"in {elapsed:.1f} s; results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
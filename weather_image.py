@@ -0,0 +1,124 @@
+"""
+The GOES weather image for the run_it_up window, fetched off the Tk thread.
+
+    fetcher = WeatherImageFetcher()
+    fetcher.start()
+    image = fetcher.latest()             # a PIL Image, or None if nothing new
+    photo = ImageTk.PhotoImage(image)    # on the Tk thread
+
+Replaces run_it_up's download_and_convert_image / update_image_label, which
+ran urlretrieve on the Tk thread (freezing the window for the whole download)
+and went through weather.jpg and weather.png on disk every time. Unchanged
+images are skipped with a conditional request.
+"""
+import io
+import logging
+import queue
+import threading
+
+import requests
+from PIL import Image, ImageDraw, ImageFont
+
+import clock
+
+WEATHER_IMAGE_URL = "https://cdn.star.nesdis.noaa.gov/GOES16/ABI/SECTOR/sr/GEOCOLOR/600x600.jpg"
+OBSERVATORY_XY = (305, 263)  # Cloudcroft on the resized image
+LABEL_TEXT = "New Mexico Skies"
+FONT_PATH = "arial.ttf"
+
+
+class WeatherImageFetcher:
+    """
+    Keeps the GOES GEOCOLOR image fresh on a background thread.
+
+    Every `interval` seconds the image is requested with the ETag and
+    Last-Modified of the previous one, so an unchanged image costs a 304
+    and nothing else. A new image is decoded, resized and annotated in
+    memory and handed over through a one-slot queue. The Tk thread picks it
+    up with latest() and only has to wrap it in a PhotoImage; nothing is
+    written to disk.
+    """
+    def __init__(self, url: str = WEATHER_IMAGE_URL, interval: float = 300, size: tuple = (500, 500),
+                 observatory_xy: tuple = OBSERVATORY_XY, label_text: str = LABEL_TEXT, timeout: float = 30):
+        self.url = url
+        self.interval = interval
+        self.size = size
+        self.observatory_xy = observatory_xy
+        self.label_text = label_text
+        self.timeout = timeout
+        self.images = queue.Queue(maxsize=1)
+        self.validators = {}  # If-None-Match / If-Modified-Since for the next request
+        self.stopped = threading.Event()
+        self.thread = None
+        self.font = None
+        self.fetches = 0
+        self.unchanged = 0
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='weather-image', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def latest(self):
+        """The newest processed image since the last call (a PIL Image), or None; never blocks."""
+        try:
+            return self.images.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        session = requests.Session()
+        while not self.stopped.is_set():
+            try:
+                image = self.fetch(session)
+                if image is not None:
+                    self._offer(image)
+            except Exception as e:
+                logging.warning(f"Weather image update failed: {e}")
+            clock.wait_event(self.stopped, self.interval)
+
+    def _offer(self, image):
+        # One slot: a newer image replaces one the UI has not picked up yet
+        try:
+            self.images.get_nowait()
+        except queue.Empty:
+            pass
+        self.images.put_nowait(image)
+
+    def fetch(self, session=requests):
+        """The processed image if it changed since the last fetch, else None."""
+        self.fetches += 1
+        response = session.get(self.url, headers=self.validators, timeout=self.timeout)
+        if response.status_code == 304:
+            self.unchanged += 1
+            return None
+        response.raise_for_status()
+        self.validators = {}
+        if response.headers.get('ETag'):
+            self.validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            self.validators['If-Modified-Since'] = response.headers['Last-Modified']
+        return self.process(response.content)
+
+    def process(self, data: bytes):
+        """Decode, resize and annotate the downloaded JPEG, all in memory."""
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft('RGB', self.size)  # lets the JPEG decoder skip detail the resize would throw away
+            img = img.convert('RGB').resize(self.size, Image.Resampling.LANCZOS)
+        x, y = self.observatory_xy
+        draw = ImageDraw.Draw(img)
+        draw.ellipse((x - 4, y - 4, x + 4, y + 4), fill='red')
+        draw.text((x + 9, y), self.label_text, fill="white", font=self._font())
+        return img
+
+    def _font(self):
+        if self.font is None:
+            try:
+                self.font = ImageFont.truetype(FONT_PATH, 14)
+            except IOError:
+                logging.warning(f"Unable to load font '{FONT_PATH}'. Using default font.")
+                self.font = ImageFont.load_default()
+        return self.font